@@ -1,12 +1,127 @@
 import os
+import threading
+from collections import Counter, defaultdict
+from http.server import ThreadingHTTPServer
+
 import pytest
+import requests
 import yaml
-from utils.http import APIClient
+from utils.auth_cache import DEFAULT_PATH as DEFAULT_AUTH_CACHE_PATH, AuthCache, SessionAuth
+from utils.cassette import Cassette
+from utils.http import APIClient, AsyncAPIClient
+from utils.http_cache import ResponseCache
+from utils.metrics import RequestMetrics
+from utils.prefetch import Prefetch
+from utils.throttle import Throttle
+from utils.workers import assign_files, durations_path, load_durations, save_durations, worker_path, worker_shard
+
+ROOT = os.path.dirname(__file__)
+# seconds spent per test file in this process, saved at the end of the session
+_file_durations = defaultdict(float)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--mock-server", action="store_true",
+        help="start a private mock API (scripts/mock_api.py) on a free port in this process and point BASE_URL at it",
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("--mock-server"):
+        from scripts.mock_api import make_server
+        server = make_server(port=0)
+        threading.Thread(target=server.serve_forever, name="mock-api", daemon=True).start()
+        os.environ["BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+        config.mock_server = server
+
+
+def pytest_unconfigure(config):
+    server = getattr(config, "mock_server", None)
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+def pytest_collection_modifyitems(config, items):
+    """In a run split by scripts/run_parallel.py, keep only this worker's test files."""
+    shard = worker_shard()
+    if shard is None:
+        return
+    index, count = shard
+    tests_per_file = Counter(item.nodeid.split("::")[0] for item in items)
+    assignment = assign_files(tests_per_file, count, load_durations(durations_path(ROOT)))
+    keep, deselected = [], []
+    for item in items:
+        (keep if assignment[item.nodeid.split("::")[0]] == index else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = keep
+
+
+def pytest_collection_finish(session):
+    """Gather the read-only resources the selected tests declare with @pytest.mark.prefetch."""
+    session.config.prefetch_paths = sorted({
+        path for item in session.items for mark in item.iter_markers("prefetch") for path in mark.args
+    })
+
+
+def pytest_runtest_logreport(report):
+    _file_durations[report.nodeid.split("::")[0]] += report.duration
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # only split runs record durations: workers write their own file and
+    # scripts/run_parallel.py merges them after the run
+    if worker_shard() is None:
+        return
+    try:
+        save_durations(dict(_file_durations), worker_path(durations_path(ROOT)))
+    except OSError:
+        pass
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _generated_schema_dir(tmp_path_factory):
+    # generated validators go to a temporary directory, not utils/_generated/ in the source tree
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("SCHEMA_CODEGEN_DIR", str(tmp_path_factory.mktemp("schema_codegen")))
+        yield
+
+
+def _quiet_log(self, *args):
+    pass
+
+
+@pytest.fixture
+def http_server():
+    """Start local test servers: `base_url = http_server(Handler)`.
+
+    `Handler` (a BaseHTTPRequestHandler subclass) is served by a ThreadingHTTPServer
+    on a free 127.0.0.1 port, speaking HTTP/1.1 keep-alive with the request log
+    silenced unless the handler sets those itself. The servers stop after the test.
+    """
+    servers = []
+
+    def start(handler):
+        if "protocol_version" not in vars(handler):
+            handler.protocol_version = "HTTP/1.1"
+        if "log_message" not in vars(handler):
+            handler.log_message = _quiet_log
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
 
 
 @pytest.fixture(scope="session")
 def config():
-    config_path = os.path.join(os.path.dirname(__file__), "config.yaml")
+    config_path = os.path.join(ROOT, "config.yaml")
     with open(config_path) as f:
         return yaml.safe_load(f)
 
@@ -21,6 +136,21 @@ def merged_config(config):
       - AUTH_PASSWORD
       - VERIFY_SSL (true/false)
       - DEFAULT_TIMEOUT
+      - HTTP_TIMING (true/false) - attach per-phase timings to every response
+      - ASYNC_CONCURRENCY - requests in flight per AsyncAPIClient
+      - HTTP_POOL_MAXSIZE - keep-alive connections per host
+      - HTTP_POOL_BLOCK (true/false) - wait for a free connection instead of opening extras
+      - HTTP_POOL_PREWARM - connections opened before the first request
+      - HTTP_CACHE (true/false) - conditional-GET response cache in the client fixtures
+      - HTTP_CACHE_TTL - seconds a cached response is served without revalidation
+      - HTTP_COALESCE (true/false) - identical concurrent GETs share one request
+      - HTTP_RATE_LIMIT - requests per second per host (unset: unlimited)
+      - HTTP_RETRY_BUDGET - retries allowed as a fraction of requests (plus throttle.min_retries)
+      - HTTP_METRICS (true/false) - record client metrics, written at the end of the session
+      - HTTP_CASSETTE - cassette file the client fixtures record to / replay from
+      - HTTP_CASSETTE_MODE (record/replay/auto) - what to do with HTTP_CASSETTE
+      - AUTH_CACHE (true/false) - share login sessions between processes (see utils/auth_cache.py)
+      - AUTH_CACHE_TTL - seconds a cached login session is reused
     """
     cfg = dict(config or {})
     # override with env vars when provided
@@ -45,32 +175,179 @@ def merged_config(config):
     if timeout:
         cfg.setdefault("defaults", {})["timeout"] = int(timeout)
 
+    timing = os.environ.get("HTTP_TIMING")
+    if timing is not None:
+        cfg["timing"] = timing.lower() not in ("0", "false", "no")
+
+    concurrency = os.environ.get("ASYNC_CONCURRENCY")
+    if concurrency:
+        cfg.setdefault("defaults", {})["async_concurrency"] = int(concurrency)
+
+    pool = dict(cfg.get("pool") or {})
+    if os.environ.get("HTTP_POOL_MAXSIZE"):
+        pool["maxsize"] = int(os.environ["HTTP_POOL_MAXSIZE"])
+    if os.environ.get("HTTP_POOL_BLOCK") is not None:
+        pool["block"] = os.environ["HTTP_POOL_BLOCK"].lower() not in ("0", "false", "no")
+    if os.environ.get("HTTP_POOL_PREWARM"):
+        pool["prewarm"] = int(os.environ["HTTP_POOL_PREWARM"])
+    cfg["pool"] = pool
+
+    cache = dict(cfg.get("cache") or {})
+    if os.environ.get("HTTP_CACHE") is not None:
+        cache["enabled"] = os.environ["HTTP_CACHE"].lower() not in ("0", "false", "no")
+    if os.environ.get("HTTP_CACHE_TTL"):
+        cache["ttl"] = float(os.environ["HTTP_CACHE_TTL"])
+    cfg["cache"] = cache
+
+    throttle = dict(cfg.get("throttle") or {})
+    if os.environ.get("HTTP_RATE_LIMIT"):
+        throttle["rate"] = float(os.environ["HTTP_RATE_LIMIT"])
+    if os.environ.get("HTTP_RETRY_BUDGET"):
+        throttle["retry_budget"] = float(os.environ["HTTP_RETRY_BUDGET"])
+    cfg["throttle"] = throttle
+
+    metrics = dict(cfg.get("metrics") or {})
+    if os.environ.get("HTTP_METRICS") is not None:
+        metrics["enabled"] = os.environ["HTTP_METRICS"].lower() not in ("0", "false", "no")
+    cfg["metrics"] = metrics
+
+    cassette = dict(cfg.get("cassette") or {})
+    if os.environ.get("HTTP_CASSETTE") is not None:
+        cassette["path"] = os.environ["HTTP_CASSETTE"]
+    if os.environ.get("HTTP_CASSETTE_MODE"):
+        cassette["mode"] = os.environ["HTTP_CASSETTE_MODE"].lower()
+    cfg["cassette"] = cassette
+
+    auth_cache = dict(cfg.get("auth_cache") or {})
+    if os.environ.get("AUTH_CACHE") is not None:
+        auth_cache["enabled"] = os.environ["AUTH_CACHE"].lower() not in ("0", "false", "no")
+    if os.environ.get("AUTH_CACHE_TTL"):
+        auth_cache["ttl"] = float(os.environ["AUTH_CACHE_TTL"])
+    cfg["auth_cache"] = auth_cache
+
+    coalesce = os.environ.get("HTTP_COALESCE")
+    if coalesce is not None:
+        cfg["coalesce"] = coalesce.lower() not in ("0", "false", "no")
+
     return cfg
 
 
 @pytest.fixture(scope="session")
-def api_client(merged_config):
+def request_metrics(merged_config):
+    """Shared RequestMetrics for the client fixtures, or None when metrics are disabled.
+
+    At the end of the session the metrics are written to `metrics.prometheus` (text
+    exposition format) and the spans to `metrics.spans` (OTLP JSON).
+    """
+    cfg = merged_config.get("metrics", {})
+    if not cfg.get("enabled"):
+        yield None
+        return
+    try:
+        from utils.catalog import load_plan
+        routes = load_plan().routes
+    except Exception:
+        routes = None  # fall back to id-segment templating
+    metrics = RequestMetrics(routes=routes, record_spans=bool(cfg.get("spans")))
+    yield metrics
+    # one file per worker in a parallel run, merged by scripts/run_parallel.py
+    if cfg.get("prometheus"):
+        metrics.write_prometheus(worker_path(os.path.join(ROOT, cfg["prometheus"])))
+    if cfg.get("spans"):
+        metrics.write_spans(worker_path(os.path.join(ROOT, cfg["spans"])))
+
+
+@pytest.fixture(scope="session")
+def http_cassette(merged_config):
+    """Cassette shared by the client fixtures, or None when `cassette.path` is not set.
+
+    In `replay` mode the client fixtures answer from the cassette without opening a
+    socket; in `record`/`auto` mode the cassette is written when the session ends.
+    """
+    cfg = merged_config.get("cassette", {})
+    if not cfg.get("path"):
+        yield None
+        return
+    path = os.path.join(ROOT, cfg["path"])
+    cassette = Cassette(path, mode=cfg.get("mode", "replay"))
+    yield cassette
+    cassette.close()
+
+
+@pytest.fixture(scope="session")
+def auth_cache(merged_config, http_cassette):
+    """Login sessions shared with other processes on this machine, or None when disabled.
+
+    Not used with a cassette: a cassette must hold the login it replays.
+    """
+    cfg = merged_config.get("auth_cache", {})
+    if not cfg.get("enabled") or http_cassette is not None:
+        return None
+    path = os.path.join(ROOT, cfg["path"]) if cfg.get("path") else DEFAULT_AUTH_CACHE_PATH
+    return AuthCache(path, ttl=cfg.get("ttl", 1800))
+
+
+@pytest.fixture(scope="session")
+def api_client(merged_config, request_metrics, http_cassette):
     """API client using merged configuration (config.yaml overlaid with env vars)."""
-    cfg = merged_config
-    client = APIClient(base_url=cfg.get("base_url"), timeout=cfg.get("defaults", {}).get("timeout", 10), verify=cfg.get("verify_ssl", True))
-    return client
+    return _sync_client(merged_config, request_metrics, http_cassette)
 
 
 @pytest.fixture(scope="session")
-def auth_api_client(merged_config):
+def auth_api_client(merged_config, request_metrics, http_cassette, auth_cache):
     """Return an APIClient pre-authenticated via /api/login (uses config.auth)
 
     If login is successful and the response contains cookies (JSESSIONID), those cookies
     are copied into the session. If the response contains a bearer token in the JSON
     (e.g., token field), it is added to Authorization header.
+
+    With the auth cache enabled, a session another process logged in is reused, and
+    a 401 triggers a fresh login (see utils/auth_cache.py).
+    """
+    return _login(_sync_client(merged_config, request_metrics, http_cassette), merged_config, auth_cache)
+
+
+@pytest.fixture(scope="session")
+def prefetched(request, auth_api_client, merged_config):
+    """Prefetch of the GETs declared with @pytest.mark.prefetch(path, ...), via auth_api_client.
+
+    All declared paths are fetched concurrently when the fixture is set up (see
+    utils/prefetch.py); `prefetched[path]` returns the shared response.
     """
-    client = APIClient(base_url=merged_config.get("base_url"), timeout=merged_config.get("defaults", {}).get("timeout", 10), verify=merged_config.get("verify_ssl", True))
+    prefetch = Prefetch(auth_api_client, getattr(request.config, "prefetch_paths", ()))
+    prefetch.fetch_all(concurrency=merged_config.get("pool", {}).get("maxsize", 10))
+    return prefetch
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _prefetch_declared(request):
+    # fetch the declared resources before the first test, not in the first test that needs them
+    if getattr(request.config, "prefetch_paths", None):
+        try:
+            request.getfixturevalue("prefetched")
+        except (pytest.skip.Exception, requests.RequestException):
+            pass  # no credentials or no server: the tests that use `prefetched` report it
+
+
+def _login(client, merged_config, auth_cache=None):
+    """Log `client` in via /api/login and copy the session cookie / token into it."""
     auth = merged_config.get("auth", {})
     username = auth.get("username")
     password = auth.get("password")
     if not username:
         pytest.skip("No auth username configured in config.yaml or AUTH_USERNAME env var")
 
+    if auth_cache is not None:
+        credentials = {"username": username, "password": password}
+        client.session.auth = SessionAuth(
+            auth_cache, client.base_url, username, login=lambda: client.post("/api/login", json=credentials)
+        )
+        try:
+            client.session.auth.current()
+        except Exception:
+            pass  # network error — the next request tries to log in again
+        return client
+
     # Attempt login
     try:
         resp = client.post("/api/login", json={"username": username, "password": password})
@@ -95,3 +372,83 @@ def auth_api_client(merged_config):
         pass
 
     return client
+
+
+def _prewarm(client, cfg):
+    # best effort: an unreachable server shows up in the tests themselves
+    try:
+        client.prewarm(cfg.get("pool", {}).get("prewarm", 0))
+    except Exception:
+        pass
+    return client
+
+
+def _response_cache(cfg):
+    cache = cfg.get("cache", {})
+    if not cache.get("enabled"):
+        return None
+    return ResponseCache(max_entries=cache.get("max_entries", 256), ttl=cache.get("ttl", 0))
+
+
+def _throttle(cfg):
+    throttle = cfg.get("throttle", {})
+    return Throttle(
+        rate=throttle.get("rate"),
+        burst=throttle.get("burst"),
+        retry_budget=throttle.get("retry_budget", 0.2),
+        min_retries=throttle.get("min_retries", 10),
+        max_retry_after=throttle.get("max_retry_after", 30),
+    )
+
+
+def _sync_client(cfg, metrics=None, cassette=None):
+    pool = cfg.get("pool", {})
+    client = APIClient(
+        base_url=cfg.get("base_url"),
+        timeout=cfg.get("defaults", {}).get("timeout", 10),
+        verify=cfg.get("verify_ssl", True),
+        timing=cfg.get("timing", False),
+        pool_maxsize=pool.get("maxsize", 10),
+        pool_block=pool.get("block", False),
+        cache=_response_cache(cfg),
+        coalesce=cfg.get("coalesce", False),
+        throttle=_throttle(cfg),
+        metrics=metrics,
+        cassette=cassette,
+    )
+    return _prewarm(client, cfg)
+
+
+def _async_client(cfg, metrics=None, cassette=None):
+    defaults = cfg.get("defaults", {})
+    client = AsyncAPIClient(
+        base_url=cfg.get("base_url"),
+        timeout=defaults.get("timeout", 10),
+        verify=cfg.get("verify_ssl", True),
+        timing=cfg.get("timing", False),
+        concurrency=defaults.get("async_concurrency", 10),
+        cache=_response_cache(cfg),
+        coalesce=cfg.get("coalesce", False),
+        throttle=_throttle(cfg),
+        metrics=metrics,
+        cassette=cassette,
+    )
+    return _prewarm(client, cfg)
+
+
+@pytest.fixture(scope="session")
+def async_api_client(merged_config, request_metrics, http_cassette):
+    """AsyncAPIClient using merged configuration; drive it with asyncio.run() in the test."""
+    client = _async_client(merged_config, request_metrics, http_cassette)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def async_auth_api_client(merged_config, request_metrics, http_cassette, auth_cache):
+    """AsyncAPIClient pre-authenticated via /api/login, like auth_api_client."""
+    client = _async_client(merged_config, request_metrics, http_cassette)
+    # the async client wraps a sync APIClient sharing its cookies and headers
+    _login(client.client, merged_config, auth_cache)
+    yield client
+    client.close()
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 """Check common API endpoints and print HTTP status + response body.
 
-Usage: python scripts/check_endpoints.py [-u USER] [-p PASS] [--base-url URL]
+Usage: python scripts/check_endpoints.py [-u USER] [-p PASS] [--base-url URL] [--concurrency N]
+                                         [--catalog endpoints.yaml]
+
+The endpoints, their payloads, expected statuses and schemas come from the
+declarative catalog (endpoints.yaml at the project root by default).
 """
 import argparse
 import os
@@ -9,7 +13,24 @@ import sys
 import json
 from textwrap import shorten
 import glob
+import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.histogram import LatencyHistogram
+from utils.json_stream import StreamingEnvelope
+from utils.report_writer import JUnitStreamWriter, NDJSONReportWriter
+from utils.results_store import DEFAULT_PATH as DEFAULT_STORE_PATH, ResultsStore, read_report
+from utils.regression import (
+    DEFAULT_ALPHA, DEFAULT_MIN_SLOWDOWN, compare_latency, format_comparison, histograms_by_endpoint,
+)
+from utils.catalog import DEFAULT_CATALOG, load_plan
+from utils.slo import MIN_SAMPLES as SLO_MIN_SAMPLES, evaluate_budget, format_breach
+from utils.throttle import DEFAULT_MIN_RETRIES, DEFAULT_RETRY_BUDGET, Throttle
+from utils.auth_cache import AuthCache, SessionAuth
+from utils.cassette import Cassette, CassetteError
+from utils.compression import CompressionStats, accept_encoding, measure
 
 try:
     import requests
@@ -18,42 +39,52 @@ except Exception:
     sys.exit(1)
 try:
     from utils import schema_loader
+    from utils.schema_index import get_default_index
 except Exception:
     schema_loader = None
 try:
-    from jsonschema import validate as jsonschema_validate, ValidationError
+    from jsonschema import ValidationError
+    # cached validators: each schema is compiled (and metaschema-checked) once per process
+    from utils.schema import validate_instance as jsonschema_validate, get_checker
+    from utils.batch_validate import validate_items
 except Exception:
     jsonschema_validate = None
     ValidationError = Exception
 
 
-ENDPOINTS = [
-    ("GET", "/api/hello"),
-    ("GET", "/api/debug/ip"),
-    ("GET", "/api/users"),
-    ("GET", "/api/users/phanith.chhim"),
-    ("GET", "/api/users/phanith.chhim/permissions"),
-    ("GET", "/api/roles"),
-    ("GET", "/api/roles/permissions/1"),
-]
-
-# map endpoints to expected schema filenames (optional). Keys are tuples (METHOD, PATH)
-# If path contains variables use placeholder like /api/users/{id}
-SCHEMA_MAP = {
-    ("GET", "/api/hello"): "HelloResponse.json",
-    ("GET", "/api/users"): "GetUsersRequest.json",
-    ("GET", "/api/users/{id}"): "GetUserDto.json",
-    ("GET", "/api/users/{id}/permissions"): "UserPermissionDto.json",
-    ("GET", "/api/roles"): "role_schema.json",
-    ("POST", "/api/login"): "LoginResponse.json",
-}
-
-# For list endpoints that return {"data": [...] }, validate each item against ITEM_SCHEMA_MAP
-ITEM_SCHEMA_MAP = {
-    ("GET", "/api/users"): "GetUserDto.json",
-    ("GET", "/api/roles"): "RoleDto.json",
-    ("GET", "/api/users/{id}/permissions"): "UserPermissionDto.json",
-}
+# latency summary fields exported as JUnit <property> elements
+LATENCY_PROPERTIES = ("count", "min_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms", "mean_ms", "throughput_rps")
+
+
+def junit_testcase(e):
+    """Build the JUnit <testcase> element for one report entry."""
+    tc_name = f"{e.get('method')} {e.get('path')}"
+    tc = ET.Element('testcase', classname='check_endpoints', name=tc_name)
+    latency = e.get('latency') or {}
+    if latency.get('count'):
+        # expose sampled timings so CI shows speed as well as status
+        props = ET.SubElement(tc, 'properties')
+        for key in LATENCY_PROPERTIES:
+            if latency.get(key) is not None:
+                ET.SubElement(props, 'property', name=f"latency_{key}", value=str(latency[key]))
+    # mark failure on HTTP error, schema invalid or latency budget exceeded
+    if not e.get('ok'):
+        failure = ET.SubElement(tc, 'failure', message=e.get('error', 'http_error'))
+        failure.text = json.dumps(e.get('body') or e.get('body_text') or {})
+        return tc
+    schema = e.get('schema') or {}
+    budget = e.get('budget') or {}
+    if schema and schema.get('valid') is False:
+        failure = ET.SubElement(tc, 'failure', message=schema.get('error', 'schema_validation_failed'))
+        failure.text = json.dumps(schema)
+    elif budget.get('ok') is False:
+        breaches = ", ".join(format_breach(c) for c in budget['breaches'])
+        failure = ET.SubElement(tc, 'failure', message=f"latency_budget_exceeded: {breaches}")
+        failure.text = json.dumps(budget)
+    elif (e.get('regression') or {}).get('status') == 'regression':
+        failure = ET.SubElement(tc, 'failure', message=f"latency_regression: {format_comparison(e['regression'])}")
+        failure.text = json.dumps(e['regression'])
+    return tc
 
 
 def pretty_print_resp(r):
@@ -66,43 +97,259 @@ def pretty_print_resp(r):
     print(shorten(body_str, 2000))
 
 
-def do_req(session, method, url, json_body=None):
+# streaming mode: bytes read per chunk, and how many failing items are kept per response
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_ERROR_LIMIT = 20
+
+
+def stream_validate_items(r, item_check):
+    """Parse a JSON body incrementally, validating each `data[]` element as it is decoded.
+
+    Items are discarded once checked, so memory is bounded by one item. Returns the
+    envelope (every other top-level member) as `body` plus a `streamed` summary and
+    the first STREAM_ERROR_LIMIT failures as `stream_errors`. `received_at` is the
+    perf_counter() time the last chunk was read and `check_seconds` the time spent in
+    `item_check` before that, so the caller can time the transfer alone.
+    """
+    clock = {"received_at": None, "check_seconds": 0.0, "checking": 0.0}
+
+    def chunks():
+        for chunk in r.iter_content(STREAM_CHUNK_SIZE):
+            yield chunk
+        clock["received_at"] = time.perf_counter()
+        clock["check_seconds"] = clock["checking"]
+
+    parser = StreamingEnvelope(chunks())
+    failed = 0
+    errors = []
+    for idx, item in parser.items():
+        check_started = time.perf_counter()
+        try:
+            item_check(item)
+        except ValidationError as ie:
+            failed += 1
+            if len(errors) < STREAM_ERROR_LIMIT:
+                errors.append({"index": idx, "ok": False, "error": str(ie)})
+        clock["checking"] += time.perf_counter() - check_started
+    return {
+        "body": parser.envelope,
+        "streamed": {"items": parser.count, "failed": failed, "list_found": parser.found_list},
+        "stream_errors": errors,
+        "received_at": clock["received_at"] or time.perf_counter(),
+        "check_seconds": clock["check_seconds"] if clock["received_at"] else clock["checking"],
+    }
+
+
+def do_req(session, method, url, json_body=None, item_check=None):
+    """Send one request and return a structured result.
+
+    With `item_check` (a utils.schema.get_checker function), a JSON response is streamed and its `data[]` elements are
+    validated while the body is read (see stream_validate_items) instead of loading
+    the whole payload first.
+
+    `elapsed_ms` ends when the body has been received: JSON decoding, size
+    measurement and (in stream mode) time spent in `item_check` are not latency.
+    """
+    stream = item_check is not None
+    started = time.perf_counter()
     try:
         if method == "GET":
-            r = session.get(url, timeout=5)
+            r = session.get(url, timeout=5, stream=stream)
         elif method == "POST":
-            r = session.post(url, json=json_body, timeout=5)
+            r = session.post(url, json=json_body, timeout=5, stream=stream)
         else:
-            r = session.request(method, url, timeout=5)
+            r = session.request(method, url, json=json_body, timeout=5, stream=stream)
     except Exception as e:
         return {"ok": False, "error": str(e)}
+    # without stream=True the body has been read by now
+    received_at, check_seconds = time.perf_counter(), 0.0
     # return minimal structured result
     result = {"ok": True, "status_code": r.status_code}
-    try:
-        result["body"] = r.json()
-    except Exception:
-        result["body_text"] = r.text or ""
+    if stream and "json" in r.headers.get("Content-Type", ""):
+        try:
+            streamed = stream_validate_items(r, item_check)
+            received_at, check_seconds = streamed.pop("received_at"), streamed.pop("check_seconds")
+            result.update(streamed)
+        except Exception as e:
+            received_at = time.perf_counter()
+            result["body_text"] = ""
+            result["stream_error"] = str(e)
+        finally:
+            # the decoded body was never held in memory; only the wire size is known
+            result["bytes"] = {"wire": r.raw.tell(), "encoding": r.headers.get("Content-Encoding") or "identity"}
+            r.close()
+    else:
+        if stream:
+            r.content  # not JSON: read the streamed body before stopping the clock
+            received_at = time.perf_counter()
+        try:
+            result["body"] = r.json()
+        except Exception:
+            result["body_text"] = r.text or ""
+        sizes = measure(r)
+        if sizes is not None:
+            result["bytes"] = {"wire": sizes[0], "decoded": sizes[1], "encoding": sizes[2]}
+    # time spent waiting for the client-side rate limit is not part of the request's latency
+    throttle_wait_ms = getattr(r, "throttle_wait_ms", 0.0)
+    result["elapsed_ms"] = round((received_at - started - check_seconds) * 1000.0 - throttle_wait_ms, 3)
+    if throttle_wait_ms:
+        result["throttle_wait_ms"] = round(throttle_wait_ms, 3)
+    # per-phase breakdown, present when the session was built with timing=True
+    timings = getattr(r, "timings", None)
+    if timings is not None:
+        if stream:
+            timings.finish()  # the body was read after the session returned
+        result["timings"] = timings.as_dict()
     result["raw_resp"] = r
     return result
 
 
+def sample_endpoint(session, method, url, repeat=1, warmup=0, json_body=None, item_check=None):
+    """Send `warmup` untimed requests, then `repeat` timed ones.
+
+    Returns the result of the last timed request with a `latency` summary attached
+    (min/p50/p90/p99/max, throughput and the compact histogram). Requests that fail
+    at the transport level are counted in `latency["errors"]` but not timed.
+    """
+    for _ in range(max(0, warmup)):
+        do_req(session, method, url, json_body=json_body, item_check=item_check)
+    hist = LatencyHistogram()
+    errors = 0
+    res = None
+    started = time.perf_counter()
+    for _ in range(max(1, repeat)):
+        res = do_req(session, method, url, json_body=json_body, item_check=item_check)
+        if res.get("ok"):
+            hist.record_ms(res["elapsed_ms"])
+        else:
+            errors += 1
+    wall = time.perf_counter() - started
+    latency = hist.summary(wall_seconds=wall)
+    latency["errors"] = errors
+    latency["histogram"] = hist.to_dict()
+    res["latency"] = latency
+    return res
+
+
+def report_path(started, pid=None):
+    """NDJSON report path for a run started at `started` (UTC datetime).
+
+    The second-resolution stamp is what results_store reads back; microseconds and the
+    pid keep sweeps started in the same second (CI matrices) from sharing a file and
+    a results-store source.
+    """
+    stamp = started.strftime('%Y%m%dT%H%M%SZ')
+    return f"reports/check_endpoints_{stamp}_{started.microsecond:06d}_{pid or os.getpid()}.ndjson"
+
+
+def load_baseline(spec, store_path):
+    """Resolve --compare-baseline to `(label, {(method, path): histogram})`.
+
+    `spec` is a report file, a results-store run id, or "latest" (the newest
+    finished run in the store). Returns `(None, {})` when there is no such run.
+    """
+    if os.path.exists(spec):
+        run = read_report(spec)
+    elif not os.path.exists(store_path):
+        return None, {}
+    else:
+        with ResultsStore(store_path) as store:
+            run = store.latest_run(finished_only=True) if spec == "latest" else store.get_run(int(spec))
+    if run is None:
+        return None, {}
+    label = run.get("source") or f"run {run.get('run_id')}"
+    return label, histograms_by_endpoint(run["results"])
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("-u", "--user", help="username for login/signout")
     p.add_argument("-p", "--pass", dest="passwd", help="password for login")
     p.add_argument("--base-url", default=os.environ.get("BASE_URL", "http://127.0.0.1:8000"))
+    p.add_argument("--catalog", default=DEFAULT_CATALOG, help="Endpoint catalog (YAML/JSON) to check (default: endpoints.yaml)")
     p.add_argument("-v", "--verbose", action="store_true", help="Always print response bodies (default: only failures)")
-    p.add_argument("--strict", action="store_true", help="Exit non-zero if any schema validation fails")
+    p.add_argument("--strict", action="store_true", help="Exit non-zero if any schema validation fails or latency budget is exceeded")
     p.add_argument("--latest-report", action="store_true", help="Print the latest generated report and exit")
+    p.add_argument("--concurrency", type=int, default=1, help="Number of endpoints to request in parallel (default: 1, sequential)")
+    p.add_argument("--repeat", type=int, default=1, help="Timed requests per endpoint; latency percentiles are reported per endpoint")
+    p.add_argument("--warmup", type=int, default=0, help="Untimed warm-up requests per endpoint before sampling")
+    p.add_argument("--stream", action="store_true", help="Stream list responses and validate each data[] item as it is parsed (bounded memory)")
+    p.add_argument("--validate-workers", type=int, default=None, help="Processes used to validate large data[] lists (default: CPU count; 1 = inline)")
+    p.add_argument("--timing", action="store_true", help="Record per-phase timings (DNS, connect, TLS, TTFB, transfer, reuse) per request")
+    p.add_argument("--pool-size", type=int, default=None, help="Keep-alive connections per host (default: max(concurrency, 10))")
+    p.add_argument("--pool-block", action="store_true", help="Wait for a free pooled connection instead of opening extra ones")
+    p.add_argument("--prewarm", type=int, default=0, metavar="N", help="Open N keep-alive connections before the first timed request")
+    p.add_argument(
+        "--compression", default=None, metavar="CODINGS",
+        help="Accept-Encoding to negotiate, e.g. 'gzip' or 'br,gzip' (br only when brotli is installed); 'identity' disables",
+    )
+    p.add_argument("--rate", type=float, default=None, help="Client-side rate limit in requests per second per host")
+    p.add_argument("--burst", type=float, default=None, help="Token bucket size for --rate (default: max(1, rate))")
+    p.add_argument(
+        "--retry-budget", type=float, default=DEFAULT_RETRY_BUDGET,
+        help=f"Retries allowed as a fraction of requests, on top of {DEFAULT_MIN_RETRIES} (default {DEFAULT_RETRY_BUDGET})",
+    )
+    p.add_argument("--record", metavar="CASSETTE", help="Record every request/response to a cassette file (see utils/cassette.py)")
+    p.add_argument(
+        "--replay", metavar="CASSETTE",
+        help="Answer requests from a cassette recorded with --record, without contacting the server (implies --no-store)",
+    )
+    p.add_argument(
+        "--auth-cache", action="store_true",
+        help="Send the sweep's requests with the login session shared through .cache/auth_sessions.json (logging in if none is cached)",
+    )
+    p.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"SQLite results store (default: {DEFAULT_STORE_PATH})")
+    p.add_argument("--no-store", action="store_true", help="Do not record this run in the results store")
+    p.add_argument(
+        "--compare-baseline", nargs="?", const="latest", metavar="RUN",
+        help="Compare sampled latencies with a baseline run (results-store run id, report file, default: latest stored run) "
+        "and exit non-zero on a significant slowdown",
+    )
+    p.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help=f"Significance level for --compare-baseline (default: {DEFAULT_ALPHA})")
+    p.add_argument(
+        "--min-slowdown", type=float, default=DEFAULT_MIN_SLOWDOWN,
+        help=f"Smallest median slowdown reported as a regression, as a fraction (default: {DEFAULT_MIN_SLOWDOWN})",
+    )
+    p.add_argument("--history", metavar="'METHOD PATH'", help="Print the last --last results and latency trend for one endpoint and exit")
+    p.add_argument("--last", type=int, default=10, help="Number of runs shown by --history (default: 10)")
+    p.add_argument("--compact-reports", action="store_true", help="Import per-run report files into the store, keep the newest --keep, delete the rest, and exit")
+    p.add_argument("--keep", type=int, default=1, help="Per-run report files kept by --compact-reports (default: 1)")
     args = p.parse_args()
 
-    # --latest-report: print latest JSON report and exit
+    if args.compact_reports:
+        with ResultsStore(args.store) as store:
+            counts = store.compact("reports", keep=args.keep)
+        print(f"Imported {counts['imported']} report(s) into {args.store}, deleted {counts['deleted']} file(s)")
+        sys.exit(0)
+
+    if args.history:
+        try:
+            method, path = args.history.split(None, 1)
+        except ValueError:
+            p.error("--history expects 'METHOD PATH', e.g. --history 'GET /api/users'")
+        if not os.path.exists(args.store):
+            print("No results store found")
+            sys.exit(0)
+        with ResultsStore(args.store) as store:
+            history = store.endpoint_history(method, path, limit=args.last)
+            trend = store.latency_trend(method, path, limit=args.last)
+        print(json.dumps({"method": method.upper(), "path": path, "history": history, "latency_trend": trend}, indent=2))
+        sys.exit(0)
+
+    # --latest-report: print latest run from the results store, else the latest report file
     if args.latest_report:
+        if os.path.exists(args.store):
+            with ResultsStore(args.store) as store:
+                latest_run = store.latest_run()
+            if latest_run is not None:
+                print(json.dumps(latest_run, indent=2))
+                sys.exit(0)
         rpt_dir = os.path.join(os.getcwd(), "reports")
         if not os.path.isdir(rpt_dir):
             print("No reports directory found")
             sys.exit(0)
-        files = sorted(glob.glob(os.path.join(rpt_dir, "check_endpoints_*.json")), reverse=True)
+        files = glob.glob(os.path.join(rpt_dir, "check_endpoints_*.json")) + glob.glob(os.path.join(rpt_dir, "check_endpoints_*.ndjson"))
+        files.sort(key=lambda f: os.path.splitext(os.path.basename(f))[0], reverse=True)
         if not files:
             print("No report files found")
             sys.exit(0)
@@ -111,17 +358,70 @@ def main():
             print(f.read())
         sys.exit(0)
 
+    if args.record and args.replay:
+        p.error("--record and --replay are mutually exclusive")
+    cassette = None
+    if args.record or args.replay:
+        try:
+            cassette = Cassette(args.record or args.replay, mode="record" if args.record else "replay")
+        except CassetteError as e:
+            p.error(str(e))
+    if args.replay:
+        # replayed latencies say nothing about the server: keep them out of the results store
+        args.no_store = True
+
     base = args.base_url.rstrip("/")
+    # compiled once per catalog content and cached on disk (see utils/catalog.py)
+    plan = load_plan(args.catalog)
+    # resolved before this run is recorded, so "latest" never means the current run
+    baseline_label, baseline = None, {}
+    if args.compare_baseline:
+        baseline_label, baseline = load_baseline(args.compare_baseline, args.store)
+        if baseline_label is None:
+            print(f"No baseline run found for --compare-baseline {args.compare_baseline}; skipping comparison")
+        else:
+            print(f"Comparing latencies with baseline {baseline_label} ({len(baseline)} sampled endpoints)")
     # use retry-capable session from utils.http
     try:
         from utils.http import get_session_with_retries
-        sess = get_session_with_retries()
+        # size the connection pool to the worker count so parallel requests keep their connections
+        sess = get_session_with_retries(
+            pool_maxsize=args.pool_size or max(args.concurrency, 10), timing=args.timing, pool_block=args.pool_block,
+            throttle=Throttle(rate=args.rate, burst=args.burst, retry_budget=args.retry_budget),
+            cassette=cassette,
+        )
     except Exception:
         sess = requests.Session()
+    if args.compression is not None:
+        try:
+            sess.headers["Accept-Encoding"] = accept_encoding(args.compression)
+        except ValueError as e:
+            p.error(f"--compression: {e}")
+    # ${user}/${password} in catalog payloads come from -u/-p
+    variables = {"user": args.user or "phanith.chhim", "password": args.passwd or "Nith@2010"}
+    # --auth-cache: send the login session shared with pytest and other runs (logging in only when
+    # none is cached); the catalog's own login check is sent as is. Cassette runs must stay self-contained.
+    auth_cache = None
+    if args.auth_cache and cassette is None:
+        auth_cache = AuthCache()
+        credentials = {"username": variables["user"], "password": variables["password"]}
+        sess.auth = SessionAuth(
+            auth_cache, base, variables["user"], login=lambda: sess.post(f"{base}/api/login", json=credentials, timeout=5)
+        )
+    if args.prewarm:
+        try:
+            from utils.pool import prewarm_session
+            opened = prewarm_session(sess, f"{base}/", args.prewarm)
+            print(f"Pre-warmed {opened} connection(s) to {base}")
+        except Exception as e:
+            print(f"Connection pre-warm failed: {e}")
 
-    report = {"base_url": base, "results": [], "summary": {} }
     failures = []
     schema_failures = 0
+    budget_failures = 0
+    regressions = 0
+    # wire vs decoded body bytes of the reported responses
+    transfer = CompressionStats()
 
     def print_ok(msg):
         GREEN = "\033[92m"
@@ -161,48 +461,25 @@ def main():
     print(f"Checking endpoints at {base}\n")
     success_count = 0
     fail_count = 0
-    # helper to find schema for a path, supports simple {id} placeholders
-    def find_schema_for(method, path):
-        # exact match
-        key = (method, path)
-        if key in SCHEMA_MAP:
-            return SCHEMA_MAP[key]
-        # try pattern matches
-        for (m, ptn), schema_name in SCHEMA_MAP.items():
-            if m != method:
-                continue
-            # simple placeholder match: replace {id} with wildcard
-            ptn_parts = ptn.split('/')
-            path_parts = path.split('/')
-            if len(ptn_parts) != len(path_parts):
-                continue
-            ok = True
-            for a, b in zip(ptn_parts, path_parts):
-                if a.startswith('{') and a.endswith('}'):
-                    continue
-                if a != b:
-                    ok = False
-                    break
-            if ok:
-                return schema_name
-        return None
-
-    for method, path in ENDPOINTS:
-        full_url = f"{base}{path}"
-        res = do_req(sess, method, full_url)
+    def process_result(step, full_url, res):
+        """Print and validate one endpoint result; return its report entry."""
+        nonlocal success_count, fail_count, schema_failures, budget_failures, regressions
+        method, path = step.method, step.path
         entry = {"method": method, "path": path, "url": full_url}
         if not res:
             print_fail(header_line(method, path, "-", False))
             entry["ok"] = False
             entry["error"] = "request_failed"
-            report["results"].append(entry)
             fail_count += 1
             failures.append({"method": method, "path": path, "reason": "request_failed"})
-            continue
-        entry.update({k: v for k, v in res.items() if k != "raw_resp"})
+            return entry
+        entry.update({k: v for k, v in res.items() if k not in ("raw_resp", "stream_errors")})
+        sizes = res.get("bytes") or {}
+        if "decoded" in sizes:
+            transfer.add(sizes["wire"], sizes["decoded"], sizes["encoding"])
         status = res.get("status_code")
-        # basic success criteria: 200-299
-        if status and 200 <= status < 300:
+        # success criteria: the step's expect_status, else 200-299
+        if step.status_ok(status):
             print_ok(header_line(method, path, status, True))
             entry["ok"] = True
             success_count += 1
@@ -217,8 +494,52 @@ def main():
             print_body(entry)
             failures.append({"method": method, "path": path, "reason": f"http_{status}"})
 
-        # try schema validation if available
-        schema_name = find_schema_for(method, path)
+        latency = entry.get("latency") or {}
+        if latency.get("count") and (args.repeat > 1 or args.verbose):
+            print(
+                f"  latency n={latency['count']} min={latency['min_ms']:.1f} p50={latency['p50_ms']:.1f} "
+                f"p90={latency['p90_ms']:.1f} p99={latency['p99_ms']:.1f} max={latency['max_ms']:.1f} ms, "
+                f"{latency.get('throughput_rps', 0):.1f} req/s"
+            )
+        timings = entry.get("timings")
+        if timings and args.timing:
+            print(
+                f"  timing dns={timings['dns_ms']:.1f} connect={timings['connect_ms']:.1f} tls={timings['tls_ms']:.1f} "
+                f"ttfb={timings['ttfb_ms']:.1f} transfer={timings['transfer_ms']:.1f} total={timings['total_ms']:.1f} ms"
+                f"{' (reused connection)' if timings['reused'] else ''}"
+            )
+        # latency SLO from the catalog, judged on the sampled timings of successful checks
+        hist = LatencyHistogram.from_dict(latency["histogram"]) if latency.get("count") else None
+        budget = step.settings.get("budget")
+        if budget and entry["ok"] and hist is not None:
+            verdict = evaluate_budget(budget, hist)
+            entry["budget"] = verdict
+            if verdict["ok"] is None:
+                if args.verbose:
+                    print(f"  latency budget not judged: {verdict['samples']} sample(s), need {SLO_MIN_SAMPLES} (use --repeat)")
+            elif verdict["ok"]:
+                if args.verbose:
+                    print_ok("  latency budget met: " + ", ".join(f"{c['metric']} {c['actual_ms']:.1f}<={c['limit_ms']:g}ms" for c in verdict["checks"]))
+            else:
+                breaches = ", ".join(format_breach(c) for c in verdict["breaches"])
+                print_fail(f"  latency budget exceeded over {verdict['samples']} sample(s): {breaches}")
+                failures.append({"method": method, "path": path, "reason": f"latency_budget: {breaches}"})
+                budget_failures += 1
+        # statistical comparison with the same endpoint in the baseline run
+        base_hist = baseline.get((method, path))
+        if base_hist is not None and entry["ok"] and hist is not None:
+            comparison = compare_latency(base_hist, hist, alpha=args.alpha, min_slowdown=args.min_slowdown)
+            entry["regression"] = comparison
+            text = format_comparison(comparison)
+            if comparison["status"] == "regression":
+                print_fail(f"  latency regression vs baseline: {text}")
+                failures.append({"method": method, "path": path, "reason": f"latency_regression: {text}"})
+                regressions += 1
+            elif text and (args.repeat > 1 or args.verbose):
+                print(f"  vs baseline: {text}")
+
+        # try schema validation if available; schemas were resolved when the plan was compiled
+        schema_name = step.schema
         # prepare body for validation attempts
         body = entry.get("body")
         if body is None:
@@ -228,7 +549,7 @@ def main():
                 body = None
 
         if schema_name and tools_available:
-            schema = schema_loader.load_schema(schema_name)
+            schema = plan.schema(schema_name)
             if schema is None:
                 entry["schema"] = {"name": schema_name, "found": False}
             else:
@@ -242,7 +563,7 @@ def main():
                             )
                         ):
                             try:
-                                jsonschema_validate(instance=entry.get("body_text"), schema=schema)
+                                jsonschema_validate(instance=entry.get("body_text"), schema=schema, name=schema_name)
                                 entry["schema"]["valid"] = True
                                 print_ok(f"Schema {schema_name} OK (validated against plain-text body)")
                             except ValidationError as e:
@@ -255,10 +576,24 @@ def main():
                             entry["schema"]["error"] = "no_json_body"
                             print_fail("Response has no JSON body for schema validation")
                     else:
+                        streamed = entry.get("streamed") or {}
+                        if streamed.get("list_found"):
+                            # items were validated while the body streamed in; only failures were kept
+                            item_schema_name = step.item_schema
+                            entry['schema']['item_schema'] = item_schema_name
+                            entry['schema']['items_checked'] = streamed["items"]
+                            entry['schema']['items'] = res.get("stream_errors") or []
+                            if not streamed["failed"]:
+                                entry["schema"]["valid"] = True
+                                print_ok(f"All {streamed['items']} items validate against {item_schema_name} (streamed)")
+                            else:
+                                entry["schema"]["valid"] = False
+                                print_fail(f"{streamed['failed']} of {streamed['items']} items failed validation against {item_schema_name} (streamed)")
+                                for it in entry['schema']['items']:
+                                    print_fail(f" item[{it['index']}] error: {it.get('error')}")
                         # if response is a wrapper with data list, validate items if we have an item schema
-                        if isinstance(body, dict) and isinstance(body.get("data"), list):
-                            # try exact mapping then generic fallback
-                            item_schema_name = ITEM_SCHEMA_MAP.get((method, path)) or ITEM_SCHEMA_MAP.get((method, path.split('/')[0]))
+                        elif isinstance(body, dict) and isinstance(body.get("data"), list):
+                            item_schema_name = step.item_schema
                             # fallback: derive item schema from request schema name if possible
                             if not item_schema_name and schema_name and schema_name.lower().endswith('request.json'):
                                 item_schema_guess = schema_name.replace('Request.json', 'Dto.json')
@@ -266,34 +601,28 @@ def main():
                                     item_schema_name = item_schema_guess
 
                             if item_schema_name:
-                                item_schema = schema_loader.load_schema(item_schema_name)
-                                item_results = []
-                                all_ok = True
-                                for idx, item in enumerate(body.get('data', [])):
-                                    try:
-                                        jsonschema_validate(instance=item, schema=item_schema)
-                                        item_results.append({"index": idx, "ok": True})
-                                    except ValidationError as ie:
-                                        item_results.append({"index": idx, "ok": False, "error": str(ie)})
-                                        all_ok = False
+                                item_schema = plan.schema(item_schema_name) or schema_loader.load_schema(item_schema_name)
+                                items = body['data']
+                                # large lists are chunked across a process pool; only failures come back
+                                item_failures = validate_items(items, item_schema, item_schema_name, workers=args.validate_workers)
                                 entry['schema']['item_schema'] = item_schema_name
-                                entry['schema']['items'] = item_results
-                                if all_ok:
+                                entry['schema']['items_checked'] = len(items)
+                                entry['schema']['items'] = [{"index": idx, "ok": False, "error": err} for idx, err in item_failures]
+                                if not item_failures:
                                     entry["schema"]["valid"] = True
-                                    print_ok(f"All items validate against {item_schema_name}")
+                                    print_ok(f"All {len(items)} items validate against {item_schema_name}")
                                 else:
                                     entry["schema"]["valid"] = False
-                                    print_fail(f"Some items failed validation against {item_schema_name}")
-                                    for it in item_results:
-                                        if not it.get('ok'):
-                                            print_fail(f" item[{it['index']}] error: {it.get('error')}")
+                                    print_fail(f"{len(item_failures)} of {len(items)} items failed validation against {item_schema_name}")
+                                    for it in entry['schema']['items']:
+                                        print_fail(f" item[{it['index']}] error: {it.get('error')}")
                             else:
                                 # no item schema known, validate wrapper directly
-                                jsonschema_validate(instance=body, schema=schema)
+                                jsonschema_validate(instance=body, schema=schema, name=schema_name)
                                 entry["schema"]["valid"] = True
                                 print_ok(f"Schema {schema_name} OK")
                         else:
-                            jsonschema_validate(instance=body, schema=schema)
+                            jsonschema_validate(instance=body, schema=schema, name=schema_name)
                             entry["schema"]["valid"] = True
                             print_ok(f"Schema {schema_name} OK")
                 except ValidationError as e:
@@ -302,33 +631,21 @@ def main():
                     print_fail(f"Schema {schema_name} FAILED: {e}")
                     print_body(entry)
 
-        # fallback: if no mapped schema or mapped schema failed, try all schemas
+        # fallback: if no mapped schema or mapped schema failed, look the body up in the
+        # schema fingerprint index and validate the candidates in ranked order until one passes
         if tools_available and (not entry.get("schema") or not entry["schema"].get("valid")):
             try:
-                schema_dir = os.path.join(os.path.dirname(schema_loader.__file__), "schemas")
                 matches = []
-                if os.path.isdir(schema_dir):
-                    for fname in os.listdir(schema_dir):
-                        if not fname.lower().endswith('.json'):
-                            continue
-                        try:
-                            s = schema_loader.load_schema(fname)
-                            if s is None:
-                                continue
-                            if body is None:
-                                continue
-                            try:
-                                jsonschema_validate(instance=body, schema=s)
-                                matches.append(fname)
-                            except ValidationError:
-                                continue
-                        except Exception:
-                            continue
+                if body is not None:
+                    matches = get_default_index().match(
+                        body, lambda inst, s, name: jsonschema_validate(instance=inst, schema=s, name=name)
+                    )
                 if matches:
-                    # choose the first match to avoid noisy multiple matches
+                    # the most specific schema the body validates against
                     entry.setdefault("schema", {})["fallback_match"] = matches[0]
+                    entry["schema"]["fallback_matches"] = matches
                     entry["schema"]["valid"] = True
-                    print_ok(f"Response matches schema: {matches[0]} (first match)")
+                    print_ok(f"Response matches schema: {matches[0]} (best match)")
                 else:
                     entry.setdefault("schema", {})
                     if not entry["schema"].get("valid"):
@@ -344,49 +661,80 @@ def main():
             except Exception as e:
                 entry.setdefault("schema", {})["error"] = f"schema_search_failed: {e}"
                 print_fail(f"Schema search failed: {e}")
-        elif schema_name:
+        elif schema_name and not tools_available:
             entry["schema"] = {"name": schema_name, "available_tools": False}
             print_fail("Schema present but schema validation tools unavailable")
 
         print()
-        report["results"].append(entry)
-
-    # login/signout flow
-    login_payload = {"username": args.user or "phanith.chhim", "password": args.passwd or "Nith@2010"}
-    print("==> POST /api/login")
-    res = do_req(sess, "POST", f"{base}/api/login", json_body=login_payload)
-    entry = {"method": "POST", "path": "/api/login", "url": f"{base}/api/login"}
-    if not res:
-        print_fail("Login request failed")
-        entry["ok"] = False
-        entry["error"] = "login_failed"
-        report["results"].append(entry)
+        return entry
+
+    # reports are streamed: one NDJSON record and one JUnit <testcase> per result, as it completes
+    os.makedirs("reports", exist_ok=True)
+    import datetime
+    started = datetime.datetime.utcnow()
+    fn = report_path(started)
+    junit_fn = fn.replace('.ndjson', '.xml').replace('check_endpoints_', 'check_endpoints_junit_')
+    report_writer = junit_writer = None
+    try:
+        report_writer = NDJSONReportWriter(fn)
+        report_writer.write({"type": "run", "base_url": base, "started": started.isoformat() + "Z"})
+        junit_writer = JUnitStreamWriter(junit_fn, "check_endpoints")
+    except Exception as e:
+        print_fail(f"Failed to open report files: {e}")
+    store = store_run_id = None
+    if not args.no_store:
+        try:
+            store = ResultsStore(args.store)
+            store_run_id = store.begin_run(started.isoformat() + "Z", base, source=os.path.basename(fn))
+        except Exception as e:
+            print_fail(f"Results store disabled: {e}")
+            store = None
+
+    emitted = 0
+
+    def emit(entry):
+        nonlocal emitted
+        if store is not None:
+            store.add_result(store_run_id, emitted, entry)
+        emitted += 1
+        if report_writer is not None:
+            report_writer.write({"type": "result", **entry})
+        if junit_writer is not None:
+            junit_writer.add_testcase(junit_testcase(entry))
+
+    def run_step(step, full_url):
+        # non-GET checks are sent once unless the catalog marks them repeatable
+        repeat = args.repeat if step.repeat else 1
+        warmup = args.warmup if step.repeat else 0
+        item_check = None
+        if args.stream and step.item_schema and tools_available and plan.schema(step.item_schema):
+            item_check = get_checker(plan.schema(step.item_schema), step.item_schema)
+        return sample_endpoint(
+            sess, step.method, full_url, repeat, warmup,
+            json_body=step.render_payload(variables), item_check=item_check,
+        )
+
+    jobs = [(step, f"{base}{step.path}") for step in plan.steps]
+    if args.concurrency > 1:
+        # requests run in parallel; each result is validated on the main thread as soon
+        # as it arrives, and emitted once every earlier endpoint has been, so the reports
+        # keep catalog order while only out-of-order results are held in memory
+        pending = {}
+        next_idx = 0
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = {pool.submit(run_step, step, full_url): idx for idx, (step, full_url) in enumerate(jobs)}
+            for fut in as_completed(futures):
+                idx = futures.pop(fut)
+                step, full_url = jobs[idx]
+                pending[idx] = process_result(step, full_url, fut.result())
+                while next_idx in pending:
+                    emit(pending.pop(next_idx))
+                    next_idx += 1
+        order = {(step.method, step.path): idx for idx, (step, _url) in enumerate(jobs)}
+        failures.sort(key=lambda f: order.get((f["method"], f["path"]), len(order)))
     else:
-        entry.update({k: v for k, v in res.items() if k != "raw_resp"})
-        status = res.get("status_code")
-        if status and 200 <= status < 300:
-            print_ok(f"HTTP {status} OK")
-            entry["ok"] = True
-            print_body(entry)
-        else:
-            print_fail(f"HTTP {status} FAIL")
-            entry["ok"] = False
-            print_body(entry)
-        # validate login response schema if present
-        schema_name = SCHEMA_MAP.get(("POST", "/api/login"))
-        if schema_name and schema_loader and jsonschema_validate:
-            schema = schema_loader.load_schema(schema_name)
-            if schema:
-                try:
-                    body = entry.get("body")
-                    jsonschema_validate(instance=body or {}, schema=schema)
-                    print_ok(f"Schema {schema_name} OK")
-                    entry.setdefault("schema", {})["valid"] = True
-                except ValidationError as e:
-                    print_fail(f"Schema {schema_name} FAILED: {e}")
-                    entry.setdefault("schema", {})["valid"] = False
-                    entry["schema"]["error"] = str(e)
-        report["results"].append(entry)
+        for step, full_url in jobs:
+            emit(process_result(step, full_url, run_step(step, full_url)))
 
     print("== Summary ==")
     print_ok(f"Success: {success_count}")
@@ -398,48 +746,87 @@ def main():
         print("Failures:")
         for f in failures:
             print_fail(f" - {f['method']} {f['path']}: {f['reason']}")
-    report["summary"] = {"success": success_count, "failure": fail_count}
-
-    # write report
-    os.makedirs("reports", exist_ok=True)
-    import datetime
-    fn = f"reports/check_endpoints_{datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
-    try:
-        with open(fn, "w") as f:
-            json.dump(report, f, indent=2)
-        print(f"Report written to {fn}")
-    except Exception as e:
-        print_fail(f"Failed to write report: {e}")
-
-    # also write a simple JUnit XML report for CI
-    try:
-        testsuite = ET.Element('testsuite', name='check_endpoints', tests=str(len(report['results'])))
-        for e in report['results']:
-            tc_name = f"{e.get('method')} {e.get('path')}"
-            tc = ET.SubElement(testsuite, 'testcase', classname='check_endpoints', name=tc_name)
-            # mark failure on HTTP error or schema invalid
-            if not e.get('ok'):
-                failure = ET.SubElement(tc, 'failure', message=e.get('error', 'http_error'))
-                failure.text = json.dumps(e.get('body') or e.get('body_text') or {})
-            else:
-                schema = e.get('schema') or {}
-                if schema and schema.get('valid') is False:
-                    failure = ET.SubElement(tc, 'failure', message=schema.get('error', 'schema_validation_failed'))
-                    failure.text = json.dumps(schema)
-        tree = ET.ElementTree(testsuite)
-        junit_fn = fn.replace('.json', '.xml').replace('check_endpoints_', 'check_endpoints_junit_')
-        tree.write(junit_fn, encoding='utf-8', xml_declaration=True)
-        print(f"JUnit report written to {junit_fn}")
-    except Exception as e:
-        print_fail(f"Failed to write JUnit report: {e}")
+    summary = {"success": success_count, "failure": fail_count, "budget_failures": budget_failures}
+    pool_stats = getattr(sess.get_adapter(f"{base}/"), "stats", None)
+    if pool_stats is not None:
+        summary["pool"] = pool_stats.as_dict()
+        if args.verbose or args.concurrency > 1 or pool_stats.discarded or pool_stats.waits:
+            ps = summary["pool"]
+            print(
+                f"Connection pool: {ps['connections_opened']} opened (+{ps['prewarmed']} pre-warmed), "
+                f"{ps['requests']} requests, reuse {ps['reuse_ratio'] or 0:.0%}, "
+                f"{ps['waits']} waits ({ps['wait_ms']:.1f} ms), {ps['discarded']} discarded"
+            )
+    if transfer.responses:
+        summary["bytes"] = tb = transfer.as_dict()
+        if args.verbose or args.compression is not None:
+            print(
+                f"Transfer: {tb['wire_bytes']} bytes on the wire for {tb['decoded_bytes']} decoded "
+                f"(ratio {tb['ratio']:.2f}, {tb['compressed']}/{tb['responses']} responses compressed)"
+            )
+    throttle = getattr(sess.get_adapter(f"{base}/"), "throttle", None)
+    if throttle is not None:
+        summary["throttle"] = ts = throttle.stats.as_dict()
+        if args.verbose or ts["throttled"] or ts["retries_denied"] or ts["retry_after_capped"]:
+            print(
+                f"Throttle: {ts['throttled']}/{ts['requests']} requests delayed ({ts['wait_ms']:.1f} ms), "
+                f"{ts['retries']} retries, {ts['retries_denied']} denied by the retry budget, "
+                f"{ts['retry_after_capped']} skipped for a long Retry-After"
+            )
+    if auth_cache is not None:
+        summary["auth_cache"] = auth_cache.as_dict()
+    if cassette is not None:
+        summary["cassette"] = cs = cassette.as_dict()
+        recorded = cs["recorded"]
+        try:
+            cassette.close()
+        except OSError as e:
+            print_fail(f"Failed to write cassette: {e}")
+        if args.record:
+            print(f"Recorded {recorded} response(s) to {cassette.path}")
+        else:
+            print(f"Replayed {cs['hits']} response(s) from {cassette.path}, {cs['misses']} not recorded")
+    if args.compare_baseline:
+        summary.update({"baseline": baseline_label, "regressions": regressions})
 
-    # honor --strict: non-zero exit if any schema failures were recorded
+    # close the streamed reports with a final summary record
+    if report_writer is not None:
+        try:
+            report_writer.write({"type": "summary", **summary, "results": emitted, "failures": failures})
+            report_writer.close()
+            print(f"Report written to {fn}")
+        except Exception as e:
+            print_fail(f"Failed to write report: {e}")
+    if junit_writer is not None:
+        try:
+            junit_writer.close()
+            print(f"JUnit report written to {junit_fn}")
+        except Exception as e:
+            print_fail(f"Failed to write JUnit report: {e}")
+    if store is not None:
+        store.finish_run(store_run_id, summary)
+        store.close()
+        print(f"Run recorded in {args.store}")
+
+    exit_code = 0
+    if args.compare_baseline and baseline_label:
+        if regressions:
+            print_fail(f"Baseline comparison: {regressions} endpoint(s) significantly slower than {baseline_label} — exiting non-zero")
+            exit_code = 2
+        else:
+            print_ok(f"Baseline comparison: no significant slowdown against {baseline_label}")
+    # honor --strict: non-zero exit if any schema failures or budget breaches were recorded
     if args.strict:
-        if schema_failures > 0:
-            print_fail(f"Strict mode: {schema_failures} schema failures detected — exiting non-zero")
-            sys.exit(2)
+        if schema_failures > 0 or budget_failures > 0:
+            print_fail(
+                f"Strict mode: {schema_failures} schema failures and {budget_failures} latency budget "
+                "breaches detected — exiting non-zero"
+            )
+            exit_code = 2
         else:
-            print_ok("Strict mode: no schema failures detected")
+            print_ok("Strict mode: no schema failures or latency budget breaches detected")
+    if exit_code:
+        sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,89 @@
-from flask import Flask, jsonify, request, make_response
+import argparse
+import gzip
+import json
+import os
+import zlib
+from datetime import datetime, timezone
+
+import werkzeug.serving
+from flask import Flask, Response, jsonify, request, make_response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 
+# the mock's data is static, so every resource was last modified when the server started
+STARTED_AT = datetime.now(timezone.utc).replace(microsecond=0)
+
+# Response compression, off by default: MOCK_COMPRESSION lists the codings the mock may
+# use (e.g. "gzip" or "br,gzip"; br needs the brotli package), MOCK_COMPRESSION_LEVEL
+# sets the effort and bodies under MOCK_COMPRESSION_MIN_SIZE bytes are sent as is.
+COMPRESSION = [
+    c for c in (e.strip().lower() for e in os.environ.get('MOCK_COMPRESSION', '').split(','))
+    if c in ('gzip', 'deflate') or (c == 'br' and brotli is not None)
+]
+COMPRESSION_LEVEL = int(os.environ.get('MOCK_COMPRESSION_LEVEL', '6'))
+COMPRESSION_MIN_SIZE = int(os.environ.get('MOCK_COMPRESSION_MIN_SIZE', '256'))
+
+
+def _compressor(coding):
+    if coding == 'br':
+        return brotli.Compressor(quality=min(COMPRESSION_LEVEL, 11))
+    # wbits 31 = gzip container, 15 = zlib container ("deflate" as HTTP means it)
+    return zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31 if coding == 'gzip' else 15)
+
+
+def _compress_stream(chunks, coding):
+    comp = _compressor(coding)
+    for chunk in chunks:
+        out = comp.process(chunk) if coding == 'br' else comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.finish() if coding == 'br' else comp.flush()
+
+
+def _compress(resp):
+    if not COMPRESSION or resp.status_code in (204, 304) or 'Content-Encoding' in resp.headers:
+        return resp
+    coding = request.accept_encodings.best_match(COMPRESSION)
+    if not coding:
+        return resp
+    if resp.is_streamed:
+        resp.response = _compress_stream((c.encode() if isinstance(c, str) else c for c in resp.response), coding)
+        resp.headers.pop('Content-Length', None)
+    else:
+        body = resp.get_data()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return resp
+        if coding == 'gzip':
+            body = gzip.compress(body, COMPRESSION_LEVEL)
+        elif coding == 'br':
+            body = brotli.compress(body, quality=min(COMPRESSION_LEVEL, 11))
+        else:
+            body = zlib.compress(body, COMPRESSION_LEVEL)
+        resp.set_data(body)
+    resp.headers['Content-Encoding'] = coding
+    resp.vary.add('Accept-Encoding')
+    # the ETag names the uncompressed representation: weaken it so revalidation still matches
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+@app.after_request
+def finish_response(resp):
+    # ETag/Last-Modified on GETs so clients can revalidate; a matching
+    # If-None-Match/If-Modified-Since gets a bodyless 304
+    if request.method == 'GET' and resp.status_code == 200 and not resp.is_streamed:
+        resp.add_etag()
+        resp.last_modified = STARTED_AT
+        resp = resp.make_conditional(request)
+    return _compress(resp)
+
 @app.route('/api/hello')
 def hello():
     return 'CMS Portal API', 200
@@ -35,6 +117,16 @@ def signout():
 
 @app.route('/api/users')
 def users_list():
+    # ?count=N streams N synthetic users, for exercising check_endpoints --stream on big lists
+    count = request.args.get('count', type=int)
+    if count is not None:
+        def generate():
+            yield '{"success": true, "data": ['
+            for i in range(count):
+                user = {'userId': f'user{i}', 'id': f'user{i}', 'username': f'User {i}'}
+                yield (',' if i else '') + json.dumps(user)
+            yield ']}'
+        return Response(generate(), mimetype='application/json')
     data = [
         {'userId': 'phanith.chhim', 'id': 'phanith.chhim', 'username': 'Phanith'},
         {'userId': 'roby.va', 'id': 'roby.va', 'username': 'Roby'},
@@ -96,5 +188,24 @@ def update_user(uid):
     return jsonify({'success': True, 'userId': uid}), 200
 
 
+def make_server(host='127.0.0.1', port=0):
+    """A threaded server for the mock (port 0 = any free port; see `server.server_port`)."""
+    return werkzeug.serving.make_server(host, port, app, threaded=True)
+
+
 if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=8000)
+    # MOCK_PORT=0 / --port 0 picks a free port, written to --port-file once listening,
+    # so several mocks (one per test worker) can run side by side
+    parser = argparse.ArgumentParser(description='Mock CMS Portal API')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('MOCK_PORT', '8000')))
+    parser.add_argument('--port-file', help='write the port the server listens on to this file')
+    args = parser.parse_args()
+    if args.port_file:
+        server = make_server(port=args.port)
+        with open(args.port_file + '.tmp', 'w') as f:
+            f.write(str(server.server_port))
+        os.replace(args.port_file + '.tmp', args.port_file)
+        print(f' * Running on http://127.0.0.1:{server.server_port}', flush=True)
+        server.serve_forever()
+    else:
+        app.run(host='127.0.0.1', port=args.port)
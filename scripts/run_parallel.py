@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Run the pytest suite split across worker processes.
+
+Usage: python scripts/run_parallel.py [-n WORKERS] [--mock worker|shared|none] [--junitxml PATH] [PYTEST_ARGS...]
+
+Every worker is `python -m pytest PYTEST_ARGS` with TEST_WORKER=gw<i> and
+TEST_WORKERS=N in its environment; conftest.py keeps that worker's share of the
+test files (see utils/workers.py). Mock API:
+
+- `worker` (default without BASE_URL) each worker starts its own mock on a free port
+  (pytest --mock-server)
+- `shared` one mock on a free port for all workers
+- `none`   (default with BASE_URL) use BASE_URL / config.yaml as is
+
+When every worker is done, their JUnit files are merged into --junitxml (default
+reports/pytest_parallel.xml), their client metrics into the configured
+metrics.prometheus / metrics.spans files, and their per-file durations into
+.cache/test_durations.json (or TEST_DURATIONS), which balances the next run. Worker output is printed
+per worker as each one finishes. Exit status: 1 if any worker failed, else 0.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import yaml  # noqa: E402
+
+from utils.metrics import merge_otlp, merge_prometheus  # noqa: E402
+from utils.report_writer import merge_junit  # noqa: E402
+from utils.workers import durations_path, load_durations, save_durations, worker_path  # noqa: E402
+
+# pytest exit status when a worker's share selected no tests
+NO_TESTS_COLLECTED = 5
+
+
+def start_shared_mock():
+    """Start scripts/mock_api.py on a free port; returns (process, base_url)."""
+    fd, port_file = tempfile.mkstemp(prefix="mock_api_port_")
+    os.close(fd)
+    os.unlink(port_file)
+    log = open(os.path.join(tempfile.gettempdir(), "mock_api_parallel.log"), "w")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "scripts.mock_api", "--port", "0", "--port-file", port_file],
+        cwd=ROOT, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 15
+    while not os.path.exists(port_file):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            sys.exit(f"mock API did not start; see {log.name}")
+        time.sleep(0.05)
+    with open(port_file) as f:
+        port = int(f.read())
+    os.unlink(port_file)
+    return proc, f"http://127.0.0.1:{port}"
+
+
+def merge_outputs(workers, junitxml):
+    """Merge the per-worker report, metrics and duration files; returns the JUnit totals."""
+    totals = None
+    merged_parts = [worker_path(junitxml, w) for w in workers if os.path.exists(worker_path(junitxml, w))]
+    if merged_parts:
+        totals = merge_junit(merged_parts, junitxml)
+    with open(os.path.join(ROOT, "config.yaml")) as f:
+        metrics_cfg = (yaml.safe_load(f) or {}).get("metrics") or {}
+    for key, merge, load, dump in (
+        ("prometheus", merge_prometheus, lambda f: f.read(), lambda doc, f: f.write(doc)),
+        ("spans", merge_otlp, json.load, json.dump),
+    ):
+        if not metrics_cfg.get(key):
+            continue
+        path = os.path.join(ROOT, metrics_cfg[key])
+        parts = [worker_path(path, w) for w in workers if os.path.exists(worker_path(path, w))]
+        if not parts:
+            continue
+        docs = []
+        for part in parts:
+            with open(part, encoding="utf-8") as f:
+                docs.append(load(f))
+        with open(path, "w", encoding="utf-8") as f:
+            dump(merge(docs), f)
+        merged_parts += parts
+    merged_durations = durations_path(ROOT)
+    durations = {}
+    for w in workers:
+        part = worker_path(merged_durations, w)
+        if os.path.exists(part):
+            durations.update(load_durations(part))
+            merged_parts.append(part)
+        if os.path.exists(f"{part}.lock"):
+            merged_parts.append(f"{part}.lock")
+    save_durations(durations, merged_durations)
+    for part in merged_parts:
+        os.unlink(part)
+    return totals
+
+
+def main():
+    p = argparse.ArgumentParser(description="Run pytest split across worker processes", allow_abbrev=False)
+    p.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    p.add_argument(
+        "--mock", choices=("worker", "shared", "none"), default=None,
+        help="mock API per worker, one shared, or none (default: none with BASE_URL set, else worker)",
+    )
+    p.add_argument("--junitxml", default="reports/pytest_parallel.xml", help="merged JUnit report")
+    args, pytest_args = p.parse_known_args()
+    workers = [f"gw{i}" for i in range(max(1, args.workers))]
+    mock = args.mock or ("none" if os.environ.get("BASE_URL") else "worker")
+    junitxml = os.path.abspath(args.junitxml)
+    os.makedirs(os.path.dirname(junitxml), exist_ok=True)
+
+    env = dict(os.environ, TEST_WORKERS=str(len(workers)))
+    mock_proc = None
+    if mock == "shared":
+        mock_proc, env["BASE_URL"] = start_shared_mock()
+        print(f"Shared mock API at {env['BASE_URL']}")
+    if mock == "worker":
+        pytest_args = ["--mock-server", *pytest_args]
+
+    started = time.monotonic()
+    procs = {}
+    try:
+        for w in workers:
+            log = tempfile.TemporaryFile(mode="w+")
+            cmd = [sys.executable, "-m", "pytest", *pytest_args, f"--junitxml={worker_path(junitxml, w)}"]
+            procs[w] = (subprocess.Popen(cmd, cwd=ROOT, env=dict(env, TEST_WORKER=w), stdout=log, stderr=subprocess.STDOUT), log)
+        print(f"Running pytest in {len(workers)} worker(s)" + (f": {' '.join(pytest_args)}" if pytest_args else ""))
+        codes = {}
+        while len(codes) < len(procs):
+            for w, (proc, log) in procs.items():
+                if w in codes or proc.poll() is None:
+                    continue
+                codes[w] = proc.returncode
+                log.seek(0)
+                print(f"\n===== {w} (exit {proc.returncode}, {time.monotonic() - started:.1f}s) =====")
+                print(log.read().rstrip())
+                log.close()
+            time.sleep(0.05)
+    finally:
+        for proc, _ in procs.values():
+            if proc.poll() is None:
+                proc.kill()
+        if mock_proc is not None:
+            mock_proc.terminate()
+            mock_proc.wait()
+
+    totals = merge_outputs(workers, junitxml)
+    print(f"\nAll workers done in {time.monotonic() - started:.1f}s")
+    if totals is not None:
+        print(
+            f"{totals['tests']} tests, {totals['failures']} failures, {totals['errors']} errors, "
+            f"{totals['skipped']} skipped; JUnit report: {os.path.relpath(junitxml, os.getcwd())}"
+        )
+    failed = [w for w, code in codes.items() if code not in (0, NO_TESTS_COLLECTED)]
+    if len(failed) == 0 and all(code == NO_TESTS_COLLECTED for code in codes.values()):
+        failed = list(codes)  # nothing ran at all
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ VENV="$PROJECT_ROOT/.venv"
 ACTIVATE="$VENV/bin/activate"
 
 MODE="default"
+WORKERS=""
 CLI_USER=""
 CLI_PASS=""
 while [[ $# -gt 0 ]]; do
@@ -22,8 +23,10 @@ while [[ $# -gt 0 ]]; do
       CLI_USER="$2"; shift 2 ;;
     -p|--pass|--password)
       CLI_PASS="$2"; shift 2 ;;
+    -n|--workers)
+      WORKERS="$2"; shift 2 ;;
     -h|--help)
-      echo "Usage: $0 [--all|--integration|--manual] [-u|--user USER] [-p|--password PASS]"; exit 0 ;;
+      echo "Usage: $0 [--all|--integration|--manual] [-n|--workers N] [-u|--user USER] [-p|--password PASS]"; exit 0 ;;
     *)
       echo "Unknown arg: $1"; exit 1 ;;
   esac
@@ -49,9 +52,11 @@ else
   PYTEST_ARGS+=("-m" "not manual")
 fi
 
-# Start mock server if not listening on 8000
+# Start mock server if not listening on 8000; parallel workers (-n) start their own on free ports
 MOCK_PID=""
-if ! lsof -iTCP:8000 -sTCP:LISTEN -Pn >/dev/null 2>&1; then
+if [[ -n "$WORKERS" ]]; then
+  : # scripts/run_parallel.py handles the mock
+elif ! lsof -iTCP:8000 -sTCP:LISTEN -Pn >/dev/null 2>&1; then
   echo "Starting mock API..."
   nohup "$PY" -m scripts.mock_api &>/tmp/mock_api.log &
   MOCK_PID=$!
@@ -81,9 +86,14 @@ else
   : ${AUTH_PASSWORD:="changeme"}
 fi
 
-echo "Running pytest ${PYTEST_ARGS[*]}"
 set +e
-"$PY" -m pytest "${PYTEST_ARGS[@]}"
+if [[ -n "$WORKERS" ]]; then
+  echo "Running pytest ${PYTEST_ARGS[*]} in $WORKERS workers"
+  "$PY" "$PROJECT_ROOT/scripts/run_parallel.py" -n "$WORKERS" "${PYTEST_ARGS[@]}"
+else
+  echo "Running pytest ${PYTEST_ARGS[*]}"
+  "$PY" -m pytest "${PYTEST_ARGS[@]}"
+fi
 RC=$?
 set -e
 
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils.http import AsyncAPIClient
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+    flaky_calls = 0
+
+    def do_GET(self):
+        cls = type(self)
+        if self.path == "/flaky":
+            with cls.lock:
+                cls.flaky_calls += 1
+                fail = cls.flaky_calls == 1
+            if fail:
+                self._reply(502, {"error": "bad gateway"})
+                return
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+        self._reply(200, {"path": self.path, "auth": self.headers.get("Authorization"), "cookie": self.headers.get("Cookie")})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def slow_server(http_server):
+    _SlowHandler.in_flight = _SlowHandler.peak = _SlowHandler.flaky_calls = 0
+    return http_server(_SlowHandler)
+
+
+def test_fan_out_is_concurrent_and_bounded(slow_server):
+    async def run(client):
+        return await asyncio.gather(*(client.get(f"/users/{i}/permissions") for i in range(12)))
+
+    client = AsyncAPIClient(slow_server, concurrency=4)
+    try:
+        started = time.perf_counter()
+        responses = asyncio.run(run(client))
+        elapsed = time.perf_counter() - started
+    finally:
+        client.close()
+    assert [r.json()["path"] for r in responses] == [f"/users/{i}/permissions" for i in range(12)]
+    assert _SlowHandler.peak == 4
+    # 12 requests of 50ms, 4 at a time: ~3 rounds rather than 12 serial calls
+    assert elapsed < 12 * 0.05
+
+
+def test_auth_state_and_retry_policy_are_shared(slow_server):
+    async def run(client):
+        client.set_bearer_token("tok")
+        client.set_cookie("JSESSIONID", "abc")
+        first = await client.get("/whoami")
+        flaky = await client.get("/flaky")
+        return first, flaky
+
+    client = AsyncAPIClient(slow_server, concurrency=2)
+    try:
+        first, flaky = asyncio.run(run(client))
+        # a second event loop reuses the same client
+        again = asyncio.run(client.get("/again"))
+    finally:
+        client.close()
+    assert first.json()["auth"] == "Bearer tok"
+    assert first.json()["cookie"] == "JSESSIONID=abc"
+    # 502 is in get_session_with_retries' status_forcelist, so it is retried
+    assert flaky.status_code == 200 and _SlowHandler.flaky_calls == 2
+    assert again.status_code == 200
+
+
+@pytest.mark.integration
+def test_permissions_fan_out(async_auth_api_client):
+    async def run(client):
+        users = (await client.get("/api/users")).json().get("data") or []
+        ids = [u.get("userId") or u.get("id") for u in users][:10]
+        return ids, await asyncio.gather(*(client.get(f"/api/users/{uid}/permissions") for uid in ids))
+
+    try:
+        ids, responses = asyncio.run(run(async_auth_api_client))
+    except Exception as e:
+        pytest.skip(f"server not reachable: {e}")
+    assert len(responses) == len(ids)
+    assert all(r.status_code in (200, 401, 403) for r in responses)
+
+
+def test_aclose_does_not_block_the_event_loop(slow_server):
+    async def run():
+        client = AsyncAPIClient(slow_server, concurrency=2)
+        pending = asyncio.ensure_future(client.get("/slow"))
+        await asyncio.sleep(0.01)  # the request is in flight
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while not closing.done():
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        closing = asyncio.ensure_future(client.aclose())
+        await asyncio.gather(closing, tick())
+        return (await pending), ticks
+
+    resp, ticks = asyncio.run(run())
+    assert resp.status_code == 200
+    # other tasks kept running while close() waited for the 50ms request
+    assert ticks >= 3
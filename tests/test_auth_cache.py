@@ -0,0 +1,125 @@
+import base64
+import json
+import multiprocessing
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from utils.auth_cache import AuthCache, SessionAuth, session_from_response
+
+
+def _login_response(token, status=200):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps({"success": status == 200, "token": token}).encode()
+    return resp
+
+
+def _slow_login(counter_path):
+    # appends one line per login; slow enough for the other processes to queue up
+    with open(counter_path, "a") as f:
+        f.write(f"{os.getpid()}\n")
+    time.sleep(0.2)
+    return _login_response(f"token-{os.getpid()}")
+
+
+def _worker(args):
+    cache_path, counter_path = args
+    entry = AuthCache(cache_path).get_or_login("http://api", "alice", lambda: _slow_login(counter_path))
+    return entry["token"]
+
+
+def test_one_login_shared_by_concurrent_processes(tmp_path):
+    cache_path, counter_path = str(tmp_path / "auth.json"), str(tmp_path / "logins")
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        tokens = pool.map(_worker, [(cache_path, counter_path)] * 4)
+    with open(counter_path) as f:
+        assert len(f.read().split()) == 1
+    assert len(set(tokens)) == 1
+    assert oct(os.stat(cache_path).st_mode & 0o777) == "0o600"
+
+
+def test_expiry_and_invalidation(tmp_path):
+    cache = AuthCache(str(tmp_path / "auth.json"), ttl=0.2)
+    logins = []
+
+    def login():
+        logins.append(1)
+        return _login_response(f"t{len(logins)}")
+
+    assert cache.get_or_login("http://api/", "alice", login)["token"] == "t1"
+    assert cache.get("http://api", "alice")["token"] == "t1"
+    assert cache.get("http://api", "bob") is None
+    time.sleep(0.25)
+    assert cache.get("http://api", "alice") is None
+    assert cache.get_or_login("http://api", "alice", login)["token"] == "t2"
+    # only the session a caller saw fail is dropped, not one another process stored since
+    assert not cache.invalidate("http://api", "alice", {"token": "t1", "cookies": {}})
+    assert cache.invalidate("http://api", "alice", {"token": "t2", "cookies": {}})
+    assert cache.get("http://api", "alice") is None
+    assert cache.get_or_login("http://api", "alice", lambda: _login_response(None, status=401)) is None
+    assert cache.as_dict() == {"hits": 0, "logins": 3, "invalidations": 1}
+
+
+def test_session_expiry_follows_jwt_exp():
+    exp = int(time.time()) + 60
+    claims = base64.urlsafe_b64encode(json.dumps({"sub": "alice", "exp": exp}).encode()).rstrip(b"=").decode()
+    session = session_from_response(_login_response(f"e30.{claims}.sig"))
+    assert session["expires"] == exp
+    assert session_from_response(_login_response("opaque"))["expires"] is None
+
+
+class _AuthHandler(BaseHTTPRequestHandler):
+    """POST /api/login hands out t1, t2, ...; GET /me accepts only the newest token."""
+
+    lock = threading.Lock()
+    issued = 0
+
+    def _send(self, status, body, headers=()):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with type(self).lock:
+            type(self).issued += 1
+            token = f"t{type(self).issued}"
+        self._send(200, {"token": token}, [("Set-Cookie", f"JSESSIONID=s-{token}; Path=/")])
+
+    def do_GET(self):
+        current = f"t{type(self).issued}"
+        ok = self.headers.get("Authorization") == f"Bearer {current}" and f"JSESSIONID=s-{current}" in self.headers.get("Cookie", "")
+        self._send(200 if ok else 401, {"ok": ok})
+
+
+@pytest.fixture
+def auth_server(http_server):
+    _AuthHandler.issued = 0
+    return http_server(_AuthHandler)
+
+
+def test_session_auth_reuses_session_and_relogs_in_on_401(auth_server, tmp_path):
+    cache = AuthCache(str(tmp_path / "auth.json"))
+    session = requests.Session()
+    session.auth = SessionAuth(cache, auth_server, "alice", login=lambda: session.post(f"{auth_server}/api/login", json={}))
+    assert session.get(f"{auth_server}/me").status_code == 200
+    assert session.get(f"{auth_server}/me").status_code == 200
+    assert _AuthHandler.issued == 1
+
+    # another process logs in: the server now rejects our session
+    requests.post(f"{auth_server}/api/login", json={})
+    resp = session.get(f"{auth_server}/me")
+    assert resp.status_code == 200 and len(resp.history) == 1 and resp.history[0].status_code == 401
+    assert _AuthHandler.issued == 3
+    assert cache.get(auth_server, "alice")["token"] == "t3"
+    assert cache.as_dict() == {"hits": 0, "logins": 2, "invalidations": 1}
@@ -0,0 +1,44 @@
+from utils.batch_validate import validate_items
+
+SCHEMA = {
+    "type": "object",
+    "required": ["id"],
+    "properties": {"id": {"type": "integer"}, "name": {"type": "string"}},
+}
+
+
+def make_items(n):
+    items = [{"id": i, "name": f"user{i}"} for i in range(n)]
+    for bad in (3, 250, 251, n - 1):
+        items[bad] = {"id": str(bad)}
+    return items
+
+
+def test_inline_reports_failures_in_index_order():
+    failures = validate_items(make_items(300), SCHEMA, "batch-test", workers=1)
+    assert [idx for idx, _ in failures] == [3, 250, 251, 299]
+    assert all("is not of type 'integer'" in msg for _, msg in failures)
+
+
+def test_process_pool_matches_inline():
+    items = make_items(1000)
+    inline = validate_items(items, SCHEMA, "batch-test", workers=1)
+    pooled = validate_items(items, SCHEMA, "batch-test", workers=3, chunk_size=64, parallel_threshold=0)
+    assert pooled == inline
+
+
+def test_all_valid_returns_empty():
+    assert validate_items([{"id": 1}] * 50, SCHEMA, "batch-test", workers=2, chunk_size=8, parallel_threshold=0) == []
+
+
+def test_pool_is_reused_and_never_forks():
+    from utils import batch_validate
+
+    items = make_items(300)
+    validate_items(items, SCHEMA, "batch-test", workers=2, chunk_size=16, parallel_threshold=0)
+    pool = batch_validate._pool
+    validate_items(items, SCHEMA, "batch-test", workers=2, chunk_size=16, parallel_threshold=0)
+    assert batch_validate._pool is pool
+    assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    batch_validate.shutdown_pool()
+    assert batch_validate._pool is None
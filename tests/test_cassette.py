@@ -0,0 +1,124 @@
+import json
+import multiprocessing
+import threading
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from utils.cassette import Cassette, CassetteError, CassetteMiss, cassette_key
+from utils.http import APIClient
+
+
+class _CounterHandler(BaseHTTPRequestHandler):
+    """Answers every request with its path, method, body and a per-server request counter."""
+
+    lock = threading.Lock()
+    calls = 0
+
+    def _answer(self):
+        cls = type(self)
+        with cls.lock:
+            cls.calls += 1
+            n = cls.calls
+        length = int(self.headers.get("Content-Length") or 0)
+        sent = self.rfile.read(length).decode() if length else None
+        body = json.dumps({"path": self.path, "method": self.command, "sent": sent, "n": n}).encode()
+        self.send_response(201 if self.command == "POST" else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/login":
+            self.send_header("Set-Cookie", "JSESSIONID=abc; Path=/")
+            self.send_header("Set-Cookie", "theme=dark; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _answer
+
+
+@pytest.fixture
+def counter_server(http_server):
+    _CounterHandler.calls = 0
+    return http_server(_CounterHandler)
+
+
+def test_cassette_key_is_normalized():
+    assert cassette_key("get", "http://a:1/x?b=2&a=1") == cassette_key("GET", "https://b/x?a=1&b=2") == "GET /x?a=1&b=2"
+    assert cassette_key("POST", "/login", b'{"u": "x", "p": 1}') == cassette_key("POST", "/login", '{"p":1,"u":"x"}')
+    assert cassette_key("POST", "/login", b'{"u": "x"}') != cassette_key("POST", "/login", b'{"u": "y"}')
+
+
+def test_record_then_replay_without_server(counter_server, tmp_path):
+    path = str(tmp_path / "api.cas")
+    recorder = APIClient(counter_server, cassette=Cassette(path, mode="record"))
+    recorder.post("/login", json={"username": "u", "password": "p"})
+    first = recorder.get("/items?page=1&size=2").json()
+    second = recorder.get("/items?page=1&size=2").json()
+    recorder.cassette.close()
+    assert _CounterHandler.calls == 3
+
+    # any base URL: nothing is sent
+    player = APIClient("http://127.0.0.1:9", cassette=Cassette(path, mode="replay"))
+    login = player.post("/login", json={"password": "p", "username": "u"})
+    assert login.status_code == 201
+    assert {c.name: c.value for c in player.session.cookies} == {"JSESSIONID": "abc", "theme": "dark"}
+    # repeated requests come back in recording order, then the last one repeats
+    assert player.get("/items", params={"size": 2, "page": 1}).json() == first
+    assert player.get("/items?page=1&size=2").json() == second
+    assert player.get("/items?page=1&size=2").json() == second
+    streamed = player.get("/items?page=1&size=2", stream=True)
+    assert json.loads(b"".join(streamed.iter_content(7))) == second
+    assert _CounterHandler.calls == 3
+    assert player.cassette.as_dict() == {"mode": "replay", "hits": 5, "misses": 0, "recorded": 0}
+    with pytest.raises(CassetteMiss):
+        player.get("/not-recorded")
+
+
+def test_auto_mode_records_only_misses(counter_server, tmp_path):
+    path = str(tmp_path / "api.cas")
+    client = APIClient(counter_server, cassette=Cassette(path, mode="record"))
+    client.get("/a")
+    client.cassette.close()
+
+    auto = APIClient(counter_server, cassette=Cassette(path, mode="auto"))
+    assert auto.get("/a").json()["n"] == 1
+    assert auto.get("/b").json()["n"] == 2
+    auto.cassette.close()
+    assert _CounterHandler.calls == 2
+
+    replay = Cassette(path, mode="replay")
+    assert len(replay) == 2 and "GET /a" in replay and "GET /b" in replay
+
+
+def _record_in_process(args):
+    path, name = args
+    cassette = Cassette(path, mode="record")
+    for key in (f"GET /{name}", "GET /shared"):
+        resp = requests.Response()
+        resp.status_code, resp._content = 200, name.encode()
+        cassette.record(key, resp)
+    cassette.close()
+
+
+def test_record_mode_keeps_other_processes_records(tmp_path):
+    path = str(tmp_path / "api.cas")
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        pool.map(_record_in_process, [(path, "w1"), (path, "w2")])
+    replay = Cassette(path, mode="replay")
+    assert len(replay) == 3 and "GET /w1" in replay and "GET /w2" in replay
+    # a re-recorded key replaces what was on disk instead of piling up
+    _record_in_process((path, "w1"))
+    replay = Cassette(path, mode="replay")
+    assert bytes(replay.lookup("GET /shared")[1]) == b"w1"
+    assert len(replay._index["GET /shared"]) == 1
+
+
+def test_invalid_cassettes(tmp_path):
+    with pytest.raises(CassetteError):
+        Cassette(str(tmp_path / "missing.cas"), mode="replay")
+    with pytest.raises(CassetteError):
+        Cassette(str(tmp_path / "x.cas"), mode="rewind")
+    bogus = tmp_path / "bogus.cas"
+    bogus.write_bytes(b"not a cassette at all, just some bytes")
+    with pytest.raises(CassetteError):
+        Cassette(str(bogus), mode="replay")
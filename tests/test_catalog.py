@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from utils.catalog import CatalogError, load_plan
+
+CATALOG = """
+endpoints:
+  - path: /api/users/{id}/permissions
+    params: {id: phanith.chhim}
+    schema: UserPermissionDto.json
+    item_schema: UserPermissionDto.json
+  - method: post
+    path: /api/login
+    payload: {username: "${user}", password: "${password}"}
+    expect_status: [200, 401]
+    schema: LoginResponse.json
+    owner: auth-team
+"""
+
+
+def _write(tmp_path, text, name="endpoints.yaml"):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_compile_plan(tmp_path):
+    plan = load_plan(_write(tmp_path, CATALOG), cache_dir=None)
+    perms, login = plan.steps
+    assert perms.method == "GET" and perms.path == "/api/users/phanith.chhim/permissions"
+    assert perms.repeat is True and login.repeat is False
+    assert plan.schema("UserPermissionDto.json")["title"] == "UserPermissionDto"
+    assert login.status_ok(401) and not login.status_ok(500)
+    assert perms.status_ok(204)
+    assert login.render_payload({"user": "u", "password": "p"}) == {"username": "u", "password": "p"}
+    match = plan.routes.lookup("GET", "/api/users/someone/permissions")
+    assert match.get("item_schema") == "UserPermissionDto.json"
+    assert plan.routes.lookup("POST", "/api/login").get("owner") == "auth-team"
+
+
+def test_plan_is_cached_by_content_hash(tmp_path):
+    cache = str(tmp_path / "cache")
+    catalog = _write(tmp_path, CATALOG)
+    first = load_plan(catalog, cache_dir=cache)
+    files = os.listdir(cache)
+    assert len(files) == 1
+    again = load_plan(catalog, cache_dir=cache)
+    assert [s._asdict() for s in again.steps] == [s._asdict() for s in first.steps]
+    # editing the catalog produces a new plan under a new key
+    _write(tmp_path, CATALOG.replace("phanith.chhim", "roby.va"))
+    edited = load_plan(catalog, cache_dir=cache)
+    assert edited.steps[0].path == "/api/users/roby.va/permissions"
+    assert len(os.listdir(cache)) == 2
+
+
+def test_missing_placeholder_value(tmp_path):
+    with pytest.raises(CatalogError):
+        load_plan(_write(tmp_path, "endpoints:\n  - path: /api/users/{id}\n"), cache_dir=None)
+
+
+def test_budget_is_validated(tmp_path):
+    plan = load_plan(_write(tmp_path, "endpoints:\n  - path: /api/users\n    budget: {p95_ms: 200}\n"), cache_dir=None)
+    assert plan.steps[0].settings["budget"] == {"p95_ms": 200.0}
+    with pytest.raises(CatalogError, match="unknown budget metric"):
+        load_plan(_write(tmp_path, "endpoints:\n  - path: /api/users\n    budget: {p95: 200}\n"), cache_dir=None)
+
+
+def test_route_conflict_names_the_entry(tmp_path):
+    text = (
+        "endpoints:\n"
+        "  - path: /api/users/{id}\n    params: {id: a}\n"
+        "  - path: /api/users/{uid}/roles\n    params: {uid: a}\n"
+        "  - path: /api/users/{user_id}\n    params: {user_id: a}\n"
+    )
+    with pytest.raises(CatalogError, match=r"endpoints\[2\]: GET /api/users/\{user_id\} conflicts"):
+        load_plan(_write(tmp_path, text), cache_dir=None)
@@ -0,0 +1,52 @@
+import datetime
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from scripts.check_endpoints import do_req, report_path
+from utils.results_store import _started_from_filename
+
+BODY = json.dumps({"success": True, "data": [{"id": i} for i in range(5)]}).encode()
+
+
+class _ListHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+@pytest.fixture
+def list_server(http_server):
+    return http_server(_ListHandler)
+
+
+def _slow_check(item):
+    time.sleep(0.05)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_elapsed_excludes_validation(list_server, stream):
+    session = requests.Session()
+    started = time.perf_counter()
+    res = do_req(session, "GET", f"{list_server}/api/users", item_check=_slow_check if stream else None)
+    wall_ms = (time.perf_counter() - started) * 1000.0
+    assert res["ok"] and res["status_code"] == 200
+    if stream:
+        assert res["streamed"]["items"] == 5 and wall_ms >= 250
+    else:
+        assert res["body"] == json.loads(BODY)
+    # five 50ms item checks ran inside do_req, but are not request latency
+    assert res["elapsed_ms"] < 200
+
+
+def test_report_paths_are_unique_within_a_second():
+    started = datetime.datetime(2026, 10, 16, 23, 30, 7, 123456)
+    paths = {report_path(started, pid=1), report_path(started, pid=2), report_path(started.replace(microsecond=9), pid=1)}
+    assert len(paths) == 3
+    assert _started_from_filename(report_path(started, pid=1)) == "2026-10-16T23:30:07Z"
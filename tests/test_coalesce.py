@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils.coalesce import AsyncSingleFlight, SingleFlight
+from utils.http import APIClient, AsyncAPIClient
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    calls = {}
+
+    def _count(self):
+        with type(self).lock:
+            type(self).calls[self.command + " " + self.path] = type(self).calls.get(self.command + " " + self.path, 0) + 1
+
+    def do_GET(self):
+        self._count()
+        time.sleep(0.1)
+        self._reply({"path": self.path, "auth": self.headers.get("Authorization")})
+
+    def do_POST(self):
+        self._count()
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(0.1)
+        self._reply({"ok": True})
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def counting_server(http_server):
+    _CountingHandler.calls = {}
+    return http_server(_CountingHandler)
+
+
+def _together(n, fn):
+    barrier = threading.Barrier(n)
+
+    def run(i):
+        barrier.wait()
+        return fn(i)
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(run, range(n)))
+
+
+def test_concurrent_identical_gets_share_one_request(counting_server):
+    client = APIClient(counting_server, coalesce=True)
+    responses = _together(8, lambda _: client.get("/api/users/u1"))
+    assert _CountingHandler.calls == {"GET /api/users/u1": 1}
+    assert all(r is responses[0] for r in responses)
+    stats = client.coalesce_stats
+    assert (stats.leaders, stats.merged) == (1, 7)
+    # once the request is done, the next call goes to the server again
+    client.get("/api/users/u1")
+    assert _CountingHandler.calls["GET /api/users/u1"] == 2
+
+
+def test_different_urls_identities_and_writes_are_not_merged(counting_server):
+    client = APIClient(counting_server, coalesce=True)
+    _together(4, lambda i: client.get(f"/api/users/u{i % 2}"))
+    assert _CountingHandler.calls == {"GET /api/users/u0": 1, "GET /api/users/u1": 1}
+    _together(3, lambda _: client.post("/api/roles", json={}))
+    assert _CountingHandler.calls["POST /api/roles"] == 3
+
+    other = APIClient(counting_server, coalesce=True)
+    other.singleflight = client.singleflight
+    other.set_bearer_token("tok")
+    got = _together(2, lambda i: (client if i else other).get("/api/roles"))
+    assert _CountingHandler.calls["GET /api/roles"] == 2
+    assert {r.json()["auth"] for r in got} == {None, "Bearer tok"}
+
+
+def test_coalescing_is_off_by_default(counting_server):
+    client = APIClient(counting_server)
+    _together(3, lambda _: client.get("/api/roles"))
+    assert _CountingHandler.calls == {"GET /api/roles": 3}
+    assert client.coalesce_stats is None
+
+
+def test_leader_error_reaches_every_caller():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def boom():
+        started.set()
+        time.sleep(0.1)
+        raise ConnectionError("down")
+
+    def call(i):
+        if i:
+            started.wait()
+        with pytest.raises(ConnectionError):
+            flight.do("k", boom)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(call, range(3)))
+    assert (flight.stats.leaders, flight.stats.merged) == (1, 2)
+    assert flight.do("k", lambda: 42) == 42
+
+
+def test_async_client_coalesces(counting_server):
+    async def run(client):
+        return await asyncio.gather(*(client.get("/api/users") for _ in range(10)))
+
+    client = AsyncAPIClient(counting_server, concurrency=2, coalesce=True)
+    try:
+        responses = asyncio.run(run(client))
+    finally:
+        client.close()
+    assert _CountingHandler.calls == {"GET /api/users": 1}
+    assert all(r is responses[0] for r in responses)
+    assert client.coalesce_stats.as_dict() == {"leaders": 1, "merged": 9, "merge_ratio": 0.9}
+
+
+def test_cancelled_follower_does_not_cancel_the_request():
+    async def run():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "body"
+
+        leader = asyncio.ensure_future(flight.do("k", fetch))
+        follower = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader, follower.cancelled(), flight.stats.merged
+
+    assert asyncio.run(run()) == ("body", True, 1)
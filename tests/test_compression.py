@@ -0,0 +1,121 @@
+import gzip
+import json
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils.compression import AVAILABLE_ENCODINGS, CompressionStats, accept_encoding
+from utils.http import APIClient
+
+PAYLOAD = json.dumps({"data": [{"userId": f"user{i}", "username": f"User {i}"} for i in range(500)]}).encode()
+
+
+class _GzipHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD gzip-compressed when asked to; `/chunked` uses chunked transfer encoding."""
+
+    seen_accept_encoding = None
+
+    def do_GET(self):
+        type(self).seen_accept_encoding = self.headers.get("Accept-Encoding")
+        compress = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        body = gzip.compress(PAYLOAD) if compress else PAYLOAD
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        if self.path == "/chunked":
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(body), 1000):
+                piece = body[i:i + 1000]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+@pytest.fixture
+def gzip_server(http_server):
+    return http_server(_GzipHandler)
+
+
+def test_accept_encoding():
+    assert accept_encoding(("gzip",)) == "gzip"
+    assert accept_encoding(["gzip", "deflate"]) == "gzip, deflate;q=0.9"
+    assert accept_encoding("deflate, gzip") == "deflate, gzip;q=0.9"
+    assert accept_encoding(()) == "identity"
+    # brotli is only negotiated when urllib3 can decode it
+    expected = "br, gzip;q=0.9" if "br" in AVAILABLE_ENCODINGS else "gzip"
+    assert accept_encoding(("br", "gzip")) == expected
+    with pytest.raises(ValueError):
+        accept_encoding(("lzma",))
+
+
+@pytest.mark.parametrize("path", ["/sized", "/chunked"])
+def test_wire_and_decoded_bytes(gzip_server, path):
+    client = APIClient(gzip_server, compression=("gzip",))
+    resp = client.get(path)
+    assert _GzipHandler.seen_accept_encoding == "gzip"
+    assert resp.json()["data"][-1]["userId"] == "user499"
+    assert resp.content_encoding == "gzip"
+    assert resp.decoded_bytes == len(PAYLOAD)
+    assert resp.wire_bytes == len(gzip.compress(PAYLOAD))
+    stats = client.compression_stats.as_dict()
+    assert stats["compressed"] == 1
+    assert stats["ratio"] < 0.5
+    assert stats["by_encoding"]["gzip"]["wire_bytes"] == resp.wire_bytes
+
+
+def test_identity_disables_compression(gzip_server):
+    client = APIClient(gzip_server, compression=())
+    resp = client.get("/chunked")
+    assert _GzipHandler.seen_accept_encoding == "identity"
+    assert resp.content_encoding == "identity"
+    assert resp.wire_bytes == resp.decoded_bytes == len(PAYLOAD)
+
+
+def test_streamed_responses_are_not_counted(gzip_server):
+    client = APIClient(gzip_server)
+    resp = client.get("/sized", stream=True)
+    assert not hasattr(resp, "wire_bytes")
+    resp.close()
+    assert client.compression_stats.responses == 0
+
+
+def test_stats_ratio():
+    stats = CompressionStats()
+    assert stats.ratio is None
+    stats.add(100, 400, "gzip")
+    stats.add(50, 50, "identity")
+    assert stats.ratio == pytest.approx(150 / 450)
+    assert (stats.responses, stats.compressed) == (2, 1)
+
+
+@pytest.fixture
+def mock_app(monkeypatch):
+    from scripts import mock_api
+    monkeypatch.setattr(mock_api, "COMPRESSION", ["gzip"])
+    monkeypatch.setattr(mock_api, "COMPRESSION_MIN_SIZE", 10)
+    return mock_api.app.test_client()
+
+
+def test_mock_serves_gzip(mock_app):
+    resp = mock_app.get("/api/users", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert json.loads(gzip.decompress(resp.data))["success"] is True
+    # the ETag is weakened, and still matches on revalidation
+    etag = resp.headers["ETag"]
+    assert etag.startswith("W/")
+    assert mock_app.get("/api/users", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 304
+    plain = mock_app.get("/api/users", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert json.loads(plain.data)["success"] is True
+
+
+def test_mock_compresses_streamed_lists(mock_app):
+    resp = mock_app.get("/api/users?count=300", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(resp.data))["data"]) == 300
@@ -39,9 +39,9 @@ def test_login_and_auth_api_client(auth_api_client, config):
 
 
 @pytest.mark.integration
-def test_list_users_and_schema(auth_api_client):
-    client = auth_api_client
-    resp = client.get("/api/users")
+@pytest.mark.prefetch("/api/users")
+def test_list_users_and_schema(prefetched):
+    resp = prefetched["/api/users"]
     assert resp.status_code in (200, 401, 403, 404)
     if resp.status_code != 200:
         pytest.skip("users list not available or unauthorized")
@@ -54,10 +54,11 @@ def test_list_users_and_schema(auth_api_client):
 
 
 @pytest.mark.integration
-def test_get_user_by_id_non_destructive(auth_api_client):
+@pytest.mark.prefetch("/api/users")
+def test_get_user_by_id_non_destructive(auth_api_client, prefetched):
     client = auth_api_client
-    # attempt to list users and then fetch one by id if present
-    resp = client.get("/api/users")
+    # use the shared users listing to fetch one by id if present
+    resp = prefetched["/api/users"]
     if resp.status_code != 200:
         pytest.skip("cannot list users")
     body = resp.json()
@@ -76,10 +77,11 @@ def test_get_user_by_id_non_destructive(auth_api_client):
 
 
 @pytest.mark.integration
-def test_get_user_permissions_non_destructive(auth_api_client):
+@pytest.mark.prefetch("/api/users")
+def test_get_user_permissions_non_destructive(auth_api_client, prefetched):
     client = auth_api_client
     # get a user id first
-    resp = client.get("/api/users")
+    resp = prefetched["/api/users"]
     if resp.status_code != 200:
         pytest.skip("cannot list users")
     body = resp.json()
@@ -92,9 +94,9 @@ def test_get_user_permissions_non_destructive(auth_api_client):
 
 
 @pytest.mark.integration
-def test_roles_list_and_schema(auth_api_client):
-    client = auth_api_client
-    resp = client.get("/api/roles")
+@pytest.mark.prefetch("/api/roles")
+def test_roles_list_and_schema(prefetched):
+    resp = prefetched["/api/roles"]
     assert resp.status_code in (200, 401, 403, 404)
     if resp.status_code != 200:
         pytest.skip("roles not available")
@@ -107,9 +109,10 @@ def test_roles_list_and_schema(auth_api_client):
 
 
 @pytest.mark.integration
-def test_get_role_by_id_non_destructive(auth_api_client):
+@pytest.mark.prefetch("/api/roles")
+def test_get_role_by_id_non_destructive(auth_api_client, prefetched):
     client = auth_api_client
-    resp = client.get("/api/roles")
+    resp = prefetched["/api/roles"]
     if resp.status_code != 200:
         pytest.skip("roles list not available")
     data = resp.json().get("data") or []
@@ -0,0 +1,36 @@
+import random
+
+from utils.histogram import LatencyHistogram
+
+
+def test_percentiles_within_bucket_precision():
+    rnd = random.Random(7)
+    values = [rnd.uniform(1.0, 500.0) for _ in range(20000)]
+    h = LatencyHistogram.from_ms(values)
+    ordered = sorted(values)
+    for pct in (50, 90, 99):
+        exact = ordered[int(pct / 100.0 * len(ordered)) - 1]
+        assert abs(h.percentile(pct) - exact) / exact < 0.02
+    assert h.percentile(0) == round(min(values), 3)
+    assert h.percentile(100) == round(max(values), 3)
+    # sparse buckets: far fewer than the number of samples
+    assert len(h.counts) < 1000
+
+
+def test_summary_and_round_trip():
+    h = LatencyHistogram.from_ms([10, 20, 30, 40])
+    summary = h.summary(wall_seconds=0.1)
+    assert summary["count"] == 4
+    assert summary["min_ms"] == 10.0 and summary["max_ms"] == 40.0
+    assert summary["throughput_rps"] == 40.0
+    clone = LatencyHistogram.from_dict(h.to_dict())
+    assert clone.summary() == h.summary()
+
+
+def test_merge():
+    a = LatencyHistogram.from_ms([1, 2, 3])
+    b = LatencyHistogram.from_ms([100])
+    a.merge(b)
+    assert a.count == 4
+    assert a.max_us == 100000
+    assert LatencyHistogram().summary() == {"count": 0}
@@ -0,0 +1,128 @@
+import hashlib
+import json
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils.http import APIClient
+from utils.http_cache import ResponseCache
+
+
+class _ValidatingHandler(BaseHTTPRequestHandler):
+    version = 1
+    calls = {}
+
+    def do_GET(self):
+        cls = type(self)
+        cls.calls[self.path] = cls.calls.get(self.path, 0) + 1
+        body = json.dumps({"path": self.path, "version": cls.version, "auth": self.headers.get("Authorization")}).encode()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.path.startswith("/plain"):
+            return self._reply(200, body, {})
+        if self.path.startswith("/fresh"):
+            return self._reply(200, body, {"Cache-Control": "max-age=60"})
+        if self.path.startswith("/nostore"):
+            return self._reply(200, body, {"ETag": etag, "Cache-Control": "no-store"})
+        if self.headers.get("If-None-Match") == etag:
+            return self._reply(304, b"", {"ETag": etag})
+        self._reply(200, body, {"ETag": etag})
+
+    def do_PUT(self):
+        type(self).version += 1
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply(200, b"{}", {})
+
+    def _reply(self, status, body, headers):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def validating_server(http_server):
+    _ValidatingHandler.version = 1
+    _ValidatingHandler.calls = {}
+    return http_server(_ValidatingHandler)
+
+
+def test_etag_revalidation(validating_server):
+    client = APIClient(validating_server, cache=ResponseCache())
+    first = client.get("/api/users")
+    second = client.get("/api/users")
+    assert not getattr(first, "from_cache", False)
+    assert second.from_cache and second.status_code == 200
+    assert second.json() == first.json()
+    # revalidated on every call (ttl=0): the server saw both, but answered 304 the second time
+    assert _ValidatingHandler.calls["/api/users"] == 2
+    stats = client.cache.stats
+    assert (stats.misses, stats.revalidated, stats.hits) == (1, 1, 0)
+    assert stats.hit_ratio == 0.5
+
+
+def test_ttl_and_max_age_serve_without_network(validating_server):
+    client = APIClient(validating_server, cache=ResponseCache(ttl=60))
+    for _ in range(3):
+        assert client.get("/api/roles").json()["version"] == 1
+        assert client.get("/fresh").status_code == 200
+    assert _ValidatingHandler.calls == {"/api/roles": 1, "/fresh": 1}
+    assert client.cache.stats.hits == 4
+
+
+def test_uncacheable_responses_are_not_stored(validating_server):
+    client = APIClient(validating_server, cache=ResponseCache())
+    for path in ("/plain", "/nostore"):
+        client.get(path)
+        client.get(path)
+        assert _ValidatingHandler.calls[path] == 2
+    assert len(client.cache) == 0
+
+
+def test_changed_resource_and_writes_refresh_the_entry(validating_server):
+    client = APIClient(validating_server, cache=ResponseCache(ttl=60))
+    assert client.get("/api/users/u1").json()["version"] == 1
+    client.put("/api/users/u1", json={"username": "x"})
+    assert client.cache.stats.invalidations == 1
+    assert client.get("/api/users/u1").json()["version"] == 2
+
+
+def test_identity_is_part_of_the_key(validating_server):
+    client = APIClient(validating_server, cache=ResponseCache(ttl=60))
+    assert client.get("/api/users").json()["auth"] is None
+    client.set_bearer_token("tok")
+    assert client.get("/api/users").json()["auth"] == "Bearer tok"
+    assert _ValidatingHandler.calls["/api/users"] == 2
+
+
+def test_lru_eviction(validating_server):
+    client = APIClient(validating_server, cache=ResponseCache(max_entries=2, ttl=60))
+    client.get("/a")
+    client.get("/b")
+    client.get("/a")  # /a is now the most recently used
+    client.get("/c")  # evicts /b
+    client.get("/a")
+    client.get("/b")
+    assert _ValidatingHandler.calls == {"/a": 1, "/b": 2, "/c": 1}
+    assert client.cache.stats.evictions == 2
+
+
+def test_max_entries_must_be_positive():
+    with pytest.raises(ValueError):
+        ResponseCache(max_entries=0)
+
+
+def test_mock_server_revalidates(merged_config):
+    client = APIClient(merged_config.get("base_url"), verify=merged_config.get("verify_ssl", True), cache=ResponseCache())
+    try:
+        first = client.get("/api/roles")
+    except Exception as e:
+        pytest.skip(f"server not reachable: {e}")
+    if "ETag" not in first.headers:
+        pytest.skip("server does not send validators")
+    second = client.get("/api/roles")
+    assert second.from_cache and second.json() == first.json()
+    assert client.cache.stats.revalidated == 1
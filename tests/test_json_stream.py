@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from utils.json_stream import StreamingEnvelope
+
+
+def chunked(text, size):
+    raw = text.encode("utf-8")
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+BODY = {
+    "success": True,
+    "data": [{"userId": f"u{i}", "name": "Ünïcödé", "n": i * 1.5} for i in range(50)],
+    "total": 50,
+}
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 100000])
+def test_items_and_envelope_across_chunk_sizes(size):
+    parser = StreamingEnvelope(chunked(json.dumps(BODY), size))
+    items = list(parser.items())
+    assert [i for i, _ in items] == list(range(50))
+    assert [item for _, item in items] == BODY["data"]
+    assert parser.envelope == {"success": True, "total": 50}
+    assert parser.count == 50 and parser.found_list
+
+
+@pytest.mark.parametrize("size", list(range(1, 13)))
+def test_numbers_split_at_chunk_edges(size):
+    body = '{"data": [1.5, 2.25e3, 3, -0.5E-2], "ratio": 0.125, "scale": 1e-3, "n": 12}'
+    parser = StreamingEnvelope(chunked(body, size))
+    assert [item for _, item in parser.items()] == [1.5, 2250.0, 3, -0.005]
+    assert parser.envelope == {"ratio": 0.125, "scale": 0.001, "n": 12}
+    parser = StreamingEnvelope(chunked("[1.5, 2.25e3]", size))
+    assert list(parser.items()) == [] and parser.envelope == [1.5, 2250.0]
+
+
+def test_non_envelope_bodies_are_returned_whole():
+    parser = StreamingEnvelope(chunked('[1, 2, 3]', 2))
+    assert list(parser.items()) == []
+    assert parser.envelope == [1, 2, 3] and not parser.found_list
+
+    parser = StreamingEnvelope([b'{"data": "not a list", "x": 1}'])
+    assert list(parser.items()) == []
+    assert parser.envelope == {"data": "not a list", "x": 1} and not parser.found_list
+
+
+def test_empty_list():
+    parser = StreamingEnvelope([b'{"data": [ ], "ok": 1}'])
+    assert list(parser.items()) == []
+    assert parser.found_list and parser.count == 0 and parser.envelope == {"ok": 1}
+
+
+def test_truncated_body_raises_after_yielding_complete_items():
+    parser = StreamingEnvelope(chunked('{"data": [{"a": 1}, {"a": 2}, {"a"', 4))
+    seen = []
+    with pytest.raises(ValueError):
+        for _, item in parser.items():
+            seen.append(item)
+    assert seen == [{"a": 1}, {"a": 2}]
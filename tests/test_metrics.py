@@ -0,0 +1,146 @@
+import json
+import socket
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils.http import APIClient
+from utils.metrics import RequestMetrics, fallback_template, merge_otlp, merge_prometheus
+from utils.routes import RouteTable
+
+
+class _Handler(BaseHTTPRequestHandler):
+    flaky_calls = 0
+
+    def do_GET(self):
+        if self.path == "/flaky":
+            type(self).flaky_calls += 1
+            if type(self).flaky_calls == 1:
+                return self._reply(502, b"{}")
+        status = 404 if self.path.endswith("/missing") else 200
+        self._reply(status, json.dumps({"path": self.path}).encode())
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply(201, b'{"ok": true}')
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(http_server):
+    _Handler.flaky_calls = 0
+    return http_server(_Handler)
+
+
+def _routes():
+    table = RouteTable()
+    table.add("GET", "/api/users/{id}")
+    table.add("GET", "/api/users/{id}/permissions")
+    return table
+
+
+def test_fallback_template():
+    assert fallback_template("/api/users/roby.va/roles") == "/api/users/{id}/roles"
+    assert fallback_template("/api/roles/42") == "/api/roles/{id}"
+    assert fallback_template("/api/users") == "/api/users"
+
+
+def test_series_are_labelled_by_route_template(server):
+    metrics = RequestMetrics(routes=_routes())
+    client = APIClient(server, metrics=metrics)
+    for uid in ("a", "b", "missing"):
+        client.get(f"/api/users/{uid}")
+    client.get("api/users/a/permissions?x=1")
+    client.post("/api/roles", json={"action": "CREATE"})
+    snap = metrics.snapshot()
+    assert set(snap) == {"GET /api/users/{id}", "GET /api/users/{id}/permissions", "POST /api/roles"}
+    users = snap["GET /api/users/{id}"]
+    assert users["requests"] == 3
+    assert users["status"] == {"2xx": 2, "4xx": 1}
+    assert users["latency"]["count"] == 3
+    assert users["response_bytes"] > 0
+    post = snap["POST /api/roles"]
+    assert post["request_bytes"] == len(json.dumps({"action": "CREATE"}))
+    assert post["response_bytes"] == len(b'{"ok": true}')
+
+
+def test_retries_and_errors_are_counted(server):
+    metrics = RequestMetrics()
+    client = APIClient(server, metrics=metrics)
+    assert client.get("/flaky").status_code == 200
+    assert metrics.snapshot()["GET /flaky"]["retries"] == 1
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed_port = s.getsockname()[1]
+    dead = APIClient(f"http://127.0.0.1:{closed_port}", retries=0, metrics=metrics)
+    with pytest.raises(Exception):
+        dead.get("/api/users")
+    assert metrics.snapshot()["GET /api/users"]["status"] == {"error": 1}
+
+
+def test_prometheus_text(server, tmp_path):
+    metrics = RequestMetrics(routes=_routes(), buckets=(0.000001, 60))
+    client = APIClient(server, metrics=metrics)
+    client.get("/api/users/a")
+    client.get("/api/users/b")
+    text = metrics.prometheus_text()
+    labels = 'method="GET",route="/api/users/{id}"'
+    assert f'api_client_requests_total{{{labels},status_class="2xx"}} 2' in text
+    assert f'api_client_request_duration_seconds_bucket{{{labels},le="1e-06"}} 0' in text
+    assert f'api_client_request_duration_seconds_bucket{{{labels},le="60"}} 2' in text
+    assert f'api_client_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"api_client_request_duration_seconds_count{{{labels}}} 2" in text
+    assert "# TYPE api_client_request_duration_seconds histogram" in text
+    out = tmp_path / "nested" / "metrics.prom"
+    metrics.write_prometheus(str(out))
+    assert out.read_text() == text
+
+
+def test_otlp_spans(server, tmp_path):
+    metrics = RequestMetrics(routes=_routes(), record_spans=True, max_spans=2)
+    client = APIClient(server, metrics=metrics)
+    for uid in ("a", "b", "c"):
+        client.get(f"/api/users/{uid}")
+    out = tmp_path / "spans.json"
+    metrics.write_spans(str(out))
+    doc = json.loads(out.read_text())
+    scope = doc["resourceSpans"][0]["scopeSpans"][0]
+    spans = scope["spans"]
+    assert len(spans) == 2 and metrics.dropped_spans == 1
+    span = spans[0]
+    assert span["name"] == "GET /api/users/{id}"
+    assert len(span["traceId"]) == 32 and len(span["spanId"]) == 16
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+    attrs = {a["key"]: a["value"] for a in span["attributes"]}
+    assert attrs["http.route"] == {"stringValue": "/api/users/{id}"}
+    assert attrs["http.response.status_code"] == {"intValue": "200"}
+    assert span["status"] == {"code": 1}
+
+
+def test_disabled_by_default(server):
+    client = APIClient(server)
+    assert client.metrics is None
+    assert client.get("/api/users/a").status_code == 200
+
+
+def test_merge_worker_metrics(server):
+    texts, spans = [], []
+    for _ in range(2):
+        metrics = RequestMetrics(record_spans=True)
+        client = APIClient(server, metrics=metrics)
+        client.get("/api/users/roby.va")
+        texts.append(metrics.prometheus_text())
+        spans.append(metrics.otlp_json())
+    merged = merge_prometheus(texts)
+    assert merged.count("# TYPE api_client_requests_total counter") == 1
+    assert 'api_client_requests_total{method="GET",route="/api/users/{id}",status_class="2xx"} 2' in merged
+    assert 'api_client_request_duration_seconds_count{method="GET",route="/api/users/{id}"} 2' in merged
+    doc = merge_otlp(spans)
+    assert sum(len(s["spans"]) for rs in doc["resourceSpans"] for s in rs["scopeSpans"]) == 2
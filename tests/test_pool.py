@@ -0,0 +1,90 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils.http import APIClient, get_session_with_retries
+from utils.pool import PoolStats, prewarm_session
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(0.05)
+        body = json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def local_server(http_server):
+    return http_server(_KeepAliveHandler)
+
+
+def test_pool_stats_reuse_ratio():
+    stats = PoolStats()
+    assert stats.reuse_ratio is None
+    stats.add("requests", 10)
+    stats.add("connections_opened", 2)
+    assert stats.reuse_ratio == pytest.approx(0.8)
+    assert stats.as_dict()["reuse_ratio"] == 0.8
+    stats.reset()
+    assert stats.requests == 0
+
+
+def test_sequential_requests_reuse_one_connection(local_server):
+    client = APIClient(local_server)
+    for _ in range(5):
+        assert client.get("/ping").status_code == 200
+    stats = client.pool_stats
+    assert stats.connections_opened == 1
+    assert stats.requests == 5
+    assert stats.reuse_ratio == pytest.approx(0.8)
+
+
+def _fan_out(sess, url, n):
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(lambda _: sess.get(url, timeout=5).status_code, range(n)))
+
+
+def test_non_blocking_pool_discards_overflow(local_server):
+    sess = get_session_with_retries(pool_maxsize=2)
+    assert _fan_out(sess, f"{local_server}/slow", 6) == [200] * 6
+    stats = sess.get_adapter(local_server).stats
+    assert stats.connections_opened > 2
+    assert stats.discarded == stats.connections_opened - 2
+    assert stats.waits == 0
+
+
+def test_blocking_pool_waits_instead(local_server):
+    sess = get_session_with_retries(pool_maxsize=2, pool_block=True)
+    assert _fan_out(sess, f"{local_server}/slow", 6) == [200] * 6
+    stats = sess.get_adapter(local_server).stats
+    assert stats.connections_opened == 2
+    assert stats.discarded == 0
+    assert stats.waits > 0 and stats.wait_ms > 0
+
+
+def test_prewarmed_connections_are_reused(local_server):
+    client = APIClient(local_server, pool_maxsize=3)
+    # capped at the pool size
+    assert client.prewarm(5) == 3
+    assert client.prewarm(3) == 0
+    assert client.get("/ping").status_code == 200
+    stats = client.pool_stats
+    assert stats.prewarmed == 3
+    assert stats.connections_opened == 0
+    assert stats.reuse_ratio == 1.0
+
+
+def test_timing_adapter_keeps_pool_stats(local_server):
+    sess = get_session_with_retries(timing=True)
+    assert prewarm_session(sess, f"{local_server}/", 1) == 1
+    resp = sess.get(f"{local_server}/ping", timeout=5)
+    assert resp.timings.reused is True
+    assert sess.get_adapter(local_server).stats.connections_opened == 0
@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from utils.http import APIClient
+from utils.prefetch import Prefetch
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    calls = {}
+
+    def do_GET(self):
+        with type(self).lock:
+            type(self).calls[self.path] = type(self).calls.get(self.path, 0) + 1
+        time.sleep(0.2)
+        body = json.dumps({"data": [{"id": self.path}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def slow_server(http_server):
+    _SlowHandler.calls = {}
+    return http_server(_SlowHandler)
+
+
+def test_declared_paths_fetched_together_once(slow_server):
+    paths = ["/api/users", "/api/roles", "/api/menus", "/api/users"]
+    prefetch = Prefetch(APIClient(slow_server), paths)
+    assert prefetch.paths == ["/api/menus", "/api/roles", "/api/users"]
+    started = time.perf_counter()
+    prefetch.fetch_all(concurrency=4)
+    # three 0.2s requests side by side, not one after another
+    assert time.perf_counter() - started < 0.5
+    prefetch.fetch_all()  # already fetched: no new requests
+    for path in paths:
+        assert path in prefetch
+        assert prefetch[path].json()["data"][0]["id"] == path
+    assert _SlowHandler.calls == {"/api/menus": 1, "/api/roles": 1, "/api/users": 1}
+    assert prefetch.as_dict()["requests"] == 3
+
+
+def test_undeclared_path_fetched_once_on_first_use(slow_server):
+    prefetch = Prefetch(APIClient(slow_server))
+    prefetch.fetch_all()
+    assert "/api/roles" not in prefetch
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        responses = list(pool.map(lambda _: prefetch.get("/api/roles"), range(3)))
+    # concurrent first uses may each send a request, but all get the response kept
+    assert all(resp is prefetch["/api/roles"] for resp in responses)
+    calls = _SlowHandler.calls["/api/roles"]
+    prefetch.get("/api/roles")
+    assert _SlowHandler.calls["/api/roles"] == calls
+
+
+def test_failed_fetch_raises_in_every_caller():
+    # nothing listens on port 9 of localhost
+    prefetch = Prefetch(APIClient("http://127.0.0.1:9", retries=0, timeout=2), ["/api/users"])
+    prefetch.fetch_all()
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            prefetch["/api/users"]
+    assert prefetch.as_dict()["requests"] == 1
+
+
+def test_errors_other_than_failed_requests_propagate():
+    class _Broken:
+        def get(self, path):
+            raise RuntimeError("bug")
+
+    with pytest.raises(RuntimeError):
+        Prefetch(_Broken(), ["/api/users"]).fetch_all()
@@ -0,0 +1,55 @@
+import json
+
+from utils.histogram import LatencyHistogram
+from utils.regression import compare_latency, format_comparison, histograms_by_endpoint, mann_whitney_greater
+
+BASE = [20.0 + (i % 10) for i in range(40)]  # 20..29 ms
+
+
+def test_u_statistic_matches_pairwise_count():
+    a = [1, 2, 2, 3, 5, 8, 8, 13]
+    c = [2, 3, 5, 5, 8, 21, 34]
+    u, p = mann_whitney_greater(LatencyHistogram.from_ms(a), LatencyHistogram.from_ms(c))
+    assert u == sum((x > y) + 0.5 * (x == y) for x in c for y in a)
+    assert 0.0 < p < 1.0
+
+
+def test_thirty_percent_slower_is_flagged():
+    base = LatencyHistogram.from_ms(BASE)
+    slower = LatencyHistogram.from_ms([v * 1.3 for v in BASE])
+    result = compare_latency(base, slower)
+    assert result["status"] == "regression"
+    assert result["p_value"] < 0.01 and result["median_ratio"] > 1.25 and result["cliffs_delta"] > 0.5
+
+
+def test_same_or_faster_is_ok():
+    base = LatencyHistogram.from_ms(BASE)
+    assert compare_latency(base, LatencyHistogram.from_ms(BASE))["status"] == "ok"
+    assert compare_latency(base, LatencyHistogram.from_ms([v * 0.7 for v in BASE]))["status"] == "ok"
+
+
+def test_small_significant_shift_is_below_effect_size():
+    base = LatencyHistogram.from_ms(BASE * 10)
+    slightly = LatencyHistogram.from_ms([v * 1.04 for v in BASE * 10])
+    assert compare_latency(base, slightly)["p_value"] < 0.01
+    assert compare_latency(base, slightly, min_slowdown=0.10)["status"] == "ok"
+    assert compare_latency(base, slightly, min_slowdown=0.02)["status"] == "regression"
+
+
+def test_zero_baseline_median_has_no_ratio():
+    base = LatencyHistogram.from_ms([0.0] * 20)
+    result = compare_latency(base, LatencyHistogram.from_ms([0.5] * 20))
+    assert result["status"] == "regression" and result["median_ratio"] is None
+    json.loads(json.dumps(result, allow_nan=False))
+    assert "+0.500 ms" in format_comparison(result)
+    assert compare_latency(base, LatencyHistogram.from_ms([0.0] * 20))["status"] == "ok"
+
+
+def test_insufficient_samples_and_entry_mapping():
+    one = LatencyHistogram.from_ms([10.0])
+    assert compare_latency(one, one)["status"] == "insufficient_samples"
+    entries = [
+        {"method": "GET", "path": "/api/users", "latency": {"count": 1, "histogram": one.to_dict()}},
+        {"method": "POST", "path": "/api/login", "latency": {"count": 0}},
+    ]
+    assert list(histograms_by_endpoint(entries)) == [("GET", "/api/users")]
@@ -0,0 +1,46 @@
+import xml.etree.ElementTree as ET
+
+from utils.report_writer import JUnitStreamWriter, NDJSONReportWriter, merge_junit, read_ndjson
+
+
+def test_ndjson_records_are_on_disk_before_close(tmp_path):
+    path = tmp_path / "run.ndjson"
+    writer = NDJSONReportWriter(str(path))
+    writer.write({"type": "result", "path": "/api/hello", "ok": True})
+    # flushed per record: readable while the writer is still open
+    assert [r["path"] for r in read_ndjson(str(path), "result")] == ["/api/hello"]
+    writer.write({"type": "summary", "success": 1})
+    writer.close()
+    assert list(read_ndjson(str(path), "summary")) == [{"type": "summary", "success": 1}]
+
+
+def test_junit_stream_fills_in_counts(tmp_path):
+    path = tmp_path / "junit.xml"
+    with JUnitStreamWriter(str(path), "check_endpoints") as writer:
+        ok = ET.Element("testcase", classname="check_endpoints", name="GET /api/hello")
+        bad = ET.Element("testcase", classname="check_endpoints", name="GET /api/users")
+        ET.SubElement(bad, "failure", message="http_500").text = "<boom & co>"
+        writer.add_testcase(ok)
+        writer.add_testcase(bad)
+    suite = ET.parse(str(path)).getroot()
+    assert suite.tag == "testsuite"
+    assert suite.attrib == {"name": "check_endpoints", "tests": "2", "failures": "1"}
+    assert [tc.get("name") for tc in suite] == ["GET /api/hello", "GET /api/users"]
+    assert suite[1].find("failure").text == "<boom & co>"
+
+
+def test_merge_junit_sums_worker_suites(tmp_path):
+    parts = []
+    for i, (tests, failures, seconds) in enumerate([(3, 1, 2.5), (2, 0, 4.0)]):
+        path = tmp_path / f"pytest.gw{i}.xml"
+        path.write_text(
+            f'<testsuites><testsuite name="pytest" tests="{tests}" failures="{failures}" errors="0" '
+            f'skipped="1" time="{seconds}"><testcase name="t{i}"/></testsuite></testsuites>'
+        )
+        parts.append(str(path))
+    out = tmp_path / "pytest.xml"
+    totals = merge_junit(parts, str(out))
+    assert totals == {"tests": 5, "failures": 1, "errors": 0, "skipped": 2, "time": 4.0}
+    root = ET.parse(str(out)).getroot()
+    assert root.tag == "testsuites" and root.get("tests") == "5"
+    assert [tc.get("name") for tc in root.iter("testcase")] == ["t0", "t1"]
@@ -0,0 +1,48 @@
+import json
+
+from utils.results_store import ResultsStore
+
+
+def _entry(path, p50):
+    return {"method": "GET", "path": path, "ok": True, "status_code": 200,
+            "schema": {"valid": True}, "latency": {"count": 5, "p50_ms": p50, "p99_ms": p50 * 2}}
+
+
+def test_history_and_trend(tmp_path):
+    with ResultsStore(str(tmp_path / "results.sqlite")) as store:
+        for i, p50 in enumerate((10.0, 12.0, 30.0)):
+            run = store.begin_run(f"2026-01-0{i + 1}T00:00:00Z", "http://mock")
+            store.add_result(run, 0, _entry("/api/users", p50))
+            store.add_result(run, 1, _entry("/api/roles", 1.0))
+            store.finish_run(run, {"success": 2, "failure": 0})
+        latest = store.latest_run()
+        assert latest["started"] == "2026-01-03T00:00:00Z"
+        assert [r["path"] for r in latest["results"]] == ["/api/users", "/api/roles"]
+        history = store.endpoint_history("get", "/api/users", limit=2)
+        assert [h["p50_ms"] for h in history] == [30.0, 12.0]
+        assert [t["p50_ms"] for t in store.latency_trend("GET", "/api/users")] == [10.0, 12.0, 30.0]
+        # an unfinished (in-progress or crashed) run is not a usable baseline
+        store.begin_run("2026-01-04T00:00:00Z", "http://mock")
+        assert store.latest_run()["finished"] is False
+        assert store.latest_run(finished_only=True)["run_id"] == latest["run_id"]
+        assert store.get_run(latest["run_id"])["results"] == latest["results"]
+
+
+def test_compact_imports_legacy_and_ndjson_reports(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    legacy = {"base_url": "http://mock", "results": [_entry("/api/hello", 1.0)], "summary": {"success": 1, "failure": 0}}
+    (reports / "check_endpoints_20250907T142531Z.json").write_text(json.dumps(legacy))
+    (reports / "check_endpoints_junit_20250907T142531Z.xml").write_text("<testsuite/>")
+    lines = [{"type": "run", "base_url": "http://mock", "started": "2025-09-08T00:00:00Z"},
+             dict(_entry("/api/users", 2.0), type="result"),
+             {"type": "summary", "success": 1, "failure": 0}]
+    (reports / "check_endpoints_20250908T000000Z.ndjson").write_text("\n".join(json.dumps(r) for r in lines))
+    with ResultsStore(str(reports / "results.sqlite")) as store:
+        assert store.compact(str(reports), keep=1) == {"imported": 2, "deleted": 2}
+        assert store.compact(str(reports), keep=1) == {"imported": 0, "deleted": 0}
+        assert store.latest_run()["results"][0]["path"] == "/api/users"
+        assert store.endpoint_history("GET", "/api/hello")[0]["status_code"] == 200
+    assert sorted(p.name for p in reports.iterdir() if not p.name.startswith("results.sqlite")) == [
+        "check_endpoints_20250908T000000Z.ndjson"
+    ]
@@ -0,0 +1,48 @@
+import pytest
+from utils.routes import RouteTable
+
+
+def test_lookup_captures_params_and_merges_settings():
+    table = RouteTable()
+    table.add("GET", "/api/users/{id}/permissions", schema="UserPermissionDto.json")
+    table.add("GET", "/api/users/{id}/permissions", item_schema="UserPermissionDto.json")
+    match = table.lookup("GET", "/api/users/phanith.chhim/permissions")
+    assert match.template == "/api/users/{id}/permissions"
+    assert match.params == {"id": "phanith.chhim"}
+    assert match.settings == {"schema": "UserPermissionDto.json", "item_schema": "UserPermissionDto.json"}
+
+
+def test_literal_segment_beats_placeholder_and_backtracks():
+    table = RouteTable()
+    table.add("GET", "/api/users/{id}", schema="user")
+    table.add("GET", "/api/users/me/settings", schema="settings")
+    assert table.lookup("GET", "/api/users/me/settings").get("schema") == "settings"
+    # "me" only matches the literal branch for /settings; plain /api/users/me falls back to {id}
+    assert table.lookup("GET", "/api/users/me").params == {"id": "me"}
+    assert table.lookup("POST", "/api/users/me") is None
+    assert table.lookup("GET", "/api/users/a/b") is None
+
+
+def test_query_string_and_trailing_slash_ignored():
+    table = RouteTable()
+    table.add("GET", "/api/roles", schema="role_schema.json")
+    assert table.lookup("get", "/api/roles/?size=19").template == "/api/roles"
+
+
+def test_many_routes():
+    table = RouteTable()
+    for i in range(5000):
+        table.add("GET", f"/api/r{i}/{{id}}/items", n=i)
+    assert len(table) == 5000
+    assert table.lookup("GET", "/api/r4321/abc/items").get("n") == 4321
+
+
+def test_placeholder_names_are_per_route():
+    table = RouteTable()
+    table.add("GET", "/api/users/{id}", schema="user")
+    table.add("GET", "/api/users/{uid}/roles", schema="roles")
+    assert table.lookup("GET", "/api/users/roby.va").params == {"id": "roby.va"}
+    assert table.lookup("GET", "/api/users/roby.va/roles").params == {"uid": "roby.va"}
+    # the same template under other names would make the params ambiguous
+    with pytest.raises(ValueError):
+        table.add("GET", "/api/users/{user_id}")
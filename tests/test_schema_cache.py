@@ -0,0 +1,59 @@
+import pytest
+from utils import schema as schema_utils
+from utils.schema import assert_json_schema, get_validator, validate_instance
+from utils.schema_loader import load_schema
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    schema_utils.clear_validator_cache()
+    yield
+    schema_utils.clear_validator_cache()
+
+
+def test_many_items_compile_once():
+    schema = load_schema("GetUserDto.json")
+    items = [{"userId": f"u{i}", "username": f"user {i}"} for i in range(10000)]
+    for item in items:
+        assert_json_schema(item, schema, name="GetUserDto.json")
+    info = schema_utils.validator_cache_info()
+    assert info["misses"] == 1
+    assert info["hits"] == len(items) - 1
+    assert info["size"] == 1
+
+
+def test_changed_schema_content_gets_new_validator():
+    schema = {"type": "object", "required": ["a"]}
+    v1 = get_validator(schema, "s.json")
+    v2 = get_validator(dict(schema, required=["b"]), "s.json")
+    assert v1 is not v2
+    assert get_validator(schema, "s.json") is v1
+
+
+def test_lru_eviction(monkeypatch):
+    monkeypatch.setattr(schema_utils, "VALIDATOR_CACHE_SIZE", 2)
+    first = get_validator({"type": "string"}, "a")
+    get_validator({"type": "integer"}, "b")
+    get_validator({"type": "string"}, "a")  # refresh "a"
+    get_validator({"type": "boolean"}, "c")  # evicts "b"
+    info = schema_utils.validator_cache_info()
+    assert info["size"] == 2
+    assert info["evictions"] == 1
+    assert get_validator({"type": "string"}, "a") is first
+
+
+def test_validate_instance_raises_validation_error():
+    from jsonschema import ValidationError
+
+    schema = load_schema("RoleDto.json")
+    validate_instance({"roleName": "Admin", "roleId": 1}, schema, name="RoleDto.json")
+    with pytest.raises(ValidationError):
+        validate_instance({"roleId": "x"}, schema, name="RoleDto.json")
+
+
+def test_generated_checks_evicted_with_validators(monkeypatch):
+    monkeypatch.setattr(schema_utils, "VALIDATOR_CACHE_SIZE", 2)
+    for name in ("a", "b", "c"):
+        schema_utils.get_checker({"type": "object", "required": [name]}, f"{name}.json")
+    info = schema_utils.validator_cache_info()
+    assert info["size"] == 2 and info["fast_checks"] == 2
@@ -0,0 +1,94 @@
+import glob
+import os
+
+import pytest
+from jsonschema import Draft7Validator
+
+from utils import schema_codegen
+from utils.schema_loader import load_schema
+
+
+@pytest.fixture(autouse=True)
+def generated_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCHEMA_CODEGEN_DIR", str(tmp_path))
+    return tmp_path
+
+
+SAMPLES = [
+    None, True, 0, 1, 1.0, 1.5, -3, "", "abc", [], [1, "a"], {},
+    {"userId": "u1", "username": "x"},
+    {"userId": None, "username": None, "remark": 3},
+    {"userId": "u1"},
+    {"roleId": 1, "roleName": "Admin"},
+    {"roleId": True, "roleName": "Admin"},
+    {"roleId": 2.0, "roleName": None, "isActive": "Y"},
+    {"menuId": "1", "permissionId": 1},
+    {"success": True, "message": None},
+    {"success": 1},
+]
+
+RICH = {
+    "type": "object",
+    "required": ["id", "tags"],
+    "additionalProperties": False,
+    "properties": {
+        "id": {"type": "integer", "minimum": 1, "maximum": 10},
+        "code": {"type": ["string", "null"], "pattern": "^[A-Z]{2}$", "minLength": 2, "maxLength": 2},
+        "kind": {"enum": ["a", "b", None]},
+        "tags": {"type": "array", "minItems": 1, "items": {"type": "string", "const": "x"}},
+        "score": {"type": "number", "minimum": 0.5},
+    },
+}
+RICH_SAMPLES = [
+    {"id": 1, "tags": ["x"]},
+    {"id": 0, "tags": ["x"]},
+    {"id": 11, "tags": ["x"]},
+    {"id": 5.0, "tags": ["x", "x"]},
+    {"id": 5, "tags": []},
+    {"id": 5, "tags": ["y"]},
+    {"id": 5, "tags": ["x"], "extra": 1},
+    {"id": 5, "tags": ["x"], "code": "AB", "kind": None, "score": 0.5},
+    {"id": 5, "tags": ["x"], "code": "ab"},
+    {"id": 5, "tags": ["x"], "code": None, "kind": "c"},
+    {"id": 5, "tags": ["x"], "score": True},
+    {"id": True, "tags": ["x"]},
+    {"tags": ["x"]},
+]
+
+
+SCHEMA_FILES = sorted(
+    os.path.basename(p) for p in glob.glob(os.path.join(os.path.dirname(__file__), "..", "utils", "schemas", "*.json"))
+)
+
+
+@pytest.mark.parametrize("name", SCHEMA_FILES)
+def test_generated_predicate_agrees_with_jsonschema(name):
+    schema = load_schema(name)
+    is_valid = schema_codegen.compile_schema(schema, name)
+    assert is_valid is not None
+    reference = Draft7Validator(schema)
+    for instance in SAMPLES:
+        assert is_valid(instance) == reference.is_valid(instance), instance
+
+
+def test_rich_schema_agrees_with_jsonschema():
+    is_valid = schema_codegen.compile_schema(RICH, "rich.json")
+    reference = Draft7Validator(RICH)
+    for instance in RICH_SAMPLES + SAMPLES:
+        assert is_valid(instance) == reference.is_valid(instance), instance
+
+
+def test_module_is_rebuilt_when_schema_changes(generated_dir):
+    v1 = schema_codegen.compile_schema({"type": "object", "required": ["a"]}, "s.json")
+    assert [p.name for p in generated_dir.glob("s_*.py")] != []
+    assert v1({"a": 1}) and not v1({"b": 1})
+    v2 = schema_codegen.compile_schema({"type": "object", "required": ["b"]}, "s.json")
+    # one module per schema version, named after the schema and its hash
+    assert len(list(generated_dir.glob("s_*.py"))) == 2
+    assert v2({"b": 1}) and not v2({"a": 1})
+    assert schema_codegen.compile_schema({"type": "object", "required": ["a"]}, "s.json")({"a": 1})
+
+
+def test_unsupported_keywords_fall_back():
+    assert schema_codegen.compile_schema({"type": "object", "oneOf": [{}, {}]}, "x.json") is None
+    assert schema_codegen.compile_schema({"enum": [1, 2]}, "y.json") is None
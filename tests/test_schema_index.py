@@ -0,0 +1,48 @@
+from utils.schema import validate_instance
+from utils.schema_index import SchemaIndex, get_default_index
+
+
+def _validate(instance, schema, name):
+    validate_instance(instance, schema, name=name)
+
+
+def test_debug_ip_body_does_not_match_login_response():
+    body = {"remoteAddr": "127.0.0.1", "xff": None, "verified_remote_ip": True}
+    matches = get_default_index().match(body, _validate)
+    assert matches[0] == "DebugIpResponse.json"
+    assert "LoginResponse.json" not in matches
+
+
+def test_candidates_ranked_by_specificity():
+    index = SchemaIndex({
+        "Loose.json": {"type": "object", "properties": {"userId": {}, "page": {}, "size": {}}},
+        "User.json": {"type": "object", "properties": {"userId": {}, "username": {}}, "required": ["userId", "username"]},
+        "Unrelated.json": {"type": "object", "properties": {"roleName": {}}},
+    })
+    names = [name for name, _ in index.candidates({"userId": "a", "username": "b"})]
+    assert names == ["User.json", "Loose.json"]
+
+
+def test_required_and_closed_schemas_filter_candidates():
+    index = SchemaIndex({
+        "NeedsId.json": {"type": "object", "properties": {"id": {}}, "required": ["id"]},
+        "Closed.json": {"type": "object", "properties": {"name": {}}, "additionalProperties": False},
+        "Text.json": {"type": "string"},
+    })
+    assert index.candidates({"name": "x", "extra": 1}) == []
+    assert [n for n, _ in index.candidates("plain text")] == ["Text.json"]
+
+
+def test_low_ranked_candidate_still_matches():
+    # six loose schemas outrank the only one the body validates against
+    schemas = {
+        f"Loose{i}.json": {"type": "object", "properties": {"id": {"type": "string"}, "name": {}, "a": {}, "b": {}}}
+        for i in range(6)
+    }
+    schemas["Numeric.json"] = {"type": "object", "properties": {"id": {"type": "integer"}, "x": {}, "y": {}, "z": {}, "w": {}}}
+    index = SchemaIndex(schemas)
+    body = {"id": 7, "name": "n"}
+    ranked = [name for name, _ in index.candidates(body)]
+    assert ranked.index("Numeric.json") >= 6
+    assert index.match(body, _validate) == ["Numeric.json"]
+    assert index.match(body, _validate, limit=5) == []
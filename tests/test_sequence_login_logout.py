@@ -1,7 +1,9 @@
 import pytest
 
+from utils.auth_cache import session_from_response
 
-def test_login_signout_login_sequence(api_client, config):
+
+def test_login_signout_login_sequence(api_client, config, auth_cache):
     """Automated sequence: login, signout, then login again.
 
     Uses `api_client` fixture so it targets configured base_url. This test is
@@ -35,6 +37,9 @@ def test_login_signout_login_sequence(api_client, config):
     # Signout
     resp2 = api_client.post("/api/signout", json={"username": username})
     assert resp2.status_code in (200, 400, 401)
+    # the signout may have ended the session other processes share
+    if auth_cache is not None:
+        auth_cache.invalidate(api_client.base_url, username)
 
     # Clear client cookies/headers to simulate fresh client, then login again
     api_client.session.cookies.clear()
@@ -55,3 +60,6 @@ def test_login_signout_login_sequence(api_client, config):
             break
 
     assert token2 or session_id2, "second login did not return token or cookie"
+    # hand the fresh session to the auth_api_client fixtures instead of a new login
+    if auth_cache is not None:
+        auth_cache.store(api_client.base_url, username, session_from_response(resp3))
@@ -0,0 +1,35 @@
+import pytest
+
+from utils.histogram import LatencyHistogram
+from utils.slo import MIN_SAMPLES, evaluate_budget, metric_value, parse_budget
+
+
+def test_parse_budget_rejects_bad_specs():
+    assert parse_budget({"p95_ms": 200, "p99.9_ms": 500, "max_ms": 1000}) == {
+        "p95_ms": 200.0, "p99.9_ms": 500.0, "max_ms": 1000.0,
+    }
+    for bad in ({}, {"p95": 200}, {"p95_ms": 0}, {"p95_ms": "fast"}, {"p95_ms": True}, [200]):
+        with pytest.raises(ValueError):
+            parse_budget(bad)
+
+
+def test_evaluate_budget_reports_breaches():
+    hist = LatencyHistogram.from_ms([10.0] * 90 + [300.0] * 10)
+    assert metric_value(hist, "p50_ms") == pytest.approx(10.0, rel=0.01)
+    assert metric_value(hist, "p95_ms") == pytest.approx(300.0, rel=0.01)
+    assert metric_value(hist, "mean_ms") == pytest.approx(39.0, rel=0.01)
+
+    verdict = evaluate_budget({"p50_ms": 20, "p95_ms": 200}, hist)
+    assert verdict["ok"] is False and verdict["status"] == "fail" and verdict["samples"] == 100
+    assert [c["metric"] for c in verdict["breaches"]] == ["p95_ms"]
+    assert evaluate_budget({"p90_ms": 20}, hist)["ok"] is True
+
+
+def test_too_few_samples_is_undecided():
+    verdict = evaluate_budget({"p95_ms": 200}, LatencyHistogram())
+    assert verdict == {"ok": None, "status": "insufficient_samples", "samples": 0, "checks": [], "breaches": []}
+    # one slow cold request is neither a pass nor a breach
+    verdict = evaluate_budget({"p95_ms": 200}, LatencyHistogram.from_ms([900.0]))
+    assert verdict["ok"] is None and verdict["samples"] == 1 and verdict["status"] == "insufficient_samples"
+    assert evaluate_budget({"p95_ms": 200}, LatencyHistogram.from_ms([900.0] * MIN_SAMPLES))["status"] == "fail"
+    assert evaluate_budget({"p95_ms": 200}, LatencyHistogram.from_ms([900.0]), min_samples=1)["ok"] is False
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils.http import APIClient
+from utils.throttle import Throttle, TokenBucket
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    """GET /<status>[/<retry-after>] answers with that status; `/busy` is 503 once, then 200."""
+
+    lock = threading.Lock()
+    calls = 0
+    busy_calls = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.calls += 1
+            if self.path == "/busy":
+                cls.busy_calls += 1
+        parts = self.path.strip("/").split("/")
+        headers = {}
+        if parts[0] == "busy":
+            status = 503 if cls.busy_calls == 1 else 200
+            headers["Retry-After"] = "1"
+        else:
+            status = int(parts[0]) if parts[0].isdigit() else 200
+            if len(parts) > 1:
+                headers["Retry-After"] = parts[1]
+        body = json.dumps({"status": status}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def status_server(http_server):
+    _StatusHandler.calls = _StatusHandler.busy_calls = 0
+    return http_server(_StatusHandler)
+
+
+def test_token_bucket_reservations():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # bucket empty: the third token is due in ~1/rate seconds, the fourth after that
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_rate_limit_spaces_requests(status_server):
+    client = APIClient(status_server, throttle=Throttle(rate=20, burst=1))
+    started = time.perf_counter()
+    for _ in range(5):
+        assert client.get("/200").status_code == 200
+    assert time.perf_counter() - started >= 4 / 20 * 0.9
+    stats = client.throttle_stats
+    assert stats.requests == 5
+    assert stats.throttled == 4 and stats.wait_ms > 0
+
+
+def test_retry_budget_caps_retries(status_server):
+    client = APIClient(status_server, retries=3, throttle=Throttle(retry_budget=0.0, min_retries=2))
+    # two retries are granted, the third is denied and the 502 comes back
+    assert client.get("/502").status_code == 502
+    assert _StatusHandler.calls == 3
+    # the budget is spent for the whole session: no retry at all now
+    assert client.get("/502").status_code == 502
+    assert _StatusHandler.calls == 4
+    stats = client.throttle_stats
+    assert (stats.requests, stats.retries, stats.retries_denied) == (2, 2, 2)
+
+
+def test_without_throttle_every_request_retries(status_server):
+    client = APIClient(status_server, retries=1)
+    client.get("/502")
+    client.get("/502")
+    assert _StatusHandler.calls == 4
+    assert client.throttle_stats is None
+
+
+def test_retry_after_is_honoured(status_server):
+    client = APIClient(status_server, throttle=Throttle())
+    started = time.perf_counter()
+    assert client.get("/busy").status_code == 200
+    assert time.perf_counter() - started >= 0.9
+    assert _StatusHandler.busy_calls == 2
+    assert client.throttle_stats.retries == 1
+
+
+def test_long_retry_after_is_not_waited_for_but_holds_the_host(status_server):
+    client = APIClient(status_server, throttle=Throttle(max_retry_after=0.2))
+    started = time.perf_counter()
+    assert client.get("/429/1").status_code == 429
+    assert time.perf_counter() - started < 0.5
+    assert client.throttle_stats.retry_after_capped == 1
+    # the next request to the same host waits out the Retry-After instead
+    assert client.get("/200").status_code == 200
+    assert time.perf_counter() - started >= 0.9
+    assert client.throttle_stats.throttled == 1
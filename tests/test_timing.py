@@ -0,0 +1,43 @@
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils.http import APIClient
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'{"success": true, "data": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def keepalive_server(http_server):
+    return http_server(_KeepAliveHandler)
+
+
+def test_phase_timings_and_connection_reuse(keepalive_server):
+    client = APIClient(keepalive_server, timing=True)
+    first = client.get("/api/users")
+    assert first.status_code == 200
+    t1 = client.last_timing
+    assert t1 is first.timings
+    assert t1.reused is False and t1.connections == 1
+    assert t1.total_ms >= t1.ttfb_ms > 0
+
+    client.get("/api/users")
+    t2 = client.last_timing
+    assert t2.reused is True
+    assert t2.dns_ms == 0 and t2.connect_ms == 0
+    assert set(t2.as_dict()) >= {"dns_ms", "connect_ms", "tls_ms", "ttfb_ms", "transfer_ms", "total_ms", "reused"}
+
+
+def test_timing_is_opt_in(keepalive_server):
+    client = APIClient(keepalive_server)
+    resp = client.get("/api/users")
+    assert not hasattr(resp, "timings")
+    assert client.last_timing is None
@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+
+from utils.workers import assign_files, worker_path, worker_shard
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_worker_identity(monkeypatch):
+    monkeypatch.delenv("TEST_WORKER", raising=False)
+    monkeypatch.delenv("TEST_WORKERS", raising=False)
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+    assert worker_shard() is None
+    assert worker_path("reports/metrics.prom") == "reports/metrics.prom"
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw3")
+    # xdist splits the run itself: names get the id, but no sharding here
+    assert worker_path("reports/metrics.prom") == "reports/metrics.gw3.prom"
+    assert worker_shard() is None
+    monkeypatch.setenv("TEST_WORKER", "gw1")
+    monkeypatch.setenv("TEST_WORKERS", "4")
+    assert worker_shard() == (1, 4)
+    assert worker_path("reports/pytest.xml") == "reports/pytest.gw1.xml"
+
+
+def test_assign_files_balances_durations():
+    counts = {"a.py": 10, "b.py": 10, "c.py": 1, "d.py": 1, "e.py": 4}
+    durations = {"a.py": 8.0, "b.py": 1.0, "c.py": 6.0, "d.py": 1.0}
+    assignment = assign_files(counts, 2, durations)
+    assert assignment == assign_files(dict(reversed(list(counts.items()))), 2, durations)  # deterministic
+    loads = [0.0, 0.0]
+    for f, worker in assignment.items():
+        # e.py has no history: 4 tests at the mean 16s / 22 tests
+        loads[worker] += durations.get(f, 4 * 16 / 22)
+    assert max(loads) - min(loads) <= 3.0
+    assert assignment["a.py"] != assignment["c.py"]
+    # without history, test counts are the weights
+    assert sorted(assign_files({"x.py": 5, "y.py": 5}, 2).values()) == [0, 1]
+
+
+def test_run_parallel_merges_worker_reports(tmp_path):
+    junit = tmp_path / "pytest.xml"
+    durations = tmp_path / "durations.json"
+    env = {k: v for k, v in os.environ.items() if k not in ("TEST_WORKER", "TEST_WORKERS")}
+    env["TEST_DURATIONS"] = str(durations)
+    proc = subprocess.run(
+        [sys.executable, "scripts/run_parallel.py", "-n", "3", "--mock", "none", f"--junitxml={junit}",
+         "-q", "-p", "no:cacheprovider", "tests/test_slo.py", "tests/test_histogram.py"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    root = ET.parse(str(junit)).getroot()
+    names = [f"{tc.get('classname')}::{tc.get('name')}" for tc in root.iter("testcase")]
+    # every test ran exactly once, across the workers
+    assert len(names) == len(set(names)) == int(root.get("tests")) > 0
+    assert {n.split("::")[0] for n in names} == {"tests.test_slo", "tests.test_histogram"}
+    assert not list(tmp_path.glob("pytest.gw*.xml"))
+    assert set(json.loads(durations.read_text())) == {"tests/test_slo.py", "tests/test_histogram.py"}
+    assert not list(tmp_path.glob("durations.gw*"))
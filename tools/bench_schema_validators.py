@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark generated schema predicates against the generic jsonschema validator.
+
+For each schema below, validates a batch of representative payloads three ways:
+
+- `jsonschema`  cached Draft7Validator (`validate_with`), the path used before code generation
+- `checker`     `utils.schema.get_checker`, generated predicate with jsonschema fallback
+- `predicate`   the generated `is_valid` function alone
+
+Run from the project root:
+
+    python tools/bench_schema_validators.py [--items 20000] [--rounds 5]
+
+Uses only the project's own dependencies (jsonschema).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.schema import get_checker, get_fast_check, get_validator, validate_with  # noqa: E402
+from utils.schema_loader import load_schema  # noqa: E402
+
+
+def users(n):
+    return [
+        {
+            "userId": f"user{i}", "username": f"User {i}", "isActive": "Y", "isLocked": "N",
+            "branchName": "HQ", "authorizeTypeName": None, "roleNames": "Admin,Viewer",
+            "createdDatetime": "2024-01-01T00:00:00", "lastLoginDatetime": None, "remark": None,
+        }
+        for i in range(n)
+    ]
+
+
+def permissions(n):
+    return [
+        {
+            "menuId": i, "menuName": f"Menu {i}", "menuLink": f"/menu/{i}", "parentId": None,
+            "fLevel": 1, "permissionId": i % 4, "permissionName": "read", "fVisible": 1,
+        }
+        for i in range(n)
+    ]
+
+
+def roles(n):
+    return [
+        {"roleId": i, "roleName": f"Role {i}", "isActive": "Y", "createBy": "admin", "createdDatetime": None}
+        for i in range(n)
+    ]
+
+
+CASES = [("GetUserDto.json", users), ("UserPermissionDto.json", permissions), ("RoleDto.json", roles)]
+
+
+def best_of(rounds, fn, items):
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--items", type=int, default=20000, help="Payloads per schema (default: 20000)")
+    p.add_argument("--rounds", type=int, default=5, help="Timed rounds; the best is reported (default: 5)")
+    args = p.parse_args(argv)
+
+    print(f"{'schema':<26}{'jsonschema':>14}{'checker':>14}{'predicate':>14}{'speedup':>10}")
+    for name, make in CASES:
+        schema = load_schema(name)
+        items = make(args.items)
+        validator = get_validator(schema, name, check_schema=True)
+        checker = get_checker(schema, name)
+        predicate = get_fast_check(schema, name)
+        if predicate is None:
+            print(f"{name:<26} not compiled (unsupported keywords or SCHEMA_CODEGEN=0)")
+            continue
+        generic = best_of(args.rounds, lambda inst: validate_with(validator, inst), items)
+        fast = best_of(args.rounds, checker, items)
+        raw = best_of(args.rounds, predicate, items)
+        per_item = 1e6 / len(items)
+        print(
+            f"{name:<26}{generic * per_item:>11.2f} us{fast * per_item:>11.2f} us"
+            f"{raw * per_item:>11.2f} us{generic / fast:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
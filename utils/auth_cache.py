@@ -0,0 +1,254 @@
+"""Login sessions shared by every process on the machine.
+
+Each pytest process, worker and check_endpoints run used to POST /api/login for
+itself. `AuthCache` keeps the session a login returned (bearer token and cookies
+such as JSESSIONID) in a JSON file keyed by base URL and username, so the first
+process logs in and the others reuse its session until it expires:
+
+    cache = AuthCache()                       # <project root>/.cache/auth_sessions.json
+    session.auth = SessionAuth(cache, base_url, username,
+                               login=lambda: session.post(f"{base_url}/api/login", json=creds))
+
+All reads and writes of the file happen under an exclusive lock on a `.lock` file
+next to it (utils.filelock). A process that finds no valid session logs
+in *while holding the lock*, so concurrent processes wait for its session instead
+of all logging in at once.
+
+A session expires after `ttl` seconds, or earlier when a cookie or the token (a JWT
+`exp` claim) says so. `SessionAuth` answers a 401 by invalidating the cached session
+(unless another process already replaced it), logging in again and resending the
+request once. Passwords are never written; the file is created mode 0600.
+"""
+import base64
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from requests.auth import AuthBase
+
+from .filelock import file_lock
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "auth_sessions.json")
+DEFAULT_TTL = 1800.0
+LOGIN_PATH = "/api/login"
+
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+        return float(payload["exp"])
+    except Exception:
+        return None
+
+
+def session_from_response(resp) -> Optional[dict]:
+    """The session a successful login response carries: bearer token and/or cookies, or None."""
+    if resp is None or not 200 <= resp.status_code < 300:
+        return None
+    token = None
+    cookies = {c.name: c.value for c in resp.cookies}
+    expiries = [c.expires for c in resp.cookies if c.expires]
+    try:
+        body = resp.json()
+    except Exception:
+        body = None
+    if isinstance(body, dict):
+        token = body.get("token") or body.get("access_token")
+        session_id = body.get("sessionId") or body.get("session_id")
+        if session_id:
+            cookies["JSESSIONID"] = session_id
+    if not token and not cookies:
+        return None
+    if token:
+        exp = _jwt_expiry(token)
+        if exp is not None:
+            expiries.append(exp)
+    return {"token": token, "cookies": cookies, "expires": min(expiries) if expiries else None}
+
+
+def _same_session(a: Optional[dict], b: Optional[dict]) -> bool:
+    return a is not None and b is not None and a.get("token") == b.get("token") and a.get("cookies") == b.get("cookies")
+
+
+class AuthCache:
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.logins = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(base_url: str, username: str) -> str:
+        return f"{(base_url or '').rstrip('/')}|{username}"
+
+    def _locked(self):
+        return file_lock(f"{self.path}.lock")
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}  # missing or damaged: start over
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: Dict[str, dict]) -> None:
+        now = time.time()
+        data = {k: v for k, v in data.items() if v.get("expires", 0) > now}
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _valid(self, entry: Optional[dict]) -> Optional[dict]:
+        if entry is None or entry.get("expires", 0) <= time.time():
+            return None
+        return entry
+
+    def get(self, base_url: str, username: str) -> Optional[dict]:
+        """The cached, unexpired session for (base_url, username), or None."""
+        with self._locked():
+            return self._valid(self._read().get(self.key(base_url, username)))
+
+    def store(self, base_url: str, username: str, session: dict) -> dict:
+        """Cache `session` (as returned by session_from_response); returns the stored entry."""
+        with self._locked():
+            data = self._read()
+            entry = self._entry(session)
+            data[self.key(base_url, username)] = entry
+            self._write(data)
+            return entry
+
+    def _entry(self, session: dict) -> dict:
+        now = time.time()
+        expires = now + self.ttl
+        if session.get("expires"):
+            expires = min(expires, session["expires"])
+        return {"token": session.get("token"), "cookies": dict(session.get("cookies") or {}), "created": now, "expires": expires}
+
+    def invalidate(self, base_url: str, username: str, session: Optional[dict] = None) -> bool:
+        """Drop the cached session; with `session`, only if it is still the cached one."""
+        with self._locked():
+            data = self._read()
+            key = self.key(base_url, username)
+            if key not in data or (session is not None and not _same_session(data[key], session)):
+                return False
+            del data[key]
+            self._write(data)
+            self.invalidations += 1
+            return True
+
+    def get_or_login(self, base_url: str, username: str, login: Callable) -> Optional[dict]:
+        """Cached session, or the one `login()` (returning the login response) obtains.
+
+        Holds the file lock while logging in, so concurrent processes wait for this
+        login instead of starting their own. Returns None when the login fails.
+        """
+        with self._locked():
+            data = self._read()
+            key = self.key(base_url, username)
+            entry = self._valid(data.get(key))
+            if entry is not None:
+                self.hits += 1
+                return entry
+            session = session_from_response(login())
+            self.logins += 1
+            if session is None:
+                return None
+            data[key] = entry = self._entry(session)
+            self._write(data)
+            return entry
+
+    def as_dict(self) -> dict:
+        return {"hits": self.hits, "logins": self.logins, "invalidations": self.invalidations}
+
+
+class SessionAuth(AuthBase):
+    """requests auth that sends the cached login session with every request.
+
+    The session's token goes in `Authorization: Bearer` and its cookies in the
+    `Cookie` header (taking precedence over same-named cookies in the session's jar).
+    Requests to the login path itself are sent unchanged. A 401 invalidates the
+    session, logs in again and resends the request once.
+    """
+
+    def __init__(self, cache: AuthCache, base_url: str, username: str, login: Callable, login_path: str = LOGIN_PATH):
+        self.cache = cache
+        self.base_url = base_url
+        self.username = username
+        self.login = login
+        self.login_path = login_path
+        self._entry: Optional[dict] = None
+        # a failed login is not retried on every request
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[dict]:
+        """The session to send: kept in memory until it expires, then re-read from the cache."""
+        entry = self._entry
+        if entry is not None and entry["expires"] > time.time():
+            return entry
+        with self._lock:
+            if self._entry is entry and not (entry is None and self._failed):
+                self._entry = self.cache.get_or_login(self.base_url, self.username, self.login)
+                self._failed = self._entry is None
+            return self._entry
+
+    def _refresh(self, stale: Optional[dict]) -> Optional[dict]:
+        with self._lock:
+            # another thread may have replaced it already
+            if self._entry is None or _same_session(self._entry, stale):
+                self.cache.invalidate(self.base_url, self.username, stale)
+                self._entry = self.cache.get_or_login(self.base_url, self.username, self.login)
+            return self._entry
+
+    def _apply(self, r, entry: dict) -> None:
+        r.auth_session = entry
+        if entry.get("token"):
+            r.headers["Authorization"] = f"Bearer {entry['token']}"
+        pairs = {}
+        for part in (r.jar_cookie_header or "").split(";"):
+            name, sep, value = part.strip().partition("=")
+            if sep:
+                pairs[name] = value
+        pairs.update(entry.get("cookies") or {})
+        if pairs:
+            r.headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in pairs.items())
+
+    def __call__(self, r):
+        if urlsplit(r.url).path == self.login_path:
+            return r
+        r.jar_cookie_header = r.headers.get("Cookie")
+        entry = self.current()
+        if entry is None:
+            return r
+        self._apply(r, entry)
+        r.register_hook("response", self._handle_401)
+        return r
+
+    def _handle_401(self, r, **kwargs):
+        used = getattr(r.request, "auth_session", None)
+        if r.status_code != 401 or used is None or getattr(r.request, "auth_retried", False):
+            return r
+        entry = self._refresh(used)
+        if entry is None or _same_session(entry, used):
+            return r
+        # same dance as requests' HTTPDigestAuth: drain, then resend a copy on the same connection
+        r.content
+        r.close()
+        prep = r.request.copy()
+        prep.jar_cookie_header = r.request.jar_cookie_header
+        prep.auth_retried = True
+        self._apply(prep, entry)
+        retried = r.connection.send(prep, **kwargs)
+        retried.history.append(r)
+        retried.request = prep
+        return retried
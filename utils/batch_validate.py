@@ -0,0 +1,110 @@
+"""Batch validation of large item lists, optionally across a process pool.
+
+`validate_items(items, schema, name)` checks every element of a list against one
+schema and returns only the failures, as `(index, message)` pairs in index order.
+
+Short lists (below `PARALLEL_THRESHOLD`, or `workers=1`) are validated inline with
+the cached checker from utils.schema. Longer lists are split into contiguous chunks
+that worker processes validate with their own cached checker; the per-chunk
+failures are merged back by chunk offset, so the result is identical to the inline
+path.
+
+The pool is created once, on first use, and reused by later calls. Its workers are
+started with `forkserver` (or `spawn` where that is unavailable), never by forking
+the caller: check_endpoints validates from inside its --concurrency thread pool, and
+a forked child would inherit whatever locks those threads held. As with any
+spawned pool, a script that calls it needs an `if __name__ == "__main__":` guard.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .schema import get_checker, get_validator
+
+try:
+    from jsonschema.exceptions import ValidationError
+except Exception:  # pragma: no cover - get_validator reports the missing package
+    ValidationError = Exception
+
+# items per task sent to a worker; large enough that pickling overhead stays small
+DEFAULT_CHUNK_SIZE = 5000
+# lists shorter than this are validated inline: starting workers would cost more
+PARALLEL_THRESHOLD = 20000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _validate_chunk(schema: dict, name: Optional[str], offset: int, chunk: Sequence[Any]) -> List[Tuple[int, str]]:
+    check = get_checker(schema, name)
+    failures = []
+    for i, item in enumerate(chunk):
+        try:
+            check(item)
+        except ValidationError as e:
+            failures.append((offset + i, str(e)))
+    return failures
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """The shared pool, (re)created when a different worker count is asked for."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the shared worker processes (they are also stopped at interpreter exit)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool, _pool_workers = None, 0
+
+
+def validate_items(
+    items: Sequence[Any],
+    schema: dict,
+    name: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+) -> List[Tuple[int, str]]:
+    """Validate each element of `items` against `schema`; return `(index, error)` failures in order.
+
+    `workers` defaults to the CPU count. The schema is checked against the draft-07
+    metaschema once up front, so a broken schema raises SchemaError here rather than
+    in a worker.
+    """
+    get_validator(schema, name, check_schema=True)
+    workers = default_workers() if workers is None else max(1, workers)
+    if workers == 1 or len(items) < max(parallel_threshold, chunk_size):
+        return _validate_chunk(schema, name, 0, items)
+    offsets = range(0, len(items), chunk_size)
+    pool = _get_pool(workers)
+    futures = [
+        pool.submit(_validate_chunk, schema, name, off, items[off:off + chunk_size])
+        for off in offsets
+    ]
+    # chunks are contiguous and submitted in order, so concatenation keeps index order
+    failures: List[Tuple[int, str]] = []
+    for fut in futures:
+        failures.extend(fut.result())
+    return failures
@@ -0,0 +1,302 @@
+"""Record/replay cassettes for requests sessions.
+
+A cassette stores request/response pairs in one compact file, so tests can be replayed
+later with no server and no sockets:
+
+    cassette = Cassette("tests/cassettes/mock.cas", mode="record")
+    session = get_session_with_retries(cassette=cassette)   # or APIClient(..., cassette=cassette)
+    ...
+    cassette.save()
+
+Modes:
+
+- `record`  send every request and store its response (replacing, on save, what the
+            cassette held for the requests sent; other entries are kept)
+- `replay`  answer from the cassette only; a request it does not hold raises CassetteMiss
+- `auto`    replay what the cassette holds, send and record everything else
+
+Requests are matched by a normalized key: method, URL path, query parameters sorted,
+and a digest of the body (JSON bodies canonicalised first). Scheme and host are left
+out, so a cassette recorded against the mock replays under any BASE_URL. Headers are
+left out too, so session cookies and tokens that change between runs do not break
+matching. When the same request was recorded several times, replay returns the
+responses in recording order and then keeps repeating the last one.
+
+File layout (little-endian):
+
+    b"APICAS1\\n"
+    record*   u32 meta length, u32 body length, meta (JSON), body
+    index     JSON {key: [record offset, ...]}
+    footer    u64 index offset, b"APICAS1\\n"
+
+Replay memory-maps the file and decodes only the records it serves. Bodies are
+stored decoded (after gzip etc.), without `Content-Encoding`.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from datetime import timedelta
+from http.client import HTTPMessage
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.structures import CaseInsensitiveDict
+from urllib3._collections import HTTPHeaderDict
+from urllib3.response import HTTPResponse
+
+from .filelock import file_lock
+
+MAGIC = b"APICAS1\n"
+_RECORD_HEADER = struct.Struct("<II")
+_FOOTER = struct.Struct("<Q")
+MODES = ("record", "replay", "auto")
+# hop-by-hop / transport headers that do not describe the stored (decoded) body
+_DROP_HEADERS = ("Content-Encoding", "Content-Length", "Transfer-Encoding", "Connection", "Keep-Alive")
+
+
+class CassetteError(ValueError):
+    pass
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Replay mode was asked for a request the cassette does not contain."""
+
+
+def _body_bytes(body) -> bytes:
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body)
+    raise CassetteError(f"cannot key a streamed request body ({type(body).__name__})")
+
+
+def cassette_key(method: str, url: str, body=None) -> str:
+    """Normalized request key: `METHOD /path?sorted=query [body digest]`."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    key = f"{method.upper()} {parts.path or '/'}" + (f"?{query}" if query else "")
+    raw = _body_bytes(body)
+    if raw:
+        try:
+            # same JSON document, same key, however it was serialised
+            raw = json.dumps(json.loads(raw), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        except ValueError:
+            pass
+        key += " " + hashlib.sha1(raw).hexdigest()[:16]
+    return key
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in MODES:
+            raise CassetteError(f"unknown cassette mode {mode!r}; expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._index: Dict[str, List[int]] = {}
+        self._served: Dict[str, int] = {}
+        self._mm: Optional[mmap.mmap] = None
+        self._file = None
+        # records added in this session: key -> [(meta, body)]
+        self._new: Dict[str, List[Tuple[dict, bytes]]] = {}
+        if mode != "record" and os.path.exists(path):
+            self._open()
+        elif mode == "replay":
+            raise CassetteError(f"cassette not found: {path}")
+
+    # -- reading -------------------------------------------------------------
+
+    def _open(self) -> None:
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC) * 2 + _FOOTER.size:
+            raise CassetteError(f"{self.path}: not a cassette (too short)")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC or self._mm[-len(MAGIC):] != MAGIC:
+            raise CassetteError(f"{self.path}: not a cassette (bad magic)")
+        footer_at = size - len(MAGIC) - _FOOTER.size
+        (index_at,) = _FOOTER.unpack_from(self._mm, footer_at)
+        self._index = json.loads(self._mm[index_at:footer_at].decode("utf-8"))
+
+    def _read_record(self, offset: int) -> Tuple[dict, bytes]:
+        meta_len, body_len = _RECORD_HEADER.unpack_from(self._mm, offset)
+        start = offset + _RECORD_HEADER.size
+        meta = json.loads(self._mm[start:start + meta_len].decode("utf-8"))
+        body = self._mm[start + meta_len:start + meta_len + body_len]
+        return meta, body
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._new or key in self._index
+
+    def __len__(self) -> int:
+        return len(set(self._index) | set(self._new))
+
+    def lookup(self, key: str) -> Optional[Tuple[dict, bytes]]:
+        """Next recorded (meta, body) for `key`, or None."""
+        with self._lock:
+            entries = self._new.get(key)
+            offsets = self._index.get(key) if entries is None else None
+            count = len(entries) if entries is not None else len(offsets or ())
+            if not count:
+                self.misses += 1
+                return None
+            self.hits += 1
+            n = self._served.get(key, 0)
+            self._served[key] = n + 1
+            i = min(n, count - 1)
+            if entries is not None:
+                return entries[i]
+            return self._read_record(offsets[i])
+
+    # -- recording -----------------------------------------------------------
+
+    def record(self, key: str, response: requests.Response) -> None:
+        # raw headers keep repeated fields (several Set-Cookie) apart
+        raw_headers = getattr(response.raw, "headers", None) or response.headers
+        headers = [(k, v) for k, v in raw_headers.items() if k.title() not in _DROP_HEADERS]
+        meta = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "url": response.url,
+            "headers": headers,
+        }
+        with self._lock:
+            self._new.setdefault(key, []).append((meta, response.content or b""))
+            self.recorded += 1
+
+    def save(self) -> None:
+        """Write the cassette: the requests recorded here plus the ones already on disk.
+
+        Saves are serialised across processes and re-read the file under the lock, so
+        what other processes saved in the meantime is kept and parallel workers can
+        fill one cassette. A key recorded here replaces its entries on disk.
+        """
+        if self.mode == "replay" or not self.recorded:
+            return
+        with self._lock, file_lock(f"{self.path}.lock"):
+            entries: Dict[str, List[Tuple[dict, bytes]]] = {}
+            self._close_map()
+            self._index = {}
+            if os.path.exists(self.path):
+                self._open()
+            for key, offsets in self._index.items():
+                if key not in self._new:
+                    entries[key] = [self._read_record(o) for o in offsets]
+            entries.update(self._new)
+            tmp = f"{self.path}.tmp{os.getpid()}"
+            index: Dict[str, List[int]] = {}
+            with open(tmp, "wb") as f:
+                f.write(MAGIC)
+                for key, records in sorted(entries.items()):
+                    for meta, body in records:
+                        index.setdefault(key, []).append(f.tell())
+                        meta_raw = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+                        f.write(_RECORD_HEADER.pack(len(meta_raw), len(body)))
+                        f.write(meta_raw)
+                        f.write(body)
+                index_at = f.tell()
+                f.write(json.dumps(index, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+                f.write(_FOOTER.pack(index_at))
+                f.write(MAGIC)
+            self._close_map()
+            os.replace(tmp, self.path)
+            self._new = {}
+            self._served = {}
+            self.recorded = 0
+            self._open()
+
+    def _close_map(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        self.save()
+        self._close_map()
+
+    def as_dict(self) -> dict:
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+class _RecordedResponse:
+    """Stand-in for the http.client response that cookie extraction looks at."""
+
+    def __init__(self, msg: HTTPMessage):
+        self.msg = msg
+
+    def isclosed(self) -> bool:
+        return False
+
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter that records through, or replays instead of, a real adapter.
+
+    Attributes it does not define (pool `stats`, `throttle`...) are read from the wrapped
+    adapter, so code inspecting `session.get_adapter(url)` keeps working.
+    """
+
+    def __init__(self, adapter, cassette: Cassette):
+        super().__init__()
+        self.adapter = adapter
+        self.cassette = cassette
+
+    def __getattr__(self, name):
+        # only called for attributes not found normally
+        return getattr(self.__dict__["adapter"], name)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        cassette = self.cassette
+        key = cassette_key(request.method, request.url, request.body)
+        if cassette.mode != "record":
+            found = cassette.lookup(key)
+            if found is not None:
+                return self._build_response(request, *found, stream=stream)
+            if cassette.mode == "replay":
+                raise CassetteMiss(f"no recorded response for {key} in {cassette.path}", request=request)
+        resp = self.adapter.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        cassette.record(key, resp)  # reads the body, even for stream=True
+        return resp
+
+    def _build_response(self, request, meta: dict, body, stream: bool = False) -> requests.Response:
+        body = bytes(body)
+        resp = requests.Response()
+        resp.status_code = meta["status"]
+        resp.reason = meta.get("reason")
+        resp.url = request.url
+        headers = HTTPHeaderDict(meta.get("headers") or [])
+        headers["Content-Length"] = str(len(body))
+        resp.headers = CaseInsensitiveDict(headers)
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.raw = HTTPResponse(body=BytesIO(body), headers=headers, status=resp.status_code, preload_content=False)
+        # what requests reads cookies from; Session.send stores them in the session's jar
+        message = HTTPMessage()
+        for name, value in headers.iteritems():
+            message[name] = value
+        resp.raw._original_response = _RecordedResponse(message)
+        extract_cookies_to_jar(resp.cookies, request, resp.raw)
+        if not stream:
+            resp._content = body
+            resp._content_consumed = True
+        resp.request = request
+        resp.connection = self
+        resp.elapsed = timedelta(0)
+        resp.from_cassette = True
+        return resp
+
+    def close(self):
+        self.adapter.close()
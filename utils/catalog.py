@@ -0,0 +1,215 @@
+"""Declarative endpoint catalog compiled into a cached execution plan.
+
+The catalog (endpoints.yaml at the project root by default, YAML or JSON) lists the
+checks run by scripts/check_endpoints.py. `load_plan()` compiles it once into an
+`ExecutionPlan`: concrete request paths, resolved schemas and a RouteTable carrying
+the per-route settings. The compiled plan is cached as JSON under `.cache/`, keyed by
+the catalog's content hash, and reused as long as the catalog and every referenced
+schema file are unchanged.
+"""
+import hashlib
+import json
+import os
+from string import Template
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from . import schema_loader
+from .routes import RouteTable
+from .slo import parse_budget
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CATALOG = os.path.join(PROJECT_ROOT, "endpoints.yaml")
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache", "check_endpoints")
+
+# bump when the compiled plan layout changes so stale caches are ignored
+PLAN_VERSION = 2
+
+# catalog keys with a dedicated PlanStep field; anything else is kept in `settings`
+_KNOWN_KEYS = {"method", "path", "params", "payload", "expect_status", "schema", "item_schema", "repeat"}
+
+
+class CatalogError(ValueError):
+    """Raised for a malformed endpoint catalog."""
+
+
+class PlanStep(NamedTuple):
+    method: str
+    template: str
+    path: str
+    payload: Any
+    expect_status: Optional[Tuple[int, ...]]
+    schema: Optional[str]
+    item_schema: Optional[str]
+    repeat: bool
+    settings: Dict[str, Any]
+
+    def status_ok(self, status: Optional[int]) -> bool:
+        if status is None:
+            return False
+        if self.expect_status:
+            return status in self.expect_status
+        return 200 <= status < 300
+
+    def render_payload(self, variables: Dict[str, Any]) -> Any:
+        """Return the payload with `${name}` placeholders substituted from `variables`."""
+        return _render(self.payload, variables)
+
+
+def _render(value: Any, variables: Dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        return Template(value).safe_substitute(variables)
+    if isinstance(value, dict):
+        return {k: _render(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_render(v, variables) for v in value]
+    return value
+
+
+class ExecutionPlan:
+    def __init__(self, steps: List[PlanStep], schemas: Dict[str, Optional[dict]], digest: str, source: str):
+        self.steps = steps
+        self.schemas = schemas
+        self.digest = digest
+        self.source = source
+        self.routes = RouteTable()
+        for i, step in enumerate(steps):
+            route_settings = {k: v for k, v in (("schema", step.schema), ("item_schema", step.item_schema)) if v}
+            route_settings.update(step.settings)
+            try:
+                self.routes.add(step.method, step.template, **route_settings)
+            except ValueError as e:
+                raise CatalogError(f"{source}: endpoints[{i}]: {e}") from None
+
+    def schema(self, name: Optional[str]) -> Optional[dict]:
+        """Return a resolved schema by name (None when it is unknown or missing)."""
+        return self.schemas.get(name) if name else None
+
+    def to_dict(self) -> dict:
+        return {
+            "version": PLAN_VERSION,
+            "digest": self.digest,
+            "source": self.source,
+            "steps": [s._asdict() for s in self.steps],
+            "schemas": self.schemas,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ExecutionPlan":
+        steps = []
+        for s in data["steps"]:
+            s = dict(s)
+            s["expect_status"] = tuple(s["expect_status"]) if s.get("expect_status") else None
+            steps.append(PlanStep(**s))
+        return cls(steps, data["schemas"], data["digest"], data["source"])
+
+
+def read_catalog(path: str) -> Tuple[dict, bytes]:
+    """Parse a YAML or JSON catalog file; return the document and its raw bytes."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".json"):
+        doc = json.loads(raw.decode("utf-8"))
+    else:
+        import yaml
+
+        doc = yaml.safe_load(raw)
+    if not isinstance(doc, dict) or not isinstance(doc.get("endpoints"), list):
+        raise CatalogError(f"{path}: expected a mapping with an 'endpoints' list")
+    return doc, raw
+
+
+def _expand_path(template: str, params: Dict[str, Any], where: str) -> str:
+    parts = []
+    for seg in template.split("/"):
+        if len(seg) > 2 and seg.startswith("{") and seg.endswith("}"):
+            name = seg[1:-1]
+            if name not in params:
+                raise CatalogError(f"{where}: no value for placeholder {{{name}}} in params")
+            seg = str(params[name])
+        parts.append(seg)
+    return "/".join(parts)
+
+
+def compile_catalog(doc: dict, digest: str, source: str) -> Tuple[ExecutionPlan, Dict[str, list]]:
+    """Compile a parsed catalog. Returns the plan and the schema files it depends on."""
+    steps = []
+    schemas: Dict[str, Optional[dict]] = {}
+    schema_files: Dict[str, list] = {}
+    for i, item in enumerate(doc["endpoints"]):
+        where = f"{source}: endpoints[{i}]"
+        if not isinstance(item, dict) or not item.get("path"):
+            raise CatalogError(f"{where}: each endpoint needs at least a 'path'")
+        method = str(item.get("method", "GET")).upper()
+        template = item["path"]
+        expect = item.get("expect_status")
+        if expect is not None:
+            expect = tuple(int(c) for c in (expect if isinstance(expect, list) else [expect]))
+        settings = {k: v for k, v in item.items() if k not in _KNOWN_KEYS}
+        if "budget" in settings:
+            try:
+                settings["budget"] = parse_budget(settings["budget"])
+            except ValueError as e:
+                raise CatalogError(f"{where}: {e}") from None
+        for key in ("schema", "item_schema"):
+            name = item.get(key)
+            if name and name not in schemas:
+                schema, path = schema_loader.load_schema_with_path(name)
+                schemas[name] = schema
+                if path:
+                    st = os.stat(path)
+                    schema_files[name] = [path, st.st_mtime_ns, st.st_size]
+        steps.append(PlanStep(
+            method=method,
+            template=template,
+            path=_expand_path(template, item.get("params") or {}, where),
+            payload=item.get("payload"),
+            expect_status=expect,
+            schema=item.get("schema"),
+            item_schema=item.get("item_schema"),
+            repeat=bool(item.get("repeat", method == "GET")),
+            settings=settings,
+        ))
+    return ExecutionPlan(steps, schemas, digest, source), schema_files
+
+
+def _schemas_unchanged(schema_files: Dict[str, list]) -> bool:
+    for path, mtime_ns, size in schema_files.values():
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_mtime_ns != mtime_ns or st.st_size != size:
+            return False
+    return True
+
+
+def load_plan(catalog_path: str = DEFAULT_CATALOG, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> ExecutionPlan:
+    """Return the compiled plan for `catalog_path`, using the on-disk cache when valid.
+
+    Pass `cache_dir=None` to always compile.
+    """
+    with open(catalog_path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw + f"\0v{PLAN_VERSION}".encode()).hexdigest()
+    cache_file = os.path.join(cache_dir, f"plan-{digest[:32]}.json") if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file) as f:
+                cached = json.load(f)
+            if cached.get("version") == PLAN_VERSION and _schemas_unchanged(cached.get("schema_files", {})):
+                return ExecutionPlan.from_dict(cached["plan"])
+        except Exception:
+            pass  # unreadable cache: recompile below
+    doc, _ = read_catalog(catalog_path)
+    plan, schema_files = compile_catalog(doc, digest, os.path.basename(catalog_path))
+    # a schema that could not be resolved may appear later; only cache fully resolved plans
+    if cache_file and all(s is not None for s in plan.schemas.values()):
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"version": PLAN_VERSION, "schema_files": schema_files, "plan": plan.to_dict()}, f)
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass  # caching is best effort
+    return plan
@@ -0,0 +1,126 @@
+"""Single-flight coalescing of identical in-flight GETs.
+
+When several callers ask for the same resource at the same moment, only the first
+(the leader) sends a request; the others wait for it and get the very same
+response object (or the same exception). Requests are identical when their method,
+final URL and identity headers match (see utils.http_cache.request_key), so
+different users never share a response. Once the leader's request completes, the
+next identical call sends a fresh request; nothing is cached.
+
+`SingleFlight` serves threads (APIClient used from a thread pool);
+`AsyncSingleFlight` serves one asyncio event loop (AsyncAPIClient). Both count
+into a `CoalesceStats`:
+
+- `leaders`  requests actually sent
+- `merged`   calls answered by another caller's in-flight request
+"""
+import asyncio
+import threading
+from typing import Callable, Optional
+
+COALESCED_METHODS = frozenset(["GET", "HEAD"])
+
+
+class CoalesceStats:
+    __slots__ = ("leaders", "merged", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.leaders = 0
+        self.merged = 0
+
+    def add(self, field: str, amount=1) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    @property
+    def merge_ratio(self) -> Optional[float]:
+        """Share of calls that did not need their own request."""
+        total = self.leaders + self.merged
+        if not total:
+            return None
+        return self.merged / total
+
+    def as_dict(self) -> dict:
+        ratio = self.merge_ratio
+        return {
+            "leaders": self.leaders,
+            "merged": self.merged,
+            "merge_ratio": None if ratio is None else round(ratio, 4),
+        }
+
+    def __repr__(self):
+        return f"CoalesceStats({self.as_dict()})"
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Thread-safe: concurrent `do(key, fn)` calls with the same key run `fn` once."""
+
+    def __init__(self, stats: Optional[CoalesceStats] = None):
+        self.stats = stats if stats is not None else CoalesceStats()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            self.stats.add("merged")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self.stats.add("leaders")
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """asyncio version of SingleFlight, for use from a single event loop.
+
+    The leader's coroutine runs as a task and every caller awaits it through
+    `asyncio.shield`, so cancelling one waiting caller does not cancel the request
+    the others are waiting for.
+    """
+
+    def __init__(self, stats: Optional[CoalesceStats] = None):
+        self.stats = stats if stats is not None else CoalesceStats()
+        self._tasks = {}
+
+    async def do(self, key, factory: Callable):
+        task = self._tasks.get(key)
+        if task is None:
+            self.stats.add("leaders")
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.stats.add("merged")
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
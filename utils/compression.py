@@ -0,0 +1,121 @@
+"""Explicit response-compression negotiation and wire/decoded byte accounting.
+
+requests always sends `Accept-Encoding: gzip, deflate` and quietly decodes the body,
+so the bandwidth a response really costs is invisible. `APIClient(compression=...)`
+makes the negotiation explicit:
+
+- `compression=None` keeps requests' default header
+- `compression=("gzip",)` or `("br", "gzip")` asks for exactly those codings, in that
+  order of preference. Codings urllib3 cannot decode here (brotli needs the
+  `brotli`/`brotlicffi` package, zstd the `zstandard` package) are dropped, so asking
+  for `br` is safe on any machine.
+- `compression=()` sends `Accept-Encoding: identity` (no compression)
+
+`measure(resp)` sets `resp.wire_bytes` (body bytes read from the socket, counted
+by `WireCountingHTTPResponse`, which the utils.pool pools hand out),
+`resp.decoded_bytes` (after decompression) and `resp.content_encoding` on a response
+whose body has been read; `CompressionStats` sums them per coding.
+"""
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from urllib3.response import HTTPResponse
+from urllib3.util.request import ACCEPT_ENCODING
+
+# codings urllib3 can decode in this environment (brotli/zstd only when installed)
+AVAILABLE_ENCODINGS = tuple(enc.strip() for enc in ACCEPT_ENCODING.split(",") if enc.strip())
+KNOWN_ENCODINGS = frozenset(["gzip", "deflate", "br", "zstd", "identity"])
+
+
+def accept_encoding(encodings: Sequence[str]) -> str:
+    """Accept-Encoding value for `encodings` (in preference order), limited to decodable codings."""
+    if isinstance(encodings, str):
+        encodings = encodings.split(",")
+    wanted = []
+    for enc in encodings:
+        enc = enc.strip().lower()
+        if not enc:
+            continue
+        if enc not in KNOWN_ENCODINGS:
+            raise ValueError(f"unknown content coding {enc!r}; expected one of {sorted(KNOWN_ENCODINGS)}")
+        if enc in AVAILABLE_ENCODINGS and enc not in wanted:
+            wanted.append(enc)
+    if not wanted:
+        return "identity"
+    # explicit q-values so servers honour our order of preference
+    return ", ".join(enc if i == 0 else f"{enc};q={1 - i / 10:.1f}" for i, enc in enumerate(wanted[:9]))
+
+
+class WireCountingHTTPResponse(HTTPResponse):
+    """HTTPResponse whose `tell()` also counts chunked bodies (urllib3 only counts sized reads)."""
+
+    def _handle_chunk(self, amt):
+        chunk = super()._handle_chunk(amt)
+        self._fp_bytes_read += len(chunk)
+        return chunk
+
+
+def measure(resp) -> Optional[Tuple[int, int, str]]:
+    """Attach wire/decoded sizes to a fully read response; returns (wire, decoded, encoding) or None."""
+    raw = getattr(resp, "raw", None)
+    content = getattr(resp, "_content", False)
+    if raw is None or not hasattr(raw, "tell") or content is False or content is None:
+        return None  # streamed and not read yet, or no urllib3 response behind it
+    decoded = len(content)
+    try:
+        wire = raw.tell() or decoded
+    except Exception:
+        wire = decoded
+    encoding = (resp.headers.get("Content-Encoding") or "identity").lower()
+    resp.wire_bytes = wire
+    resp.decoded_bytes = decoded
+    resp.content_encoding = encoding
+    return wire, decoded, encoding
+
+
+class CompressionStats:
+    __slots__ = ("responses", "compressed", "wire_bytes", "decoded_bytes", "by_encoding", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.responses = 0
+        self.compressed = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.by_encoding: Dict[str, Dict[str, int]] = {}
+
+    def add(self, wire: int, decoded: int, encoding: str) -> None:
+        with self._lock:
+            self.responses += 1
+            if encoding != "identity":
+                self.compressed += 1
+            self.wire_bytes += wire
+            self.decoded_bytes += decoded
+            per = self.by_encoding.setdefault(encoding, {"responses": 0, "wire_bytes": 0, "decoded_bytes": 0})
+            per["responses"] += 1
+            per["wire_bytes"] += wire
+            per["decoded_bytes"] += decoded
+
+    @property
+    def ratio(self) -> Optional[float]:
+        """Wire bytes per decoded byte (1.0 = no savings)."""
+        if not self.decoded_bytes:
+            return None
+        return self.wire_bytes / self.decoded_bytes
+
+    def as_dict(self) -> dict:
+        ratio = self.ratio
+        return {
+            "responses": self.responses,
+            "compressed": self.compressed,
+            "wire_bytes": self.wire_bytes,
+            "decoded_bytes": self.decoded_bytes,
+            "ratio": None if ratio is None else round(ratio, 4),
+            "by_encoding": {k: dict(v) for k, v in sorted(self.by_encoding.items())},
+        }
+
+    def __repr__(self):
+        return f"CompressionStats({self.as_dict()})"
@@ -0,0 +1,36 @@
+"""Exclusive advisory lock on a file, shared by processes and threads on one machine.
+
+    with file_lock(".cache/auth_sessions.json.lock"):
+        ...  # read-modify-write the guarded file
+
+flock on POSIX (the lock belongs to the open file, so threads of one process
+exclude each other too), msvcrt on Windows. The lock file is created if needed
+and left in place.
+"""
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,137 @@
+"""Compact latency histogram with HDR-style log-linear buckets.
+
+Values are recorded as integer microseconds. Each power-of-two range is split into
+`2 ** sub_bucket_bits` linear sub-buckets, so every recorded value is kept within a
+relative error of about `1 / 2 ** sub_bucket_bits` (under 1% with the default 7 bits)
+while memory grows with the number of distinct buckets, not the number of samples.
+Exact count, min, max and sum are tracked alongside the buckets.
+
+    h = LatencyHistogram()
+    h.record_ms(12.5)
+    h.percentile(99)      # -> milliseconds
+    h.summary()           # dict with min/p50/p90/p99/max
+"""
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+class LatencyHistogram:
+    def __init__(self, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    # bucket key packs (shift, mantissa) into one int: values in a bucket share v >> shift
+    def _key(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self.sub_bucket_bits)
+        return (shift << 32) | (value_us >> shift)
+
+    @staticmethod
+    def _bounds(key: int) -> Tuple[int, int]:
+        shift, mantissa = key >> 32, key & 0xFFFFFFFF
+        low = mantissa << shift
+        return low, low + (1 << shift) - 1
+
+    def record_us(self, value_us: int, count: int = 1) -> None:
+        value_us = max(0, int(value_us))
+        key = self._key(value_us)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.count += count
+        self.total_us += value_us * count
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+        if self.max_us is None or value_us > self.max_us:
+            self.max_us = value_us
+
+    def record_ms(self, value_ms: float) -> None:
+        self.record_us(int(round(value_ms * 1000)))
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("cannot merge histograms with different precision")
+        for key, n in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + n
+        self.count += other.count
+        self.total_us += other.total_us
+        for attr, pick in (("min_us", min), ("max_us", max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            if theirs is not None:
+                setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+
+    def percentile_us(self, pct: float) -> Optional[int]:
+        """Return the value at percentile `pct` (0-100), in microseconds."""
+        if not self.count:
+            return None
+        if pct <= 0:
+            return self.min_us
+        if pct >= 100:
+            return self.max_us
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                low, high = self._bounds(key)
+                # midpoint of the bucket, clamped to the exact observed range
+                value = (low + high) // 2
+                return min(max(value, self.min_us), self.max_us)
+        return self.max_us
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the value at percentile `pct` (0-100), in milliseconds."""
+        value = self.percentile_us(pct)
+        return None if value is None else value / 1000.0
+
+    def values_us(self) -> Iterator[Tuple[int, int]]:
+        """Yield `(representative_value_us, count)` per bucket in ascending order."""
+        for key in sorted(self.counts):
+            low, high = self._bounds(key)
+            value = min(max((low + high) // 2, self.min_us), self.max_us)
+            yield value, self.counts[key]
+
+    def summary(self, wall_seconds: Optional[float] = None) -> dict:
+        """Return min/p50/p90/p99/max/mean in ms, plus throughput when `wall_seconds` is given."""
+        if not self.count:
+            return {"count": 0}
+        out = {
+            "count": self.count,
+            "min_ms": self.min_us / 1000.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_us / 1000.0,
+            "mean_ms": round(self.total_us / self.count / 1000.0, 3),
+        }
+        if wall_seconds:
+            out["throughput_rps"] = round(self.count / wall_seconds, 3)
+        return out
+
+    def to_dict(self) -> dict:
+        """Serialise to a JSON-friendly dict (buckets as `[key, count]` pairs)."""
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "buckets": sorted([k, n] for k, n in self.counts.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        h = cls(sub_bucket_bits=data.get("sub_bucket_bits", 7))
+        h.counts = {int(k): int(n) for k, n in data.get("buckets", [])}
+        h.count = data.get("count", sum(h.counts.values()))
+        h.total_us = data.get("total_us", 0)
+        h.min_us = data.get("min_us")
+        h.max_us = data.get("max_us")
+        return h
+
+    @classmethod
+    def from_ms(cls, values_ms: Iterable[float], sub_bucket_bits: int = 7) -> "LatencyHistogram":
+        h = cls(sub_bucket_bits=sub_bucket_bits)
+        for v in values_ms:
+            h.record_ms(v)
+        return h
@@ -1,7 +1,20 @@
+import asyncio
+import functools
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
+
 import requests
 from requests.auth import HTTPBasicAuth
-from requests.adapters import HTTPAdapter
-from urllib3.util import Retry
+
+from .cassette import Cassette, CassetteAdapter
+from .compression import CompressionStats, accept_encoding, measure
+from .coalesce import COALESCED_METHODS, AsyncSingleFlight, CoalesceStats, SingleFlight
+from .http_cache import ResponseCache, prepare_for_key, request_key
+from .metrics import RequestMetrics
+from .pool import PooledHTTPAdapter, PoolStats, prewarm_session
+from .throttle import BudgetRetry, Throttle, ThrottleStats
 
 
 def get_session_with_retries(
@@ -9,13 +22,38 @@ def get_session_with_retries(
     backoff_factor: float = 0.3,
     status_forcelist=(500, 502, 504),
     allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE", "HEAD", "OPTIONS"]),
+    pool_maxsize: int = 10,
+    timing: bool = False,
+    pool_block: bool = False,
+    throttle: Optional[Throttle] = None,
+    cassette: Optional[Cassette] = None,
 ) -> requests.Session:
     """
     Return a requests.Session configured with retry/backoff semantics.
     Use this session for more resilient HTTP calls from tests.
+
+    `pool_maxsize` is the number of keep-alive connections kept per host; raise it
+    when the session is shared by more threads than that. With `pool_block=True`
+    a thread waits for a free connection instead of opening one that is discarded
+    afterwards. The adapter's `stats` (utils.pool.PoolStats) count connections
+    opened, reuse, waits and discards.
+
+    With a `throttle` (utils.throttle.Throttle) requests are rate limited per host,
+    Retry-After is honoured across requests and retries draw on a session-wide
+    retry budget; `throttle.stats` counts throttled requests and denied retries.
+
+    With `timing=True` every response carries `resp.timings`, a per-phase breakdown
+    (DNS, connect, TLS, TTFB, transfer, connection reuse); see utils.timing.
+
+    With a `cassette` (utils.cassette.Cassette) responses are recorded to, or
+    replayed from, a cassette file; in replay mode no socket is opened.
     """
-    session = requests.Session()
-    retry = Retry(
+    if timing:
+        from .timing import TimedHTTPAdapter as adapter_cls, TimedSession as session_cls
+    else:
+        adapter_cls, session_cls = PooledHTTPAdapter, requests.Session
+    session = session_cls()
+    retry = BudgetRetry(
         total=retries,
         read=retries,
         connect=retries,
@@ -23,21 +61,60 @@ def get_session_with_retries(
         status_forcelist=status_forcelist,
         allowed_methods=allowed_methods,
         raise_on_status=False,
+        throttle=throttle,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = adapter_cls(max_retries=retry, pool_maxsize=pool_maxsize, pool_block=pool_block, throttle=throttle)
+    if cassette is not None:
+        adapter = CassetteAdapter(adapter, cassette)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
 
 class APIClient:
-    def __init__(self, base_url: str, timeout: int = 10, verify: bool = True, retries: int = 3):
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 10,
+        verify: bool = True,
+        retries: int = 3,
+        timing: bool = False,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        throttle: Optional[Throttle] = None,
+        metrics: Optional[RequestMetrics] = None,
+        compression: Optional[Sequence[str]] = None,
+        cassette: Optional[Cassette] = None,
+    ):
         self.base_url = base_url.rstrip("/") if base_url else ""
-        # session with retry/backoff
-        self.session = get_session_with_retries(retries=retries)
+        # session with retry/backoff (rate limited and retry-budgeted when a throttle is given;
+        # recorded or replayed when a cassette is given)
+        self.session = get_session_with_retries(
+            retries=retries, timing=timing, pool_maxsize=pool_maxsize, pool_block=pool_block, throttle=throttle,
+            cassette=cassette,
+        )
+        self.cassette = cassette
+        self.throttle = throttle
         self.timeout = timeout
+        # when timing is enabled, the per-phase breakdown of the most recently completed
+        # request. Only meaningful for sequential use: with concurrent requests (threads,
+        # AsyncAPIClient) it belongs to whichever finished last, so read `resp.timings`.
+        self.timing = timing
+        self.last_timing = None
         # controls TLS cert verification (useful for local self-signed certs)
         self.session.verify = verify
+        # opt-in conditional-GET cache (utils.http_cache); None sends every request
+        self.cache = cache
+        # identical concurrent GETs share one request (utils.coalesce)
+        self.singleflight = SingleFlight() if coalesce else None
+        # per-route request metrics and spans (utils.metrics); None records nothing
+        self.metrics = metrics
+        # explicit Accept-Encoding (utils.compression); None keeps requests' default
+        if compression is not None:
+            self.session.headers["Accept-Encoding"] = accept_encoding(compression)
+        self.compression_stats = CompressionStats()
 
     def set_basic_auth(self, username: str, password: str):
         self.session.auth = HTTPBasicAuth(username, password)
@@ -56,11 +133,72 @@ class APIClient:
         for cookie in resp.cookies:
             self.session.cookies.set(cookie.name, cookie.value, path=cookie.path or "/")
 
+    @property
+    def pool_stats(self) -> PoolStats:
+        """Connection pool counters (see utils.pool); `.as_dict()` includes the reuse ratio."""
+        return self.session.get_adapter(self.base_url or "http://").stats
+
+    def prewarm(self, connections: int) -> int:
+        """Open up to `connections` keep-alive connections to base_url ahead of measurement."""
+        return prewarm_session(self.session, f"{self.base_url}/", connections)
+
+    @property
+    def throttle_stats(self) -> Optional[ThrottleStats]:
+        return self.throttle.stats if self.throttle is not None else None
+
+    @property
+    def coalesce_stats(self) -> Optional[CoalesceStats]:
+        return self.singleflight.stats if self.singleflight is not None else None
+
+    def request_key(self, method: str, path: str, **kwargs) -> Optional[tuple]:
+        """Identity of a coalescable request (method, URL, auth headers), or None for other requests."""
+        if method.upper() not in COALESCED_METHODS or kwargs.get("stream"):
+            return None
+        url = f"{self.base_url}/{path.lstrip('/') }"
+        return request_key(prepare_for_key(self.session, method, url, **kwargs))
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        if self.cache is not None:
+            resp = self.cache.fetch(self.session, method, url, **kwargs)
+            if getattr(resp, "from_cache", False):
+                return resp
+        else:
+            resp = self.session.request(method, url, **kwargs)
+        # wire vs decoded body size; a streamed body has not been read yet and is skipped
+        sizes = measure(resp)
+        if sizes is not None:
+            self.compression_stats.add(*sizes)
+        return resp
+
     def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        if self.metrics is None:
+            return self._request(method, path, **kwargs)
+        started_ns = time.time_ns()
+        started = time.perf_counter()
+        req_path = f"/{path.lstrip('/')}"
+        try:
+            resp = self._request(method, path, **kwargs)
+        except Exception as e:
+            self.metrics.record(method, req_path, error=e, started_ns=started_ns, duration_s=time.perf_counter() - started)
+            raise
+        self.metrics.record(
+            method, req_path, response=resp, started_ns=started_ns,
+            duration_s=time.perf_counter() - started, stream=bool(kwargs.get("stream")),
+        )
+        return resp
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
         url = f"{self.base_url}/{path.lstrip('/') }"
         if "timeout" not in kwargs:
             kwargs["timeout"] = self.timeout
-        return self.session.request(method, url, **kwargs)
+        key = self.request_key(method, path, **kwargs) if self.singleflight is not None else None
+        if key is not None:
+            resp = self.singleflight.do(key, lambda: self._send(method, url, **kwargs))
+        else:
+            resp = self._send(method, url, **kwargs)
+        if self.timing:
+            self.last_timing = getattr(resp, "timings", None)
+        return resp
 
     def get(self, path: str, **kwargs) -> requests.Response:
         return self.request("GET", path, **kwargs)
@@ -73,3 +211,132 @@ class APIClient:
 
     def delete(self, path: str, **kwargs) -> requests.Response:
         return self.request("DELETE", path, **kwargs)
+
+
+class AsyncAPIClient:
+    """asyncio counterpart of APIClient, with the same methods as coroutines.
+
+    Requests go through one APIClient (same retry/backoff policy, cookies and auth
+    headers) on a dedicated thread pool, so `asyncio.gather` fans out over up to
+    `concurrency` keep-alive connections. A per-event-loop semaphore caps the number
+    of requests in flight at `concurrency`; the connection pool is sized to match.
+    With `coalesce=True`, identical concurrent GETs await one shared request and
+    do not take a slot of their own. With `timing=True`, read each response's
+    `resp.timings`; `client.last_timing` is whichever request finished last.
+
+        async with AsyncAPIClient(base_url, concurrency=8) as client:
+            responses = await asyncio.gather(*(client.get(f"/api/users/{u}/permissions") for u in ids))
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 10,
+        verify: bool = True,
+        retries: int = 3,
+        timing: bool = False,
+        concurrency: int = 10,
+        cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        throttle: Optional[Throttle] = None,
+        metrics: Optional[RequestMetrics] = None,
+        compression: Optional[Sequence[str]] = None,
+        cassette: Optional[Cassette] = None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.client = APIClient(
+            base_url, timeout=timeout, verify=verify, retries=retries, timing=timing,
+            pool_maxsize=self.concurrency, cache=cache, throttle=throttle, metrics=metrics,
+            compression=compression, cassette=cassette,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="async-api")
+        # asyncio primitives belong to one loop; tests may run several loops in turn
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._flights: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.coalesce_stats = CoalesceStats() if coalesce else None
+
+    @property
+    def base_url(self) -> str:
+        return self.client.base_url
+
+    @property
+    def session(self) -> requests.Session:
+        return self.client.session
+
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self.client.cache
+
+    def set_basic_auth(self, username: str, password: str):
+        self.client.set_basic_auth(username, password)
+
+    def set_bearer_token(self, token: str):
+        self.client.set_bearer_token(token)
+
+    def set_cookie(self, name: str, value: str, path: str = "/"):
+        self.client.set_cookie(name, value, path=path)
+
+    def set_cookies_from_response(self, resp: requests.Response):
+        self.client.set_cookies_from_response(resp)
+
+    @property
+    def pool_stats(self) -> PoolStats:
+        return self.client.pool_stats
+
+    @property
+    def throttle_stats(self) -> Optional[ThrottleStats]:
+        return self.client.throttle_stats
+
+    @property
+    def compression_stats(self) -> CompressionStats:
+        return self.client.compression_stats
+
+    def prewarm(self, connections: int) -> int:
+        return self.client.prewarm(connections)
+
+    def _semaphore(self, loop) -> asyncio.Semaphore:
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return sem
+
+    async def _send(self, loop, method: str, path: str, **kwargs) -> requests.Response:
+        async with self._semaphore(loop):
+            call = functools.partial(self.client.request, method, path, **kwargs)
+            return await loop.run_in_executor(self._executor, call)
+
+    async def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        loop = asyncio.get_running_loop()
+        key = self.client.request_key(method, path, **kwargs) if self.coalesce_stats is not None else None
+        if key is None:
+            return await self._send(loop, method, path, **kwargs)
+        flight = self._flights.get(loop)
+        if flight is None:
+            flight = self._flights[loop] = AsyncSingleFlight(self.coalesce_stats)
+        return await flight.do(key, lambda: self._send(loop, method, path, **kwargs))
+
+    async def get(self, path: str, **kwargs) -> requests.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> requests.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str, **kwargs) -> requests.Response:
+        return await self.request("PUT", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> requests.Response:
+        return await self.request("DELETE", path, **kwargs)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.client.session.close()
+
+    async def aclose(self) -> None:
+        # waiting for in-flight requests must not block the event loop's other tasks
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
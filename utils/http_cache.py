@@ -0,0 +1,266 @@
+"""Opt-in conditional-GET cache for APIClient.
+
+Only GET responses are cached. An entry is keyed by the final URL (query included) and
+the caller's identity: the Authorization, Cookie and Accept headers that would be
+sent. So two users, or the same user before and after login, never share an entry.
+
+- A response is stored when it is a 200 that carries a validator (`ETag` or
+  `Last-Modified`), or when a freshness lifetime applies (`ttl` or `Cache-Control:
+  max-age`). `no-store` and `Vary: *` are never stored.
+- A fresh entry is served without touching the network (a hit).
+- A stale entry is revalidated with `If-None-Match` / `If-Modified-Since`. A 304
+  refreshes it and serves the cached body (revalidated); anything else replaces it
+  (a miss).
+- A POST/PUT/DELETE/PATCH through the client drops the cached entries for the same URL.
+- Entries are evicted least-recently-used beyond `max_entries` (and `max_bytes`
+  of body, when set).
+
+Responses served from the cache are shallow copies with `from_cache = True`.
+"""
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import requests
+
+CACHEABLE_METHODS = frozenset(["GET"])
+INVALIDATING_METHODS = frozenset(["POST", "PUT", "PATCH", "DELETE"])
+# request headers that identify who is asking; part of every cache key
+KEY_HEADERS = ("Authorization", "Cookie", "Accept")
+
+_MAX_AGE = re.compile(r"max-age\s*=\s*(\d+)")
+
+
+def request_key(prepared: requests.PreparedRequest) -> tuple:
+    """Method, final URL and identity headers of a prepared request."""
+    return (prepared.method, prepared.url) + tuple(prepared.headers.get(h) for h in KEY_HEADERS)
+
+
+def prepare_for_key(session: requests.Session, method: str, url: str, **kwargs) -> requests.PreparedRequest:
+    """Prepare `method url` the way `session.request` would (session headers, cookies, auth merged)."""
+    return session.prepare_request(
+        requests.Request(
+            method.upper(), url, params=kwargs.get("params"), headers=kwargs.get("headers"),
+            cookies=kwargs.get("cookies"), auth=kwargs.get("auth"),
+        )
+    )
+
+
+class CacheStats:
+    __slots__ = ("hits", "revalidated", "misses", "stores", "evictions", "invalidations", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def add(self, field: str, amount=1) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        """Share of cacheable lookups answered from the cache (revalidated ones included)."""
+        total = self.hits + self.revalidated + self.misses
+        if not total:
+            return None
+        return (self.hits + self.revalidated) / total
+
+    def as_dict(self) -> dict:
+        ratio = self.hit_ratio
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": None if ratio is None else round(ratio, 4),
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def __repr__(self):
+        return f"CacheStats({self.as_dict()})"
+
+
+class _Entry:
+    __slots__ = ("response", "etag", "last_modified", "expires", "size")
+
+    def __init__(self, response: requests.Response, expires: float):
+        self.response = response
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.expires = expires
+        self.size = len(response.content or b"")
+
+
+def _cache_control(response: requests.Response) -> str:
+    return (response.headers.get("Cache-Control") or "").lower()
+
+
+def _url_base(url: str) -> str:
+    return url.split("?", 1)[0].split("#", 1)[0]
+
+
+class ResponseCache:
+    """Thread-safe LRU of GET responses with ETag/Last-Modified revalidation.
+
+    `ttl` is the number of seconds a stored response is served without revalidation
+    when the server sends no `max-age`. The default of 0 revalidates every time,
+    which is always correct and still saves the body transfer on a 304.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 0.0, max_bytes: Optional[int] = None):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl = float(ttl)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    key = staticmethod(request_key)
+
+    def lookup(self, key: tuple):
+        """Return (entry, fresh) for `key`, or (None, False). Marks the entry recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            self._entries.move_to_end(key)
+            return entry, time.monotonic() < entry.expires
+
+    def conditional_headers(self, entry: _Entry) -> dict:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _lifetime(self, response: requests.Response) -> Optional[float]:
+        """Seconds the response may be served without revalidation; None if it must not be stored."""
+        cc = _cache_control(response)
+        if "no-store" in cc or response.headers.get("Vary", "").strip() == "*":
+            return None
+        if "no-cache" in cc:
+            lifetime = 0.0
+        else:
+            m = _MAX_AGE.search(cc)
+            lifetime = float(m.group(1)) if m else self.ttl
+        if lifetime <= 0 and not (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            # nothing to revalidate with and never fresh: storing it would only cost memory
+            return None
+        return lifetime
+
+    def store(self, key: tuple, response: requests.Response) -> bool:
+        if response.status_code != 200:
+            return False
+        lifetime = self._lifetime(response)
+        if lifetime is None:
+            return False
+        entry = _Entry(response, time.monotonic() + lifetime)
+        if self.max_bytes is not None and entry.size > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+        self.stats.add("stores")
+        return True
+
+    def refresh(self, key: tuple, entry: _Entry, not_modified: requests.Response) -> None:
+        """Apply a 304: update validators/freshness from its headers and keep the body."""
+        for name in ("ETag", "Last-Modified", "Cache-Control", "Date", "Expires"):
+            if name in not_modified.headers:
+                entry.response.headers[name] = not_modified.headers[name]
+        entry.etag = entry.response.headers.get("ETag")
+        entry.last_modified = entry.response.headers.get("Last-Modified")
+        lifetime = self._lifetime(entry.response)
+        with self._lock:
+            if lifetime is None:
+                if self._entries.pop(key, None) is not None:
+                    self._bytes -= entry.size
+                return
+            entry.expires = time.monotonic() + lifetime
+
+    def _evict(self) -> None:
+        # caller holds the lock
+        while self._entries and (
+            len(self._entries) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.stats.add("evictions")
+
+    def invalidate(self, url: str) -> int:
+        """Drop every entry whose URL (ignoring the query string) equals `url`'s."""
+        base = _url_base(url)
+        with self._lock:
+            stale = [k for k in self._entries if _url_base(k[1]) == base]
+            for k in stale:
+                self._bytes -= self._entries.pop(k).size
+        if stale:
+            self.stats.add("invalidations", len(stale))
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @staticmethod
+    def serve(entry: _Entry) -> requests.Response:
+        resp = copy.copy(entry.response)
+        resp.headers = copy.copy(entry.response.headers)
+        resp.from_cache = True
+        return resp
+
+    def fetch(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        """Send `method url` through `session`, answering from/updating the cache where allowed."""
+        method = method.upper()
+        if method in INVALIDATING_METHODS:
+            resp = session.request(method, url, **kwargs)
+            self.invalidate(resp.url or url)
+            return resp
+        if method not in CACHEABLE_METHODS or kwargs.get("stream"):
+            return session.request(method, url, **kwargs)
+
+        key = request_key(prepare_for_key(session, method, url, **kwargs))
+        entry, fresh = self.lookup(key)
+        if entry is not None and fresh:
+            self.stats.add("hits")
+            return self.serve(entry)
+        if entry is not None:
+            headers = dict(kwargs.get("headers") or {})
+            headers.update(self.conditional_headers(entry))
+            kwargs = dict(kwargs, headers=headers)
+        resp = session.request(method, url, **kwargs)
+        if entry is not None and resp.status_code == 304:
+            self.refresh(key, entry, resp)
+            self.stats.add("revalidated")
+            served = self.serve(entry)
+            # keep the timing breakdown of the revalidation round trip
+            if hasattr(resp, "timings"):
+                served.timings = resp.timings
+            return served
+        self.stats.add("misses")
+        self.store(key, resp)
+        return resp
@@ -0,0 +1,144 @@
+"""Incremental parsing of `{"...": ..., "data": [...]}` JSON envelopes.
+
+`StreamingEnvelope` reads a response body chunk by chunk (e.g. from
+`resp.iter_content()`) and yields the elements of the top-level list member one at a
+time, so a list of hundreds of thousands of items is never held in memory at once.
+Every other top-level member is decoded normally and collected in `envelope`.
+
+    parser = StreamingEnvelope(resp.iter_content(65536))
+    for index, item in parser.items():
+        ...
+    parser.envelope   # top-level members except "data"
+    parser.count      # number of items yielded
+
+Only the standard library is used; each value is decoded with
+`json.JSONDecoder.raw_decode` from a buffer holding at most one value plus one chunk.
+"""
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+_WS = " \t\n\r"
+# characters that can continue a number ("1" -> "1.5e-3")
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+
+class StreamingEnvelope:
+    def __init__(self, chunks: Iterable[bytes], list_key: str = "data", encoding: str = "utf-8"):
+        self.list_key = list_key
+        self.envelope: Any = {}
+        self.count = 0
+        # False when the body had no top-level `list_key` array (envelope holds the whole value)
+        self.found_list = False
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    # -- buffer handling ---------------------------------------------------
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping the consumed prefix. False at EOF."""
+        if self._eof:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            text = self._decoder.decode(chunk if isinstance(chunk, bytes) else chunk.encode())
+            if text:
+                self._buf += text
+                return True
+        self._buf += self._decoder.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character without consuming it (None at EOF)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, char: str) -> None:
+        got = self._peek()
+        if got != char:
+            raise ValueError(f"expected {char!r} at offset {self._pos}, got {got!r}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        """Decode one complete JSON value starting at the current position."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number followed by nothing but number characters up to the buffer edge
+            # ("1." or "1e" before the next chunk) may be truncated: read on
+            if (
+                isinstance(value, (int, float))
+                and not self._eof
+                and all(c in _NUMBER_CHARS for c in self._buf[end:])
+                and self._fill()
+            ):
+                continue
+            self._pos = end
+            return value
+
+    # -- public API ----------------------------------------------------------
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        """Yield `(index, item)` for each element of the top-level list member."""
+        if self._peek() != "{":
+            self.envelope = self._value()
+            self._finish()
+            return
+        self._pos += 1
+        envelope = {}
+        first = True
+        while True:
+            nxt = self._peek()
+            if nxt == "}":
+                self._pos += 1
+                break
+            if not first:
+                self._expect(",")
+            first = False
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError(f"object key expected at offset {self._pos}")
+            self._expect(":")
+            if key == self.list_key and self._peek() == "[" and not self.found_list:
+                self.found_list = True
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                    continue
+                while True:
+                    item = self._value()
+                    yield self.count, item
+                    self.count += 1
+                    sep = self._peek()
+                    self._pos += 1
+                    if sep == "]":
+                        break
+                    if sep != ",":
+                        raise ValueError(f"expected ',' or ']' in list, got {sep!r}")
+            else:
+                envelope[key] = self._value()
+        self.envelope = envelope
+        self._finish()
+
+    def _finish(self) -> None:
+        if self._peek() is not None:
+            raise ValueError(f"trailing data at offset {self._pos}")
@@ -0,0 +1,319 @@
+"""Request metrics for APIClient, exportable as Prometheus text and OpenTelemetry JSON spans.
+
+    metrics = RequestMetrics(routes=load_plan().routes, record_spans=True)
+    client = APIClient(base_url, metrics=metrics)
+    ...
+    metrics.write_prometheus("reports/api_client_metrics.prom")
+    metrics.write_spans("reports/api_client_spans.json")
+
+Every request made through `APIClient.request` is recorded under its method and
+route template. Templates come from a RouteTable (the catalog's, typically), so
+`/api/users/phanith.chhim` and `/api/users/roby.va` share `/api/users/{id}`. Paths
+not in the table fall back to their path with id-like segments (containing a digit,
+`.` or `@`, as user ids and emails do) replaced by `{id}`. Per series:
+
+- requests by status class (`2xx`...`5xx`, or `error` when no response arrived)
+- latency histogram (utils.histogram; exported as Prometheus buckets)
+- request and response body bytes
+- retries performed by the session's Retry policy
+
+With `record_spans=True` each request is also kept as an OTLP/JSON client span (up to
+`max_spans`; later ones are counted as dropped). A client without `metrics` pays
+only for a single `is None` check per request.
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .histogram import LatencyHistogram
+from .routes import split_path
+
+# Prometheus histogram bucket bounds, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_MAX_SPANS = 10000
+METRIC_PREFIX = "api_client"
+# route lookups are memoised per (method, path); the memo is reset when it grows past this
+_ROUTE_MEMO_LIMIT = 4096
+
+_ID_SEGMENT = re.compile(r"[\d.@]")
+# OTLP SpanKind.SPAN_KIND_CLIENT / StatusCode values
+_SPAN_KIND_CLIENT = 3
+_STATUS_OK, _STATUS_ERROR = 1, 2
+
+
+def fallback_template(path: str) -> str:
+    """Route template for a path no route table knows: id-like segments become `{id}`."""
+    return "/" + "/".join("{id}" if _ID_SEGMENT.search(seg) else seg for seg in split_path(path))
+
+
+def status_class(status: Optional[int]) -> str:
+    return f"{status // 100}xx" if status else "error"
+
+
+def _body_len(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return 0  # generators / file objects: size unknown up front
+
+
+def _retries(response) -> int:
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    return len(getattr(retries, "history", None) or ())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_atomic(path: str, text: str) -> None:
+    # textfile collectors may read at any moment: never expose a half-written file
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class _Series:
+    __slots__ = ("statuses", "latency", "request_bytes", "response_bytes", "retries")
+
+    def __init__(self):
+        self.statuses: Dict[str, int] = {}
+        self.latency = LatencyHistogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": sum(self.statuses.values()),
+            "status": dict(sorted(self.statuses.items())),
+            "latency": self.latency.summary(),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "retries": self.retries,
+        }
+
+
+class RequestMetrics:
+    def __init__(
+        self,
+        routes=None,
+        record_spans: bool = False,
+        max_spans: int = DEFAULT_MAX_SPANS,
+        buckets=DEFAULT_BUCKETS,
+        service_name: str = "api-tests",
+    ):
+        self.routes = routes
+        self.record_spans = record_spans
+        self.max_spans = max_spans
+        self.buckets = tuple(sorted(buckets))
+        self.service_name = service_name
+        self.spans: List[dict] = []
+        self.dropped_spans = 0
+        self._series: Dict[tuple, _Series] = {}
+        self._route_memo: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def route_for(self, method: str, path: str) -> str:
+        key = (method, path)
+        template = self._route_memo.get(key)
+        if template is None:
+            match = self.routes.lookup(method, path) if self.routes is not None else None
+            template = match.template if match is not None else fallback_template(path)
+            if len(self._route_memo) >= _ROUTE_MEMO_LIMIT:
+                self._route_memo.clear()
+            self._route_memo[key] = template
+        return template
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        response=None,
+        error: Optional[BaseException] = None,
+        started_ns: Optional[int] = None,
+        duration_s: float = 0.0,
+        stream: bool = False,
+    ) -> None:
+        """Record one request. `path` is the request path (query string allowed)."""
+        method = method.upper()
+        route = self.route_for(method, path.split("?", 1)[0])
+        status = response.status_code if response is not None else None
+        request_bytes = _body_len(getattr(getattr(response, "request", None), "body", None))
+        if response is None:
+            response_bytes = 0
+        elif stream:
+            # the body has not been read: trust the declared length, if any
+            response_bytes = int(response.headers.get("Content-Length") or 0)
+        else:
+            response_bytes = len(response.content or b"")
+        retries = _retries(response)
+        cls = status_class(status)
+        with self._lock:
+            series = self._series.get((method, route))
+            if series is None:
+                series = self._series[(method, route)] = _Series()
+            series.statuses[cls] = series.statuses.get(cls, 0) + 1
+            series.latency.record_us(int(duration_s * 1e6))
+            series.request_bytes += request_bytes
+            series.response_bytes += response_bytes
+            series.retries += retries
+            if self.record_spans:
+                if len(self.spans) < self.max_spans:
+                    self.spans.append(self._span(
+                        method, route, response, error, started_ns, duration_s, request_bytes, response_bytes, retries
+                    ))
+                else:
+                    self.dropped_spans += 1
+
+    def _span(self, method, route, response, error, started_ns, duration_s, request_bytes, response_bytes, retries):
+        start = started_ns if started_ns is not None else time.time_ns() - int(duration_s * 1e9)
+        attributes = {
+            "http.request.method": method,
+            "http.route": route,
+            "http.request.body.size": request_bytes,
+            "http.response.body.size": response_bytes,
+            "http.request.resend_count": retries,
+        }
+        if response is not None:
+            attributes["url.full"] = response.url
+            attributes["http.response.status_code"] = response.status_code
+        if error is not None:
+            attributes["error.type"] = type(error).__name__
+        failed = error is not None or (response is not None and response.status_code >= 500)
+        return {
+            "traceId": os.urandom(16).hex(),
+            "spanId": os.urandom(8).hex(),
+            "name": f"{method} {route}",
+            "kind": _SPAN_KIND_CLIENT,
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(start + int(duration_s * 1e9)),
+            "attributes": [_otlp_attribute(k, v) for k, v in attributes.items()],
+            "status": {"code": _STATUS_ERROR if failed else _STATUS_OK},
+        }
+
+    def snapshot(self) -> dict:
+        """Per-series totals keyed by "METHOD route"."""
+        with self._lock:
+            return {f"{m} {r}": s.as_dict() for (m, r), s in sorted(self._series.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self.spans = []
+            self.dropped_spans = 0
+
+    def prometheus_text(self) -> str:
+        """Render every series in the Prometheus text exposition format (0.0.4)."""
+        p = METRIC_PREFIX
+        lines = {
+            "requests": [
+                f"# HELP {p}_requests_total Requests sent through APIClient.",
+                f"# TYPE {p}_requests_total counter",
+            ],
+            "duration": [
+                f"# HELP {p}_request_duration_seconds Request latency, including retries.",
+                f"# TYPE {p}_request_duration_seconds histogram",
+            ],
+            "request_bytes": [
+                f"# HELP {p}_request_bytes_total Request body bytes sent.",
+                f"# TYPE {p}_request_bytes_total counter",
+            ],
+            "response_bytes": [
+                f"# HELP {p}_response_bytes_total Response body bytes received.",
+                f"# TYPE {p}_response_bytes_total counter",
+            ],
+            "retries": [
+                f"# HELP {p}_retries_total Retries performed by the retry policy.",
+                f"# TYPE {p}_retries_total counter",
+            ],
+        }
+        with self._lock:
+            for (method, route), s in sorted(self._series.items()):
+                labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+                for cls, n in sorted(s.statuses.items()):
+                    lines["requests"].append(f'{p}_requests_total{{{labels},status_class="{cls}"}} {n}')
+                cumulative = 0
+                values = list(s.latency.values_us())
+                i = 0
+                for bound in self.buckets:
+                    while i < len(values) and values[i][0] <= bound * 1e6:
+                        cumulative += values[i][1]
+                        i += 1
+                    lines["duration"].append(f'{p}_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines["duration"].append(f'{p}_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s.latency.count}')
+                lines["duration"].append(f"{p}_request_duration_seconds_sum{{{labels}}} {s.latency.total_us / 1e6:.6f}")
+                lines["duration"].append(f"{p}_request_duration_seconds_count{{{labels}}} {s.latency.count}")
+                lines["request_bytes"].append(f"{p}_request_bytes_total{{{labels}}} {s.request_bytes}")
+                lines["response_bytes"].append(f"{p}_response_bytes_total{{{labels}}} {s.response_bytes}")
+                lines["retries"].append(f"{p}_retries_total{{{labels}}} {s.retries}")
+        return "\n".join(line for block in lines.values() for line in block) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write prometheus_text() to `path` (atomically, for the node_exporter textfile collector)."""
+        _write_atomic(path, self.prometheus_text())
+
+    def otlp_json(self) -> dict:
+        """Recorded spans as an OTLP/JSON `ExportTraceServiceRequest`."""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "utils.metrics"}, "spans": spans}],
+            }]
+        }
+
+    def write_spans(self, path: str) -> None:
+        _write_atomic(path, json.dumps(self.otlp_json()))
+
+
+def merge_prometheus(texts) -> str:
+    """Sum the series of several prometheus_text() outputs (e.g. one per test worker).
+
+    Counters and histogram buckets/sums/counts are all additive, so equal series
+    lines are added; HELP/TYPE lines are kept once, in first-seen order.
+    """
+    families: Dict[str, dict] = {}
+    for text in texts:
+        family = None
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            if line.startswith("# "):
+                family = families.setdefault(line.split()[2], {"meta": [], "samples": {}})
+                if line not in family["meta"]:
+                    family["meta"].append(line)
+                continue
+            series, _, value = line.rpartition(" ")
+            if family is None:
+                family = families.setdefault(series.split("{", 1)[0], {"meta": [], "samples": {}})
+            family["samples"][series] = family["samples"].get(series, 0.0) + float(value)
+    lines = []
+    for family in families.values():
+        lines.extend(family["meta"])
+        for series, value in family["samples"].items():
+            lines.append(f"{series} {int(value) if value.is_integer() else f'{value:.6f}'}")
+    return "\n".join(lines) + "\n"
+
+
+def merge_otlp(documents) -> dict:
+    """Concatenate several otlp_json() documents into one export request."""
+    return {"resourceSpans": [rs for doc in documents for rs in doc.get("resourceSpans", [])]}
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {"key": key, "value": {"intValue": str(value)}}
+    return {"key": key, "value": {"stringValue": str(value)}}
@@ -0,0 +1,194 @@
+"""Connection pool statistics and pre-warming for requests sessions.
+
+`get_session_with_retries` mounts a `PooledHTTPAdapter`, whose urllib3 pools count:
+
+- `connections_opened`  new connections created while serving requests
+- `prewarmed`           connections opened ahead of time by `prewarm_session`
+- `requests`            requests sent over a pooled connection (retries included)
+- `reuse_ratio`         share of requests that did not need a new connection
+- `waits` / `wait_ms`   checkouts that blocked on a full pool (`pool_block=True`)
+- `discarded`           connections dropped because the pool was full (`pool_block=False`):
+                        each one is a wasted TCP/TLS handshake, so raise `pool_maxsize`
+
+`prewarm_session(session, url, n)` opens `n` keep-alive connections to a host and
+parks them in the pool, so the first measured requests do not pay for connect/TLS.
+
+An adapter built with a `utils.throttle.Throttle` waits for the host's rate limit
+before each request and notes Retry-After on the responses. The time spent waiting is
+kept out of the request itself (and out of `resp.timings`) and exposed as
+`resp.throttle_wait_ms`.
+"""
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import PoolManager
+from urllib3.response import HTTPResponse
+from urllib3.util import parse_url
+
+from .compression import WireCountingHTTPResponse
+
+
+class PoolStats:
+    __slots__ = ("connections_opened", "prewarmed", "requests", "waits", "wait_ms", "discarded", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.connections_opened = 0
+        self.prewarmed = 0
+        self.requests = 0
+        self.waits = 0
+        self.wait_ms = 0.0
+        self.discarded = 0
+
+    def add(self, field: str, amount=1) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    @property
+    def reuse_ratio(self) -> Optional[float]:
+        if not self.requests:
+            return None
+        return max(0.0, 1.0 - self.connections_opened / self.requests)
+
+    def as_dict(self) -> dict:
+        ratio = self.reuse_ratio
+        return {
+            "connections_opened": self.connections_opened,
+            "prewarmed": self.prewarmed,
+            "requests": self.requests,
+            "reuse_ratio": None if ratio is None else round(ratio, 4),
+            "waits": self.waits,
+            "wait_ms": round(self.wait_ms, 3),
+            "discarded": self.discarded,
+        }
+
+    def __repr__(self):
+        return f"PoolStats({self.as_dict()})"
+
+
+class _StatsPoolMixin:
+    # set by _StatsPoolManager on every pool it creates
+    stats: Optional[PoolStats] = None
+    _prewarming = False
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        if self.stats is not None:
+            self.stats.add("prewarmed" if self._prewarming else "connections_opened")
+        return conn
+
+    def _get_conn(self, timeout=None):
+        # every slot checked out: a blocking pool waits, a non-blocking one opens an extra connection
+        must_wait = self.stats is not None and self.block and self.pool is not None and self.pool.empty()
+        started = time.perf_counter()
+        conn = super()._get_conn(timeout)
+        if must_wait:
+            self.stats.add("waits")
+            self.stats.add("wait_ms", (time.perf_counter() - started) * 1000.0)
+        return conn
+
+    def _put_conn(self, conn):
+        if self.stats is not None and conn is not None and self.pool is not None and self.pool.full():
+            self.stats.add("discarded")
+        super()._put_conn(conn)
+
+    def _make_request(self, *args, **kwargs):
+        if self.stats is not None:
+            self.stats.add("requests")
+        response = super()._make_request(*args, **kwargs)
+        # let resp.raw.tell() count chunked bodies as well (wire bytes, see utils.compression)
+        if type(response) is HTTPResponse:
+            response.__class__ = WireCountingHTTPResponse
+        return response
+
+
+class StatsHTTPConnectionPool(_StatsPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class StatsHTTPSConnectionPool(_StatsPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _StatsPoolManager(PoolManager):
+    def __init__(self, *args, stats: Optional[PoolStats] = None, **kwargs):
+        self.stats = stats
+        super().__init__(*args, **kwargs)
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.stats = self.stats
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools record `PoolStats` in `self.stats`, optionally throttled."""
+
+    pool_classes = {"http": StatsHTTPConnectionPool, "https": StatsHTTPSConnectionPool}
+
+    def __init__(self, *args, throttle=None, **kwargs):
+        self.stats = PoolStats()
+        self.throttle = throttle
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if self.throttle is None:
+            return self.send_unthrottled(request, **kwargs)
+        waited = self.throttle.before_send(request.url)
+        resp = self.send_unthrottled(request, **kwargs)
+        resp.throttle_wait_ms = waited * 1000.0
+        u = parse_url(request.url)
+        self.throttle.observe(u.scheme, u.host, u.port, resp.raw)
+        return resp
+
+    def send_unthrottled(self, request, **kwargs):
+        """The actual send; subclasses that measure requests override this rather than `send`."""
+        return super().send(request, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _StatsPoolManager(
+            num_pools=connections, maxsize=maxsize, block=block, stats=self.stats, **pool_kwargs
+        )
+        self.poolmanager.pool_classes_by_scheme = dict(self.pool_classes)
+
+
+def prewarm_session(session, url: str, connections: int) -> int:
+    """Open up to `connections` keep-alive connections to `url`'s host and park them in the pool.
+
+    Capped at the adapter's pool size (extra connections would be discarded).
+    Returns the number of connections opened. Not meant to run concurrently with
+    requests on the same session.
+    """
+    adapter = session.get_adapter(url)
+    if connections <= 0 or not isinstance(adapter, HTTPAdapter):
+        return 0
+    # resolve the pool the way Session.request will: verify/cert merged with the environment
+    # (e.g. REQUESTS_CA_BUNDLE) are part of the pool key
+    settings = session.merge_environment_settings(url, {}, None, session.verify, session.cert)
+    request = requests.Request("GET", url).prepare()
+    pool = adapter.get_connection_with_tls_context(request, settings["verify"], cert=settings["cert"])
+    held = []
+    opened = 0
+    pool._prewarming = True
+    try:
+        for _ in range(min(connections, adapter._pool_maxsize)):
+            conn = pool._get_conn()
+            held.append(conn)
+            if conn.sock is None:
+                conn.connect()
+                opened += 1
+    finally:
+        pool._prewarming = False
+        for conn in held:
+            pool._put_conn(conn)
+    return opened
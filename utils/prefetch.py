@@ -0,0 +1,76 @@
+"""Read-only resources fetched once for the whole test session.
+
+Tests that only GET a listing to find an id to work with declare it instead of
+requesting it themselves:
+
+    @pytest.mark.prefetch("/api/users")
+    def test_get_user_by_id(auth_api_client, prefetched):
+        resp = prefetched["/api/users"]
+
+At collection time conftest.py gathers the paths the selected tests declare; the
+`prefetched` fixture GETs all of them concurrently, once, before the first test
+runs, and every test gets the same response. A path nobody declared is fetched on
+first use and kept as well. A request that failed (connection refused, cassette
+miss...) raises the same exception in every test that asks for it; any other error
+is a bug and propagates.
+
+Only use this for GETs the tests do not change: the responses are shared and never
+refreshed.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+
+import requests
+
+
+class Prefetch:
+    def __init__(self, client, paths: Iterable[str] = ()):
+        self.client = client
+        self.paths = sorted(set(paths))
+        self._results: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.seconds = 0.0
+
+    def _get(self, path: str):
+        try:
+            return self.client.get(path)
+        except requests.RequestException as exc:  # kept and re-raised in every test that asks for it
+            return exc
+
+    def fetch_all(self, concurrency: int = 10) -> None:
+        """GET every declared path not fetched yet, up to `concurrency` at a time."""
+        with self._lock:
+            todo = [p for p in self.paths if p not in self._results]
+        if not todo:
+            return
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(todo))), thread_name_prefix="prefetch") as pool:
+            results = dict(zip(todo, pool.map(self._get, todo)))
+        with self._lock:
+            self._results.update(results)
+            self.requests += len(results)
+            self.seconds += time.perf_counter() - started
+
+    def get(self, path: str) -> requests.Response:
+        with self._lock:
+            result = self._results.get(path)
+        if result is None:
+            result = self._get(path)
+            with self._lock:
+                # another thread may have fetched it meanwhile; keep the first
+                result = self._results.setdefault(path, result)
+                self.requests += 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    __getitem__ = get
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._results
+
+    def as_dict(self) -> dict:
+        return {"paths": len(self.paths), "requests": self.requests, "seconds": round(self.seconds, 3)}
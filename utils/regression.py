@@ -0,0 +1,120 @@
+"""Statistical latency regression check between two sampled runs.
+
+`compare_latency(baseline, current)` takes the LatencyHistograms of one endpoint
+from a baseline run and from the current run and decides whether the current run
+is slower. It uses a one-sided Mann-Whitney U test (no normality assumption;
+latency distributions are skewed and multi-modal) and, to ignore statistically
+significant but irrelevant shifts, also requires the median to have grown by at
+least `min_slowdown` (0.10 = 10%).
+
+Both histograms share the same bucket layout, so the test ranks buckets: samples
+in the same bucket (values within ~1% of each other) count as ties, which the
+variance corrects for. Uses only the standard library.
+"""
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+from .histogram import LatencyHistogram
+
+DEFAULT_ALPHA = 0.01
+DEFAULT_MIN_SLOWDOWN = 0.10
+# below this many samples on either side the test has no useful power
+MIN_SAMPLES = 8
+
+
+def mann_whitney_greater(baseline: LatencyHistogram, current: LatencyHistogram) -> Tuple[float, float]:
+    """Return `(U, p)` for the one-sided hypothesis that `current` is stochastically larger.
+
+    U counts (baseline, current) pairs where the current sample is larger, ties
+    counting one half. The p-value uses the normal approximation with tie and
+    continuity corrections.
+    """
+    if baseline.sub_bucket_bits != current.sub_bucket_bits:
+        raise ValueError("histograms must use the same sub_bucket_bits")
+    n_b, n_c = baseline.count, current.count
+    n = n_b + n_c
+    rank_sum_c = 0.0
+    tie_term = 0
+    rank = 0
+    for key in sorted(set(baseline.counts) | set(current.counts)):
+        c_b, c_c = baseline.counts.get(key, 0), current.counts.get(key, 0)
+        t = c_b + c_c
+        # every sample in a tied group gets the average of the ranks it spans
+        rank_sum_c += c_c * (rank + (t + 1) / 2.0)
+        tie_term += t ** 3 - t
+        rank += t
+    u = rank_sum_c - n_c * (n_c + 1) / 2.0
+    mean = n_b * n_c / 2.0
+    var = n_b * n_c / 12.0 * ((n + 1) - tie_term / (n * (n - 1)))
+    if var <= 0:
+        return u, 1.0  # every sample tied: no evidence either way
+    z = (u - mean - 0.5) / math.sqrt(var)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare_latency(
+    baseline: LatencyHistogram,
+    current: LatencyHistogram,
+    alpha: float = DEFAULT_ALPHA,
+    min_slowdown: float = DEFAULT_MIN_SLOWDOWN,
+) -> dict:
+    """Compare one endpoint's latency samples against its baseline.
+
+    `status` is "regression" (significant at `alpha` and median slower by at least
+    `min_slowdown`), "ok", or "insufficient_samples". Also returns the p-value, both
+    medians, their ratio and Cliff's delta (-1..1; positive means slower). A
+    baseline median of 0 (under the histogram's 1us resolution) has no ratio:
+    `median_ratio` is None and any measurable growth of the median counts.
+    """
+    out = {
+        "baseline_count": baseline.count,
+        "current_count": current.count,
+        "alpha": alpha,
+        "min_slowdown": min_slowdown,
+    }
+    if baseline.count < MIN_SAMPLES or current.count < MIN_SAMPLES:
+        out["status"] = "insufficient_samples"
+        return out
+    u, p = mann_whitney_greater(baseline, current)
+    base_p50, cur_p50 = baseline.percentile(50), current.percentile(50)
+    if base_p50:
+        ratio = cur_p50 / base_p50
+        slower = ratio >= 1.0 + min_slowdown
+    else:
+        ratio, slower = None, cur_p50 > base_p50
+    out.update({
+        "baseline_p50_ms": base_p50,
+        "current_p50_ms": cur_p50,
+        "median_ratio": None if ratio is None else round(ratio, 4),
+        "p_value": p,
+        "cliffs_delta": round(2.0 * u / (baseline.count * current.count) - 1.0, 4),
+    })
+    out["status"] = "regression" if p < alpha and slower else "ok"
+    return out
+
+
+def histograms_by_endpoint(entries: Iterable[dict]) -> Dict[Tuple[str, str], LatencyHistogram]:
+    """Map `(method, path)` to the sampled histogram of each report entry that has one."""
+    out = {}
+    for entry in entries:
+        hist = (entry.get("latency") or {}).get("histogram")
+        if hist and entry.get("method") and entry.get("path"):
+            out[(entry["method"], entry["path"])] = LatencyHistogram.from_dict(hist)
+    return out
+
+
+def format_comparison(result: dict) -> Optional[str]:
+    if result.get("status") == "insufficient_samples":
+        return f"insufficient samples (baseline {result['baseline_count']}, current {result['current_count']})"
+    if "median_ratio" not in result:
+        return None
+    ratio = result["median_ratio"]
+    if ratio is None:
+        change = f"{result['current_p50_ms'] - result['baseline_p50_ms']:+.3f} ms"
+    else:
+        change = f"{(ratio - 1) * 100:+.0f}%"
+    return (
+        f"p50 {result['baseline_p50_ms']:.1f} -> {result['current_p50_ms']:.1f} ms "
+        f"({change}), p={result['p_value']:.2g}, "
+        f"delta={result['cliffs_delta']:+.2f}"
+    )
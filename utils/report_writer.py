@@ -0,0 +1,111 @@
+"""Incremental report writers used by scripts/check_endpoints.py.
+
+Both writers put each result on disk as soon as it is produced, so memory does not
+grow with the size of a run and a crash mid-run keeps everything written so far.
+
+- `NDJSONReportWriter` appends one JSON record per line and flushes after each one.
+- `JUnitStreamWriter` writes `<testcase>` elements one at a time. The `<testsuite>`
+  open tag reserves space for the `tests`/`failures` counts, which are filled in
+  when the writer is closed.
+"""
+import json
+import xml.etree.ElementTree as ET
+from typing import Optional
+from xml.sax.saxutils import quoteattr
+
+
+class NDJSONReportWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        self._f.write(json.dumps(record, default=str, separators=(",", ":")) + "\n")
+        self._f.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JUnitStreamWriter:
+    # room left in the <testsuite> tag for the counts written on close
+    _RESERVED = 64
+
+    def __init__(self, path: str, suite_name: str):
+        self.path = path
+        self.tests = 0
+        self.failures = 0
+        self._f = open(path, "wb")
+        self._f.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+        self._f.write(f"<testsuite name={quoteattr(suite_name)}".encode("utf-8"))
+        self._counts_offset = self._f.tell()
+        self._f.write(b" " * self._RESERVED + b">\n")
+        self._f.flush()
+
+    def add_testcase(self, testcase: ET.Element) -> None:
+        """Append one `<testcase>` element and update the suite counters."""
+        self.tests += 1
+        if testcase.find("failure") is not None or testcase.find("error") is not None:
+            self.failures += 1
+        self._f.write(ET.tostring(testcase) + b"\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.write(b"</testsuite>\n")
+        counts = f' tests="{self.tests}" failures="{self.failures}"'.encode("utf-8")
+        self._f.seek(self._counts_offset)
+        self._f.write(counts.ljust(self._RESERVED))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_ndjson(path: str, record_type: Optional[str] = None):
+    """Yield records from an NDJSON report, optionally only those of `record_type`."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record_type is None or record.get("type") == record_type:
+                yield record
+
+
+def merge_junit(paths, out_path: str) -> dict:
+    """Combine JUnit files (one per test worker) into one `<testsuites>` document.
+
+    Every `<testsuite>` is kept as is; the root carries the summed counts and the
+    longest suite time (workers run side by side). Returns those totals.
+    """
+    root = ET.Element("testsuites")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    wall = 0.0
+    for path in paths:
+        doc = ET.parse(path).getroot()
+        suites = [doc] if doc.tag == "testsuite" else doc.findall("testsuite")
+        for suite in suites:
+            for key in totals:
+                totals[key] += int(suite.get(key) or 0)
+            wall = max(wall, float(suite.get("time") or 0))
+            root.append(suite)
+    for key, value in totals.items():
+        root.set(key, str(value))
+    root.set("time", f"{wall:.3f}")
+    ET.ElementTree(root).write(out_path, encoding="utf-8", xml_declaration=True)
+    return dict(totals, time=round(wall, 3))
@@ -0,0 +1,244 @@
+"""SQLite store for check_endpoints run history.
+
+Every run of scripts/check_endpoints.py is appended to `reports/results.sqlite`
+(one `runs` row plus one `results` row per endpoint), so questions like "latest
+run", "last N runs of GET /api/users" or "p99 trend for an endpoint" are indexed
+queries instead of globbing and re-parsing every timestamped report file.
+
+Older per-run report files can be imported and removed with `compact()`.
+Uses only the standard library.
+"""
+import datetime
+import glob
+import json
+import os
+import re
+import sqlite3
+from typing import Iterable, List, Optional
+
+DEFAULT_PATH = os.path.join("reports", "results.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    base_url TEXT,
+    source TEXT UNIQUE,
+    success INTEGER,
+    failure INTEGER,
+    finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    ok INTEGER,
+    status_code INTEGER,
+    schema_valid INTEGER,
+    latency_count INTEGER,
+    min_ms REAL,
+    p50_ms REAL,
+    p90_ms REAL,
+    p99_ms REAL,
+    max_ms REAL,
+    throughput_rps REAL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (run_id, seq)
+);
+CREATE INDEX IF NOT EXISTS results_endpoint ON results (method, path, run_id);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+"""
+
+_STAMP_RE = re.compile(r"(\d{8}T\d{6}Z)")
+
+
+def _bool(value) -> Optional[int]:
+    return None if value is None else int(bool(value))
+
+
+def _started_from_filename(path: str) -> str:
+    m = _STAMP_RE.search(os.path.basename(path))
+    if not m:
+        return datetime.datetime.utcfromtimestamp(os.path.getmtime(path)).isoformat() + "Z"
+    return datetime.datetime.strptime(m.group(1), "%Y%m%dT%H%M%SZ").isoformat() + "Z"
+
+
+def read_report(path: str) -> dict:
+    """Read a per-run report file (legacy .json or streamed .ndjson) into the `_run_dict` shape."""
+    started = _started_from_filename(path)
+    base_url = None
+    summary = {}
+    entries: Iterable[dict]
+    if path.endswith(".ndjson"):
+        from .report_writer import read_ndjson
+
+        records = list(read_ndjson(path))
+        for rec in records:
+            if rec.get("type") == "run":
+                base_url = rec.get("base_url")
+                started = rec.get("started") or started
+            elif rec.get("type") == "summary":
+                summary = rec
+        entries = [{k: v for k, v in rec.items() if k != "type"} for rec in records if rec.get("type") == "result"]
+    else:
+        with open(path) as f:
+            report = json.load(f)
+        base_url = report.get("base_url")
+        summary = report.get("summary") or {}
+        entries = report.get("results") or []
+    return {"started": started, "base_url": base_url, "source": os.path.basename(path), "summary": summary, "results": entries}
+
+
+class ResultsStore:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- writing -----------------------------------------------------------
+
+    def begin_run(self, started: str, base_url: Optional[str] = None, source: Optional[str] = None) -> int:
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (started, base_url, source) VALUES (?, ?, ?)", (started, base_url, source)
+            )
+        return cur.lastrowid
+
+    def add_result(self, run_id: int, seq: int, entry: dict) -> None:
+        """Append one report entry; committed immediately so a crashed run keeps its results."""
+        latency = entry.get("latency") or {}
+        schema = entry.get("schema") or {}
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (run_id, seq, method, path, ok, status_code, schema_valid,"
+                " latency_count, min_ms, p50_ms, p90_ms, p99_ms, max_ms, throughput_rps, record)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id, seq, entry.get("method"), entry.get("path"), _bool(entry.get("ok")),
+                    entry.get("status_code"), _bool(schema.get("valid")), latency.get("count"),
+                    latency.get("min_ms"), latency.get("p50_ms"), latency.get("p90_ms"),
+                    latency.get("p99_ms"), latency.get("max_ms"), latency.get("throughput_rps"),
+                    json.dumps(entry, default=str, separators=(",", ":")),
+                ),
+            )
+
+    def finish_run(self, run_id: int, summary: dict) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET success = ?, failure = ?, finished = 1 WHERE id = ?",
+                (summary.get("success"), summary.get("failure"), run_id),
+            )
+
+    # -- queries -----------------------------------------------------------
+
+    def latest_run(self, finished_only: bool = False) -> Optional[dict]:
+        """Return the most recent run with its results, in report order."""
+        where = " WHERE finished = 1" if finished_only else ""
+        row = self.conn.execute(f"SELECT * FROM runs{where} ORDER BY started DESC, id DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return self._run_dict(row)
+
+    def get_run(self, run_id: int) -> Optional[dict]:
+        row = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return None if row is None else self._run_dict(row)
+
+    def _run_dict(self, row: sqlite3.Row) -> dict:
+        results = [
+            json.loads(r["record"])
+            for r in self.conn.execute("SELECT record FROM results WHERE run_id = ? ORDER BY seq", (row["id"],))
+        ]
+        return {
+            "run_id": row["id"],
+            "started": row["started"],
+            "base_url": row["base_url"],
+            "source": row["source"],
+            "finished": bool(row["finished"]),
+            "summary": {"success": row["success"], "failure": row["failure"]},
+            "results": results,
+        }
+
+    def endpoint_history(self, method: str, path: str, limit: int = 10) -> List[dict]:
+        """Return the last `limit` results for one endpoint, newest first."""
+        rows = self.conn.execute(
+            "SELECT runs.started, results.* FROM results JOIN runs ON runs.id = results.run_id"
+            " WHERE results.method = ? AND results.path = ?"
+            " ORDER BY runs.started DESC, runs.id DESC LIMIT ?",
+            (method.upper(), path, limit),
+        ).fetchall()
+        out = []
+        for r in rows:
+            item = {k: r[k] for k in r.keys() if k != "record"}
+            item["ok"] = None if r["ok"] is None else bool(r["ok"])
+            item["schema_valid"] = None if r["schema_valid"] is None else bool(r["schema_valid"])
+            out.append(item)
+        return out
+
+    def latency_trend(self, method: str, path: str, limit: int = 20) -> List[dict]:
+        """Return `started`, sample count and percentiles for runs that sampled the endpoint, oldest first."""
+        rows = self.conn.execute(
+            "SELECT runs.started, results.latency_count, results.p50_ms, results.p90_ms, results.p99_ms"
+            " FROM results JOIN runs ON runs.id = results.run_id"
+            " WHERE results.method = ? AND results.path = ? AND results.latency_count > 0"
+            " ORDER BY runs.started DESC, runs.id DESC LIMIT ?",
+            (method.upper(), path, limit),
+        ).fetchall()
+        return [dict(r) for r in reversed(rows)]
+
+    # -- importing and compaction -------------------------------------------
+
+    def has_source(self, source: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM runs WHERE source = ?", (source,)).fetchone() is not None
+
+    def import_report(self, path: str) -> Optional[int]:
+        """Import a per-run report file (legacy .json or streamed .ndjson). Returns the run id."""
+        source = os.path.basename(path)
+        if self.has_source(source):
+            return None
+        report = read_report(path)
+        run_id = self.begin_run(report["started"], report["base_url"], source=source)
+        for seq, entry in enumerate(report["results"]):
+            self.add_result(run_id, seq, entry)
+        self.finish_run(run_id, report["summary"])
+        return run_id
+
+    def compact(self, reports_dir: str = "reports", keep: int = 1, delete: bool = True) -> dict:
+        """Import every per-run check_endpoints report, then delete all but the newest `keep`.
+
+        Matching JUnit files are removed with their JSON/NDJSON report. Returns counts of
+        imported and deleted files.
+        """
+        files = glob.glob(os.path.join(reports_dir, "check_endpoints_*.json"))
+        files += glob.glob(os.path.join(reports_dir, "check_endpoints_*.ndjson"))
+        files.sort(key=lambda f: os.path.splitext(os.path.basename(f))[0])
+        imported = 0
+        for path in files:
+            if self.import_report(path) is not None:
+                imported += 1
+        deleted = 0
+        if delete:
+            old = files[:-keep] if keep > 0 else files
+            for path in old:
+                stem = os.path.splitext(os.path.basename(path))[0]
+                junit = os.path.join(reports_dir, stem.replace("check_endpoints_", "check_endpoints_junit_", 1) + ".xml")
+                for victim in (path, junit):
+                    if os.path.exists(victim):
+                        os.remove(victim)
+                        deleted += 1
+        return {"imported": imported, "deleted": deleted}
@@ -0,0 +1,118 @@
+"""Route table mapping (METHOD, path template) to per-route settings.
+
+Templates use `{name}` placeholders for single path segments, e.g.
+`/api/users/{id}/permissions`. Routes are stored in a segment trie per HTTP method,
+so a lookup costs one dict probe per path segment regardless of how many routes are
+registered. Literal segments win over placeholders (`/api/users/me` beats
+`/api/users/{id}`). Placeholder names belong to each route, so `/api/users/{id}`
+and `/api/users/{uid}/roles` can share the trie; only one template registered
+twice with different names (`/api/users/{id}` and `/api/users/{uid}`) is rejected.
+
+Example:
+
+    table = RouteTable()
+    table.add("GET", "/api/users/{id}", schema="GetUserDto.json")
+    match = table.lookup("GET", "/api/users/phanith.chhim")
+    match.template   # "/api/users/{id}"
+    match.params     # {"id": "phanith.chhim"}
+    match.settings   # {"schema": "GetUserDto.json"}
+"""
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class RouteMatch(NamedTuple):
+    method: str
+    template: str
+    params: Dict[str, str]
+    settings: Dict[str, Any]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.settings.get(key, default)
+
+
+class _Node:
+    __slots__ = ("static", "param", "route")
+
+    def __init__(self):
+        self.static: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        # (template, settings, placeholder names in order) when a route ends at this node
+        self.route: Optional[Tuple[str, Dict[str, Any], Tuple[str, ...]]] = None
+
+
+def split_path(path: str) -> List[str]:
+    """Split a URL path (query string ignored) into non-empty segments."""
+    path = path.split("?", 1)[0]
+    return [seg for seg in path.split("/") if seg]
+
+
+def _is_param(segment: str) -> bool:
+    return len(segment) > 2 and segment.startswith("{") and segment.endswith("}")
+
+
+class RouteTable:
+    def __init__(self):
+        self._roots: Dict[str, _Node] = {}
+
+    def add(self, method: str, template: str, **settings: Any) -> None:
+        """Register `template` for `method`, merging `settings` into any existing entry."""
+        node = self._roots.setdefault(method.upper(), _Node())
+        names = []
+        for seg in split_path(template):
+            if _is_param(seg):
+                names.append(seg[1:-1])
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.static.setdefault(seg, _Node())
+        if node.route is None:
+            node.route = (template, dict(settings), tuple(names))
+        elif node.route[2] != tuple(names):
+            raise ValueError(f"{method.upper()} {template} conflicts with {node.route[0]}: placeholder names differ")
+        else:
+            node.route[1].update(settings)
+
+    def lookup(self, method: str, path: str) -> Optional[RouteMatch]:
+        """Return the best RouteMatch for a concrete request path, or None."""
+        root = self._roots.get(method.upper())
+        if root is None:
+            return None
+        segments = split_path(path)
+        values: List[str] = []
+        found = self._walk(root, segments, 0, values)
+        if found is None:
+            return None
+        template, settings, names = found
+        return RouteMatch(method.upper(), template, dict(zip(names, values)), settings)
+
+    def _walk(self, node: _Node, segments: List[str], i: int, values: List[str]):
+        if i == len(segments):
+            return node.route
+        child = node.static.get(segments[i])
+        if child is not None:
+            found = self._walk(child, segments, i + 1, values)
+            if found is not None:
+                return found
+        if node.param is not None:
+            values.append(segments[i])
+            found = self._walk(node.param, segments, i + 1, values)
+            if found is not None:
+                return found
+            values.pop()
+        return None
+
+    def routes(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yield `(method, template, settings)` for every registered route."""
+        for method, root in self._roots.items():
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                if node.route is not None:
+                    yield method, node.route[0], node.route[1]
+                stack.extend(node.static.values())
+                if node.param is not None:
+                    stack.append(node.param)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.routes())
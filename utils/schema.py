@@ -2,26 +2,190 @@
 
 Provides a single helper `assert_json_schema(instance, schema)` which raises
 AssertionError when validation fails. Uses the `jsonschema` library.
+
+Compiled validators are kept in a process-wide LRU cache keyed by schema name and
+content hash (`get_validator`), so validating many instances against the same
+schema compiles it once. `validate_instance` is a drop-in for `jsonschema.validate`
+that goes through the same cache.
+
+Schemas in the subset handled by utils/schema_codegen are also compiled into
+generated Python predicates used as a fast path for valid instances; jsonschema
+still produces every error message. Set SCHEMA_CODEGEN=0 to disable it.
 """
-from typing import Any
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
 
 try:
     from jsonschema import Draft7Validator
+    from jsonschema.exceptions import best_match
 except Exception:  # pragma: no cover - handled at runtime when package missing
     Draft7Validator = None
+    best_match = None
 
 
-def assert_json_schema(instance: Any, schema: dict) -> bool:
-    """Validate `instance` against `schema` (JSON Schema). Raise AssertionError on failure.
+# maximum number of compiled validators kept per process
+VALIDATOR_CACHE_SIZE = 128
 
-    Returns True when validation passes.
-    """
+_validator_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+_checked_keys = set()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+CODEGEN_ENABLED = os.environ.get("SCHEMA_CODEGEN", "1").lower() not in ("0", "false", "no")
+# generated predicates keyed like the validator cache and evicted with it (same
+# bound when reached through get_fast_check alone); None marks an unsupported schema
+_fast_checks: "OrderedDict[tuple, Optional[Callable[[Any], bool]]]" = OrderedDict()
+
+
+def _require_jsonschema(caller: str):
     if Draft7Validator is None:
         raise AssertionError(
-            "jsonschema library is required for assert_json_schema; install 'jsonschema'"
+            f"jsonschema library is required for {caller}; install 'jsonschema'"
         )
 
-    validator = Draft7Validator(schema)
+
+def schema_hash(schema: Any) -> str:
+    """Return a stable content hash for a schema document."""
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def get_validator(schema: dict, name: Optional[str] = None, check_schema: bool = False):
+    """Return a compiled Draft7Validator for `schema`, reusing a cached one when possible.
+
+    The cache key is `(name, content hash)`, so an edited schema file is recompiled
+    even when its name is unchanged. When `check_schema` is true the schema is
+    checked against the draft-07 metaschema once, the first time it is seen.
+    """
+    _require_jsonschema("get_validator")
+    return _cached_validator(schema, name, check_schema)[1]
+
+
+def _cached_validator(schema: dict, name: Optional[str], check_schema: bool):
+    key = (name, schema_hash(schema))
+    with _cache_lock:
+        validator = _validator_cache.get(key)
+        if validator is not None:
+            _validator_cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+        else:
+            _cache_stats["misses"] += 1
+    if validator is None:
+        validator = Draft7Validator(schema)
+        with _cache_lock:
+            _validator_cache[key] = validator
+            _validator_cache.move_to_end(key)
+            while len(_validator_cache) > VALIDATOR_CACHE_SIZE:
+                old_key, _ = _validator_cache.popitem(last=False)
+                _checked_keys.discard(old_key)
+                _fast_checks.pop(old_key, None)
+                _cache_stats["evictions"] += 1
+    if check_schema and key not in _checked_keys:
+        Draft7Validator.check_schema(schema)
+        with _cache_lock:
+            _checked_keys.add(key)
+    return key, validator
+
+
+def validate_with(validator, instance: Any) -> None:
+    """Raise the most relevant ValidationError for `instance`, like `jsonschema.validate`."""
+    error = best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
+
+
+def get_fast_check(schema: dict, name: Optional[str] = None) -> Optional[Callable[[Any], bool]]:
+    """Return the generated `is_valid(instance)` predicate for `schema`, or None.
+
+    None means code generation is disabled or the schema uses keywords the
+    generator does not support; callers then rely on jsonschema alone.
+    """
+    if not CODEGEN_ENABLED:
+        return None
+    return _fast_check_for(schema, name, (name, schema_hash(schema)))
+
+
+def _fast_check_for(schema: dict, name: Optional[str], key: tuple) -> Optional[Callable[[Any], bool]]:
+    if not CODEGEN_ENABLED:
+        return None
+    with _cache_lock:
+        if key in _fast_checks:
+            _fast_checks.move_to_end(key)
+            return _fast_checks[key]
+    from .schema_codegen import compile_schema
+
+    check = compile_schema(schema, name, digest=key[1])
+    with _cache_lock:
+        _fast_checks[key] = check
+        while len(_fast_checks) > VALIDATOR_CACHE_SIZE:
+            _fast_checks.popitem(last=False)
+    return check
+
+
+def get_checker(schema: dict, name: Optional[str] = None) -> Callable[[Any], None]:
+    """Return `check(instance)` that raises ValidationError like `validate_instance`.
+
+    Cache lookups happen once here, so this is the form to use in per-item loops.
+    Instances accepted by the generated predicate skip jsonschema entirely.
+    """
+    _require_jsonschema("get_checker")
+    key, validator = _cached_validator(schema, name, check_schema=True)
+    fast = _fast_check_for(schema, name, key)
+    if fast is None:
+        return lambda instance: validate_with(validator, instance)
+
+    def check(instance: Any) -> None:
+        if not fast(instance):
+            validate_with(validator, instance)
+
+    return check
+
+
+def validate_instance(instance: Any, schema: dict, name: Optional[str] = None) -> None:
+    """Cached equivalent of `jsonschema.validate(instance, schema)`.
+
+    Raises jsonschema.SchemaError for an invalid schema and
+    jsonschema.ValidationError for an invalid instance.
+    """
+    get_checker(schema, name)(instance)
+
+
+def validator_cache_info() -> dict:
+    """Return hit/miss/eviction counters and the current cache size."""
+    with _cache_lock:
+        info = dict(_cache_stats)
+        info["size"] = len(_validator_cache)
+        info["fast_checks"] = len(_fast_checks)
+    info["maxsize"] = VALIDATOR_CACHE_SIZE
+    return info
+
+
+def clear_validator_cache() -> None:
+    """Drop every cached validator and reset the counters."""
+    with _cache_lock:
+        _validator_cache.clear()
+        _checked_keys.clear()
+        _fast_checks.clear()
+        for k in _cache_stats:
+            _cache_stats[k] = 0
+
+
+def assert_json_schema(instance: Any, schema: dict, name: Optional[str] = None) -> bool:
+    """Validate `instance` against `schema` (JSON Schema). Raise AssertionError on failure.
+
+    `name` (usually the schema filename) is only used as part of the validator cache key.
+    Returns True when validation passes.
+    """
+    _require_jsonschema("assert_json_schema")
+
+    key, validator = _cached_validator(schema, name, check_schema=False)
+    fast = _fast_check_for(schema, name, key)
+    if fast is not None and fast(instance):
+        return True
     errors = sorted(validator.iter_errors(instance), key=lambda e: list(e.path))
     if errors:
         parts = []
@@ -0,0 +1,273 @@
+"""Compile simple draft-07 schemas into specialised Python predicates.
+
+The schemas under utils/schemas are flat objects of nullable scalars, which the
+generic jsonschema interpreter walks keyword by keyword for every instance.
+`compile_schema(schema, name)` instead generates a module with one function,
+
+    def is_valid(instance) -> bool
+
+made of straight-line isinstance checks, writes it under utils/_generated/ (or
+$SCHEMA_CODEGEN_DIR) and loads it. Modules are named after the schema and its
+content hash, so an edited schema gets a new module instead of overwriting the
+one other processes may still be loading.
+
+Only a subset of draft-07 is supported (type, properties, required,
+additionalProperties as a boolean, items as a single schema, string-only enum,
+const strings, min/maxLength, minimum/maximum, min/maxItems, pattern). For any other
+keyword `compile_schema` returns None and callers keep using jsonschema. The
+predicate is only a fast path: when it returns False the caller re-validates with
+jsonschema to get the usual error message.
+"""
+import os
+import re
+from typing import Any, Callable, List, Optional
+
+GENERATED_DIR = os.path.join(os.path.dirname(__file__), "_generated")
+
+
+def generated_dir() -> str:
+    """Directory generated modules go to: $SCHEMA_CODEGEN_DIR, else utils/_generated/."""
+    return os.environ.get("SCHEMA_CODEGEN_DIR") or GENERATED_DIR
+
+# bump when the generated code changes so existing modules are rebuilt
+CODEGEN_VERSION = 1
+
+# keywords that only annotate and never affect validity
+_ANNOTATIONS = {"$schema", "$id", "title", "description", "default", "examples", "$comment"}
+
+_TYPE_CHECKS = {
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    # draft-07: bool is not a number, and 1.0 counts as an integer
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": "((isinstance({v}, int) and not isinstance({v}, bool)) or (isinstance({v}, float) and {v}.is_integer()))",
+}
+_NUMBER = "(isinstance({v}, (int, float)) and not isinstance({v}, bool))"
+
+
+class UnsupportedSchema(ValueError):
+    """Raised when a schema uses a keyword the generator does not handle."""
+
+
+class _Generator:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.constants: List[str] = []
+        self._n = 0
+
+    def var(self) -> str:
+        self._n += 1
+        return f"v{self._n}"
+
+    def const(self, expr: str) -> str:
+        name = f"_C{len(self.constants)}"
+        self.constants.append(f"{name} = {expr}")
+        return name
+
+    def out(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def fail_unless(self, indent: int, cond: str) -> None:
+        self.out(indent, f"if not ({cond}):")
+        self.out(indent + 1, "return False")
+
+    def emit(self, schema: Any, v: str, indent: int) -> None:
+        """Emit statements that `return False` when the value in variable `v` violates `schema`."""
+        if schema is True or schema == {}:
+            return
+        if schema is False:
+            self.out(indent, "return False")
+            return
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema(f"schema must be an object or boolean, got {type(schema).__name__}")
+        unknown = set(schema) - _ANNOTATIONS - {
+            "type", "properties", "required", "additionalProperties", "items", "enum", "const",
+            "minLength", "maxLength", "minimum", "maximum", "minItems", "maxItems", "pattern",
+        }
+        if unknown:
+            raise UnsupportedSchema(f"unsupported keywords: {', '.join(sorted(unknown))}")
+
+        types = schema.get("type")
+        if types is not None:
+            types = [types] if isinstance(types, str) else list(types)
+            if not types or any(t not in _TYPE_CHECKS for t in types):
+                raise UnsupportedSchema(f"unsupported type: {schema['type']!r}")
+            self.fail_unless(indent, " or ".join(_TYPE_CHECKS[t].format(v=v) for t in types))
+
+        if "enum" in schema:
+            values = schema["enum"]
+            if not isinstance(values, list) or not all(isinstance(x, str) or x is None for x in values):
+                raise UnsupportedSchema("enum is only compiled for string/null values")
+            strings = self.const(repr(frozenset(x for x in values if x is not None)))
+            cond = f"(isinstance({v}, str) and {v} in {strings})"
+            if None in values:
+                cond = f"{v} is None or {cond}"
+            self.fail_unless(indent, cond)
+        if "const" in schema:
+            if not isinstance(schema["const"], str):
+                raise UnsupportedSchema("const is only compiled for strings")
+            self.fail_unless(indent, f"{v} == {schema['const']!r} and isinstance({v}, str)")
+
+        self._emit_string(schema, v, indent, types)
+        self._emit_number(schema, v, indent, types)
+        self._emit_object(schema, v, indent, types)
+        self._emit_array(schema, v, indent, types)
+
+    def _guard(self, indent: int, v: str, kind: str, types: Optional[list]) -> int:
+        """Open an `if isinstance(...)` block unless `type` already pins the value to `kind`."""
+        if types == [kind]:
+            return indent
+        check = _NUMBER if kind == "number" else _TYPE_CHECKS[kind]
+        self.out(indent, f"if {check.format(v=v)}:")
+        return indent + 1
+
+    def _emit_string(self, schema: dict, v: str, indent: int, types: Optional[list]) -> None:
+        keys = [k for k in ("minLength", "maxLength", "pattern") if k in schema]
+        if not keys:
+            return
+        inner = self._guard(indent, v, "string", types)
+        if "minLength" in schema:
+            self.fail_unless(inner, f"len({v}) >= {int(schema['minLength'])}")
+        if "maxLength" in schema:
+            self.fail_unless(inner, f"len({v}) <= {int(schema['maxLength'])}")
+        if "pattern" in schema:
+            rx = self.const(f"re.compile({schema['pattern']!r})")
+            self.fail_unless(inner, f"{rx}.search({v}) is not None")
+
+    def _emit_number(self, schema: dict, v: str, indent: int, types: Optional[list]) -> None:
+        keys = [k for k in ("minimum", "maximum") if k in schema]
+        if not keys:
+            return
+        for k in keys:
+            if isinstance(schema[k], bool) or not isinstance(schema[k], (int, float)):
+                raise UnsupportedSchema(f"{k} must be a number")
+        inner = self._guard(indent, v, "number", types if types != ["integer"] else ["number"])
+        if "minimum" in schema:
+            self.fail_unless(inner, f"{v} >= {schema['minimum']!r}")
+        if "maximum" in schema:
+            self.fail_unless(inner, f"{v} <= {schema['maximum']!r}")
+
+    def _emit_object(self, schema: dict, v: str, indent: int, types: Optional[list]) -> None:
+        props = schema.get("properties") or {}
+        required = schema.get("required") or []
+        additional = schema.get("additionalProperties", True)
+        if not (props or required or additional is not True):
+            return
+        if not isinstance(props, dict) or not isinstance(required, list) or not isinstance(additional, bool):
+            raise UnsupportedSchema("properties/required/additionalProperties in an unsupported form")
+        start = len(self.lines)
+        inner = self._guard(indent, v, "object", types)
+        for key in required:
+            self.fail_unless(inner, f"{key!r} in {v}")
+        if additional is False:
+            allowed = self.const(repr(frozenset(props)))
+            self.fail_unless(inner, f"{allowed}.issuperset({v})")
+        for key, sub in props.items():
+            if sub is True or sub == {}:
+                continue
+            child = self.var()
+            if key in required:
+                self.out(inner, f"{child} = {v}[{key!r}]")
+                self.emit(sub, child, inner)
+            else:
+                self.out(inner, f"if {key!r} in {v}:")
+                self.out(inner + 1, f"{child} = {v}[{key!r}]")
+                self.emit(sub, child, inner + 1)
+        if inner > indent and len(self.lines) == start + 1:
+            self.lines.pop()  # nothing to check inside the isinstance guard
+
+    def _emit_array(self, schema: dict, v: str, indent: int, types: Optional[list]) -> None:
+        keys = [k for k in ("items", "minItems", "maxItems") if k in schema]
+        if not keys:
+            return
+        if isinstance(schema.get("items"), list):
+            raise UnsupportedSchema("tuple-form items are not compiled")
+        inner = self._guard(indent, v, "array", types)
+        if "minItems" in schema:
+            self.fail_unless(inner, f"len({v}) >= {int(schema['minItems'])}")
+        if "maxItems" in schema:
+            self.fail_unless(inner, f"len({v}) <= {int(schema['maxItems'])}")
+        if "items" in schema:
+            child = self.var()
+            start = len(self.lines)
+            self.out(inner, f"for {child} in {v}:")
+            self.emit(schema["items"], child, inner + 1)
+            if len(self.lines) == start + 1:
+                self.lines.pop()  # items schema accepts anything
+
+
+def generate_source(schema: Any, name: Optional[str] = None, digest: str = "") -> str:
+    """Return the source of a module defining `is_valid(instance)` for `schema`.
+
+    Raises UnsupportedSchema when the schema needs the generic validator.
+    """
+    gen = _Generator()
+    gen.emit(schema, "v0", 1)
+    header = [
+        f'"""Generated from {name or "<schema>"} by utils/schema_codegen.py; do not edit."""',
+        "import re  # noqa: F401",
+        "",
+        f"CODEGEN_VERSION = {CODEGEN_VERSION}",
+        f"SCHEMA_HASH = {digest!r}",
+        *gen.constants,
+        "",
+        "",
+        "def is_valid(v0):",
+    ]
+    return "\n".join(header + gen.lines + ["    return True", ""])
+
+
+def _module_path(name: Optional[str], digest: str, directory: str) -> str:
+    stem = re.sub(r"\W", "_", os.path.splitext(os.path.basename(name))[0]) if name else "schema"
+    return os.path.join(directory, f"{stem}_{digest[:12]}.py")
+
+
+def _load(path: str) -> dict:
+    # executed from source rather than imported: a module rewritten within the same
+    # second could otherwise be served from stale bytecode in __pycache__
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    namespace: dict = {}
+    exec(compile(source, path, "exec"), namespace)
+    return namespace
+
+
+def compile_schema(schema: Any, name: Optional[str] = None, digest: Optional[str] = None) -> Optional[Callable[[Any], bool]]:
+    """Return the generated `is_valid` predicate for `schema`, or None if it is unsupported.
+
+    The module is reused from generated_dir() when its recorded hash and generator
+    version match; otherwise it is regenerated. If the directory is not writable the
+    code is compiled in memory instead.
+    """
+    if digest is None:
+        from .schema import schema_hash
+
+        digest = schema_hash(schema)
+    directory = generated_dir()
+    path = _module_path(name, digest, directory)
+    if os.path.exists(path):
+        try:
+            module = _load(path)
+            if module.get("SCHEMA_HASH") == digest and module.get("CODEGEN_VERSION") == CODEGEN_VERSION:
+                return module["is_valid"]
+        except Exception:
+            pass  # stale or broken module: regenerate below
+    try:
+        source = generate_source(schema, name, digest)
+    except UnsupportedSchema:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(source)
+        os.replace(tmp, path)
+    except OSError:
+        path = f"<generated {name or digest[:12]}>"
+    namespace: dict = {}
+    exec(compile(source, path, "exec"), namespace)
+    return namespace["is_valid"]
+
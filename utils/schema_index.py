@@ -0,0 +1,164 @@
+"""Fingerprint index over the JSON schemas in `utils/schemas/`.
+
+Used by the "which schema does this response look like" fallback in
+scripts/check_endpoints.py. Each schema is reduced once to a fingerprint (accepted
+types, required keys, property names) and the fingerprints are indexed by type and
+by property name, so a response body is only fully validated against the few schemas
+that could plausibly describe it, best candidate first.
+"""
+import os
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from . import schema_loader
+
+ANY_TYPE = "*"
+
+
+class SchemaFingerprint(NamedTuple):
+    name: str
+    types: frozenset
+    required: frozenset
+    properties: frozenset
+    closed: bool  # additionalProperties: false
+
+
+def json_type(value: Any) -> str:
+    """Return the JSON Schema type name of a decoded JSON value."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
+
+
+def fingerprint_schema(name: str, schema: dict) -> SchemaFingerprint:
+    """Reduce a schema document to the features used for candidate selection."""
+    typ = schema.get("type")
+    if typ is None:
+        types = frozenset([ANY_TYPE])
+    elif isinstance(typ, list):
+        types = frozenset(typ)
+    else:
+        types = frozenset([typ])
+    return SchemaFingerprint(
+        name=name,
+        types=types,
+        required=frozenset(schema.get("required") or ()),
+        properties=frozenset((schema.get("properties") or {}).keys()),
+        closed=schema.get("additionalProperties") is False,
+    )
+
+
+class SchemaIndex:
+    """Precomputed fingerprints for a set of named schemas."""
+
+    def __init__(self, schemas: Dict[str, dict]):
+        self.schemas = dict(schemas)
+        self.fingerprints = {name: fingerprint_schema(name, s) for name, s in self.schemas.items()}
+        self._by_type = defaultdict(list)
+        self._by_property = defaultdict(set)
+        for fp in self.fingerprints.values():
+            for t in fp.types:
+                self._by_type[t].append(fp)
+            for prop in fp.properties:
+                self._by_property[prop].add(fp.name)
+
+    @classmethod
+    def from_directory(cls, schema_dir: Optional[str] = None) -> "SchemaIndex":
+        """Build an index from every `*.json` schema in `schema_dir` (default: utils/schemas)."""
+        if schema_dir is None:
+            schema_dir = os.path.join(os.path.dirname(schema_loader.__file__), "schemas")
+        schemas = {}
+        if os.path.isdir(schema_dir):
+            for fname in sorted(os.listdir(schema_dir)):
+                if not fname.lower().endswith(".json"):
+                    continue
+                s = schema_loader.load_schema(fname)
+                if isinstance(s, dict):
+                    schemas[fname] = s
+        return cls(schemas)
+
+    def _pool(self, typ: str) -> List[SchemaFingerprint]:
+        pool = list(self._by_type.get(typ, ()))
+        if typ == "integer":
+            pool.extend(self._by_type.get("number", ()))
+        pool.extend(self._by_type.get(ANY_TYPE, ()))
+        return pool
+
+    def candidates(self, body: Any, limit: Optional[int] = None) -> List[Tuple[str, tuple]]:
+        """Return `(schema_name, score)` pairs that could match `body`, most specific first.
+
+        For objects a schema is only a candidate when all its required keys are present,
+        it does not forbid any of the body's keys, and (when both sides declare keys) at
+        least one property name is shared. The score ranks by the share of body keys the
+        schema describes, then by how many required keys it pins down, then by how few
+        declared properties are missing from the body.
+        """
+        typ = json_type(body)
+        ranked = []
+        if typ == "object":
+            keys = frozenset(body.keys())
+            overlap = Counter()
+            for key in keys:
+                for name in self._by_property.get(key, ()):
+                    overlap[name] += 1
+            for fp in self._pool(typ):
+                if not fp.required <= keys:
+                    continue
+                if fp.closed and not keys <= fp.properties:
+                    continue
+                shared = overlap[fp.name]
+                if keys and fp.properties and not shared:
+                    continue
+                coverage = shared / len(keys) if keys else 1.0
+                score = (round(coverage, 6), len(fp.required), shared, -len(fp.properties - keys))
+                ranked.append((fp.name, score))
+        else:
+            for fp in self._pool(typ):
+                ranked.append((fp.name, (1.0 if typ in fp.types else 0.0, 0, 0, 0)))
+        ranked.sort(key=lambda pair: (tuple(-v for v in pair[1]), pair[0]))
+        return ranked[:limit] if limit else ranked
+
+    def match(
+        self, body: Any, validate: Callable[[Any, dict, str], None], limit: Optional[int] = None, first: bool = True,
+    ) -> List[str]:
+        """Fully validate `body` against the candidates in ranked order; return the names that pass.
+
+        The ranking only decides the order: every candidate is tried (unless `limit`
+        is given), and with `first` the search stops at the first schema that passes.
+        `validate(instance, schema, name)` must raise on a validation failure.
+        """
+        matches = []
+        for name, _score in self.candidates(body, limit=limit):
+            try:
+                validate(body, self.schemas[name], name)
+            except Exception:
+                continue
+            matches.append(name)
+            if first:
+                break
+        return matches
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_default_index() -> SchemaIndex:
+    """Return the process-wide index over utils/schemas, building it on first use."""
+    global _default_index
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = SchemaIndex.from_directory()
+    return _default_index
@@ -1,17 +1,16 @@
 import os
 import json
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
 
-def load_schema(name: str) -> Optional[dict]:
-    """Load a JSON schema by name.
+def candidate_paths(name: str) -> Iterator[str]:
+    """Yield the existing files under `utils/schemas/` that `load_schema(name)` would try, in order.
 
-    Tries several candidate filenames under `utils/schemas/`:
+    Tries several candidate filenames:
     - name (as-is)
     - name + .json
     - with common DTO prefixes/suffixes (e.g., GetUserDto.json)
     - lowercase variants and _-separated variants
-    Returns the parsed JSON object or None if not found.
     """
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "schemas"))
     candidates = []
@@ -42,9 +41,24 @@ def load_schema(name: str) -> Optional[dict]:
             continue
         tried.add(path)
         if os.path.exists(path):
-            try:
-                with open(path) as f:
-                    return json.load(f)
-            except Exception:
-                continue
-    return None
+            yield path
+
+
+def load_schema_with_path(name: str) -> Tuple[Optional[dict], Optional[str]]:
+    """Like `load_schema`, but also return the path of the file that was loaded."""
+    for path in candidate_paths(name):
+        try:
+            with open(path) as f:
+                return json.load(f), path
+        except Exception:
+            continue
+    return None, None
+
+
+def load_schema(name: str) -> Optional[dict]:
+    """Load a JSON schema by name.
+
+    See `candidate_paths` for the filenames tried under `utils/schemas/`.
+    Returns the parsed JSON object or None if not found.
+    """
+    return load_schema_with_path(name)[0]
@@ -0,0 +1,80 @@
+"""Per-endpoint latency budgets (SLOs) evaluated from sampled timings.
+
+A budget maps latency metrics to limits in milliseconds, as declared on a catalog
+entry in endpoints.yaml:
+
+    - method: GET
+      path: /api/users
+      budget: {p95_ms: 200, max_ms: 1000}
+
+Supported metrics are `pNN_ms` for any percentile (`p95_ms`, `p99.9_ms`), plus
+`min_ms`, `max_ms` and `mean_ms`. `evaluate_budget()` checks a budget against a
+LatencyHistogram and returns the breaches; percentiles come from the histogram, so
+they carry its ~1% bucket precision. With fewer than MIN_SAMPLES samples (a single
+cold request under the default --repeat 1) the budget is not judged either way.
+"""
+import re
+from typing import Dict, Optional
+
+from .histogram import LatencyHistogram
+
+_PERCENTILE_RE = re.compile(r"^p(\d{1,2}(?:\.\d+)?|100)_ms$")
+_FIXED_METRICS = ("min_ms", "max_ms", "mean_ms")
+# below this many samples a percentile says more about one cold request than the endpoint
+MIN_SAMPLES = 8
+
+
+def parse_budget(spec) -> Dict[str, float]:
+    """Validate a budget mapping and return it with float limits.
+
+    Raises ValueError for an unknown metric or a non-positive limit.
+    """
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError("budget must be a non-empty mapping of metric to milliseconds, e.g. {p95_ms: 200}")
+    budget = {}
+    for metric, limit in spec.items():
+        metric = str(metric)
+        if metric not in _FIXED_METRICS and not _PERCENTILE_RE.match(metric):
+            raise ValueError(f"unknown budget metric {metric!r}; use pNN_ms, min_ms, max_ms or mean_ms")
+        if isinstance(limit, bool) or not isinstance(limit, (int, float)) or limit <= 0:
+            raise ValueError(f"budget {metric} must be a positive number of milliseconds, got {limit!r}")
+        budget[metric] = float(limit)
+    return budget
+
+
+def metric_value(hist: LatencyHistogram, metric: str) -> Optional[float]:
+    """Return the value of a budget metric in ms (None when nothing was sampled)."""
+    if not hist.count:
+        return None
+    if metric == "min_ms":
+        return hist.min_us / 1000.0
+    if metric == "max_ms":
+        return hist.max_us / 1000.0
+    if metric == "mean_ms":
+        return hist.total_us / hist.count / 1000.0
+    return hist.percentile(float(_PERCENTILE_RE.match(metric).group(1)))
+
+
+def evaluate_budget(budget: Dict[str, float], hist: LatencyHistogram, min_samples: int = MIN_SAMPLES) -> dict:
+    """Check `hist` against `budget`.
+
+    Returns `{"ok", "status", "samples", "checks", "breaches"}`; each check is
+    `{"metric", "limit_ms", "actual_ms", "ok"}` and `status` is "pass" or "fail".
+    With fewer than `min_samples` samples the budget cannot be judged: `ok` is None,
+    `status` is "insufficient_samples" and there are no checks.
+    """
+    if hist.count < max(1, min_samples):
+        return {"ok": None, "status": "insufficient_samples", "samples": hist.count, "checks": [], "breaches": []}
+    checks = []
+    for metric, limit in budget.items():
+        actual = metric_value(hist, metric)
+        checks.append({"metric": metric, "limit_ms": limit, "actual_ms": round(actual, 3), "ok": actual <= limit})
+    breaches = [c for c in checks if not c["ok"]]
+    return {
+        "ok": not breaches, "status": "fail" if breaches else "pass",
+        "samples": hist.count, "checks": checks, "breaches": breaches,
+    }
+
+
+def format_breach(check: dict) -> str:
+    return f"{check['metric']} {check['actual_ms']:.1f}ms > {check['limit_ms']:g}ms"
@@ -0,0 +1,200 @@
+"""Client-side rate limiting, Retry-After handling and a session-wide retry budget.
+
+A `Throttle` is shared by a session's adapter and its `BudgetRetry` policy:
+
+- rate limit: a token bucket per host (`rate` requests/second, bursts of `burst`).
+  A request that finds the bucket empty sleeps until its token is due.
+- Retry-After: a 429/503 (or 413) carrying `Retry-After` holds back every later
+  request to that host until the indicated time. Retries that would have to wait
+  longer than `max_retry_after` seconds are not attempted and the response is returned.
+- retry budget: retries across the whole session are capped at
+  `min_retries + retry_budget * requests`. Once staging degrades, the retry traffic
+  stays at a fraction of the real traffic instead of multiplying it. A denied retry
+  returns the last response (or raises the connection error), as an exhausted
+  Retry would.
+
+`ThrottleStats` counts:
+
+- `requests`           requests sent through the adapter (retries not included)
+- `throttled` / `wait_ms`  requests delayed by the rate limit or a Retry-After, and the time spent waiting
+- `retries`            retries granted
+- `retries_denied`     retries refused by the budget
+- `retry_after_capped` retries skipped because Retry-After exceeded `max_retry_after`
+"""
+import threading
+import time
+from typing import Optional
+
+from urllib3.exceptions import InvalidHeader, MaxRetryError, ResponseError
+from urllib3.util import Retry, parse_url
+
+DEFAULT_RETRY_BUDGET = 0.2
+DEFAULT_MIN_RETRIES = 10
+DEFAULT_MAX_RETRY_AFTER = 30.0
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def host_key(scheme: Optional[str], host: Optional[str], port: Optional[int]) -> str:
+    scheme = (scheme or "http").lower()
+    return f"{scheme}://{(host or '').lower()}:{port or _DEFAULT_PORTS.get(scheme, 0)}"
+
+
+class ThrottleStats:
+    __slots__ = ("requests", "throttled", "wait_ms", "retries", "retries_denied", "retry_after_capped", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.throttled = 0
+        self.wait_ms = 0.0
+        self.retries = 0
+        self.retries_denied = 0
+        self.retry_after_capped = 0
+
+    def add(self, field: str, amount=1) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "wait_ms": round(self.wait_ms, 3),
+            "retries": self.retries,
+            "retries_denied": self.retries_denied,
+            "retry_after_capped": self.retry_after_capped,
+        }
+
+    def __repr__(self):
+        return f"ThrottleStats({self.as_dict()})"
+
+
+class TokenBucket:
+    """Token bucket with reservations: `reserve()` takes a token and returns how long to wait for it.
+
+    With `rate=None` there is no rate limit and only `defer()` (Retry-After) delays requests.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = float(burst or max(1.0, rate or 1.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.not_before = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.not_before - now)
+            if self.rate:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                self.tokens -= 1.0
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def defer(self, seconds: float) -> None:
+        """Hold back requests for `seconds` from now (does not shorten an earlier deferral)."""
+        with self._lock:
+            self.not_before = max(self.not_before, time.monotonic() + seconds)
+
+
+class Throttle:
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        retry_budget: Optional[float] = DEFAULT_RETRY_BUDGET,
+        min_retries: int = DEFAULT_MIN_RETRIES,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+    ):
+        if retry_budget is not None and retry_budget < 0:
+            raise ValueError("retry_budget must be >= 0")
+        self.rate = rate
+        self.burst = burst
+        self.retry_budget = retry_budget
+        self.min_retries = min_retries
+        self.max_retry_after = max_retry_after
+        self.stats = ThrottleStats()
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def before_send(self, url: str) -> float:
+        """Count the request and wait for the host's rate limit / Retry-After. Returns seconds waited."""
+        u = parse_url(url)
+        self.stats.add("requests")
+        wait = self.bucket(host_key(u.scheme, u.host, u.port)).reserve()
+        if wait > 0:
+            self.stats.add("throttled")
+            self.stats.add("wait_ms", wait * 1000.0)
+            time.sleep(wait)
+        return wait
+
+    def retry_after(self, response) -> Optional[float]:
+        """Seconds from the response's Retry-After header (413/429/503 only), or None."""
+        if response is None or response.status not in Retry.RETRY_AFTER_STATUS_CODES:
+            return None
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return Retry().parse_retry_after(value)
+        except InvalidHeader:
+            return None
+
+    def observe(self, scheme: str, host: str, port: Optional[int], response) -> Optional[float]:
+        """Defer the host when `response` asks us to come back later."""
+        seconds = self.retry_after(response)
+        if seconds:
+            self.bucket(host_key(scheme, host, port)).defer(seconds)
+        return seconds
+
+    def allow_retry(self, response=None, pool=None) -> bool:
+        if pool is not None and response is not None:
+            seconds = self.observe(pool.scheme, pool.host, pool.port, response)
+            if seconds is not None and seconds > self.max_retry_after:
+                self.stats.add("retry_after_capped")
+                return False
+        if self.retry_budget is not None:
+            with self._lock:
+                allowed = self.stats.retries < self.min_retries + self.retry_budget * self.stats.requests
+            if not allowed:
+                self.stats.add("retries_denied")
+                return False
+        self.stats.add("retries")
+        return True
+
+
+class BudgetRetry(Retry):
+    """urllib3 Retry that asks a shared Throttle before every retry."""
+
+    def __init__(self, *args, throttle: Optional[Throttle] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.throttle = throttle
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.throttle = self.throttle
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        # raises MaxRetryError itself once the attempts are used up
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if self.throttle is not None and not self.throttle.allow_retry(response, _pool):
+            raise MaxRetryError(_pool, url, error or ResponseError("retry denied by client throttle"))
+        return retry
@@ -0,0 +1,168 @@
+"""Opt-in per-phase timing for requests made through a requests.Session.
+
+`get_session_with_retries(timing=True)` returns a `TimedSession` whose adapter uses
+urllib3 connection classes instrumented to record, per request:
+
+- `dns_ms`      name resolution (0 when a pooled connection is reused)
+- `connect_ms`  TCP connect
+- `tls_ms`      TLS handshake (HTTPS only)
+- `ttfb_ms`     request fully sent -> response headers received (server think time)
+- `transfer_ms` response headers -> body fully read
+- `total_ms`    wall time of the whole call
+- `reused`      True when an existing keep-alive connection was used
+
+The result is attached to the response as `resp.timings` (a `RequestTiming`).
+Bodies read with `stream=True` are not included in `transfer_ms`.
+"""
+import socket
+import threading
+import time
+from typing import Optional
+
+import requests
+from urllib3.connection import HTTPConnection, HTTPSConnection
+
+from .pool import PooledHTTPAdapter, StatsHTTPConnectionPool, StatsHTTPSConnectionPool
+
+_local = threading.local()
+
+
+class RequestTiming:
+    __slots__ = (
+        "started", "headers_at", "dns_ms", "connect_ms", "tls_ms", "ttfb_ms",
+        "transfer_ms", "total_ms", "reused", "connections", "_sent_at",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.headers_at: Optional[float] = None
+        self.dns_ms = 0.0
+        self.connect_ms = 0.0
+        self.tls_ms = 0.0
+        self.ttfb_ms = 0.0
+        self.transfer_ms = 0.0
+        self.total_ms = 0.0
+        self.reused = True
+        self.connections = 0
+        self._sent_at: Optional[float] = None
+
+    def finish(self) -> "RequestTiming":
+        """Close the measurement once the body has been read."""
+        now = time.perf_counter()
+        if self.headers_at is not None:
+            self.transfer_ms = (now - self.headers_at) * 1000.0
+        self.total_ms = (now - self.started) * 1000.0
+        return self
+
+    def as_dict(self) -> dict:
+        return {
+            "dns_ms": round(self.dns_ms, 3),
+            "connect_ms": round(self.connect_ms, 3),
+            "tls_ms": round(self.tls_ms, 3),
+            "ttfb_ms": round(self.ttfb_ms, 3),
+            "transfer_ms": round(self.transfer_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+            "reused": self.reused,
+            "connections": self.connections,
+        }
+
+    def __repr__(self):
+        return f"RequestTiming({self.as_dict()})"
+
+
+def current_timing() -> Optional[RequestTiming]:
+    return getattr(_local, "timing", None)
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        timing = current_timing()
+        if timing is None:
+            return super()._new_conn()
+        host = self._dns_host
+        t0 = time.perf_counter()
+        try:
+            addrs = {info[4][0] for info in socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)}
+        except OSError:
+            addrs = set()  # let urllib3 resolve again and raise its own error
+        t1 = time.perf_counter()
+        # pin a single resolved address so connect time excludes DNS; with several
+        # addresses keep the hostname so urllib3 can still fall back between them
+        if len(addrs) == 1:
+            self._dns_host = next(iter(addrs))
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        t2 = time.perf_counter()
+        timing.dns_ms += (t1 - t0) * 1000.0
+        timing.connect_ms += (t2 - t1) * 1000.0
+        timing.reused = False
+        timing.connections += 1
+        return sock
+
+    def request(self, *args, **kwargs):
+        super().request(*args, **kwargs)
+        timing = current_timing()
+        if timing is not None:
+            timing._sent_at = time.perf_counter()
+
+    def getresponse(self, *args, **kwargs):
+        resp = super().getresponse(*args, **kwargs)
+        timing = current_timing()
+        if timing is not None and timing._sent_at is not None:
+            timing.ttfb_ms = (time.perf_counter() - timing._sent_at) * 1000.0
+        return resp
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        timing = current_timing()
+        if timing is None:
+            return super().connect()
+        before = timing.dns_ms + timing.connect_ms
+        t0 = time.perf_counter()
+        super().connect()
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        # whatever connect() spent beyond DNS + TCP is the TLS handshake
+        timing.tls_ms += max(0.0, elapsed - (timing.dns_ms + timing.connect_ms - before))
+
+
+class TimedHTTPConnectionPool(StatsHTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(StatsHTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(PooledHTTPAdapter):
+    """PooledHTTPAdapter whose pools use the instrumented connection classes."""
+
+    pool_classes = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+    def send_unthrottled(self, request, **kwargs):
+        timing = RequestTiming()
+        _local.timing = timing
+        try:
+            resp = super().send_unthrottled(request, **kwargs)
+        finally:
+            _local.timing = None
+        timing.headers_at = time.perf_counter()
+        resp.timings = timing
+        return resp
+
+
+class TimedSession(requests.Session):
+    """Session that completes `resp.timings` after the body has been read."""
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        timing = getattr(resp, "timings", None)
+        if timing is not None:
+            timing.finish()
+        return resp
@@ -0,0 +1,90 @@
+"""Splitting a pytest run across worker processes.
+
+`scripts/run_parallel.py` starts N pytest processes with `TEST_WORKER=gw<i>` and
+`TEST_WORKERS=N`. Every worker collects the whole suite and keeps only the test
+files `assign_files` gives it. The assignment is deterministic, so the workers
+agree on it without talking to each other. Files are balanced by their recorded
+run time (`.cache/test_durations.json`, or TEST_DURATIONS; learnt from earlier
+split runs), falling back to their number of tests. Runs that are not split leave
+that file alone.
+
+Files a worker writes get the worker id in their name (`worker_path`), and the
+runner merges them when every worker is done. Under pytest-xdist the id comes from
+PYTEST_XDIST_WORKER and xdist does the splitting itself.
+"""
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from .filelock import file_lock
+
+DURATIONS_PATH = os.path.join(".cache", "test_durations.json")
+
+
+def durations_path(root: str) -> str:
+    """The durations file: TEST_DURATIONS if set, else DURATIONS_PATH under `root`."""
+    return os.environ.get("TEST_DURATIONS") or os.path.join(root, DURATIONS_PATH)
+
+
+def worker_id() -> Optional[str]:
+    """This process's worker id (`gw0`, `gw1`...), or None outside a parallel run."""
+    return os.environ.get("TEST_WORKER") or os.environ.get("PYTEST_XDIST_WORKER") or None
+
+
+def worker_shard() -> Optional[Tuple[int, int]]:
+    """(index, count) of this worker when scripts/run_parallel.py split the run, else None."""
+    worker, count = os.environ.get("TEST_WORKER"), os.environ.get("TEST_WORKERS")
+    if not worker or not count:
+        return None
+    return int(worker.lstrip("gw")), int(count)
+
+
+def worker_path(path: str, worker: Optional[str] = None) -> str:
+    """`reports/x.xml` -> `reports/x.gw1.xml` for worker gw1; unchanged outside a parallel run."""
+    worker = worker or worker_id()
+    if not worker:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{worker}{ext}"
+
+
+def assign_files(tests_per_file: Dict[str, int], workers: int, durations: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+    """Map each test file to a worker index, balancing the expected run time.
+
+    Longest-processing-time first: files, heaviest first, go to the least loaded
+    worker. A file without a recorded duration weighs its test count times the
+    mean recorded seconds per test.
+    """
+    durations = durations or {}
+    known = [f for f in tests_per_file if f in durations]
+    per_test = (sum(durations[f] for f in known) / sum(tests_per_file[f] for f in known)) if known else 1.0
+    weights = {f: durations.get(f, n * per_test) for f, n in tests_per_file.items()}
+    loads = [0.0] * max(1, workers)
+    assignment = {}
+    for f in sorted(weights, key=lambda f: (-weights[f], f)):
+        i = min(range(len(loads)), key=lambda i: (loads[i], i))
+        assignment[f] = i
+        loads[i] += weights[f]
+    return assignment
+
+
+def load_durations(path: str = DURATIONS_PATH) -> Dict[str, float]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_durations(durations: Dict[str, float], path: str = DURATIONS_PATH) -> None:
+    """Merge per-file durations into the durations file (other files keep theirs)."""
+    if not durations:
+        return
+    with file_lock(f"{path}.lock"):
+        data = load_durations(path)
+        data.update({f: round(s, 3) for f, s in durations.items()})
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)